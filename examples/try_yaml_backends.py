@@ -0,0 +1,136 @@
+"""
+Benchmark yaml backends used for `*.info` and `*.config` state files
+
++ python yaml (default)
++ libyaml based `YamlCDumper` / `YamlCLoader`
++ compact binary format `YamlBinary` (only for `*.config`)
+
+Run with `python try_yaml_backends.py [num_files]`
+"""
+import dataclasses
+import datetime
+import enum
+import pathlib
+import sys
+import tempfile
+import time
+import typing as t
+from rich import print
+
+sys.path.append("..")
+
+from toolcraft import marshalling as m
+from toolcraft import Settings
+
+
+class Mode(m.FrozenEnum, enum.Enum):
+    train = "train"
+    test = "test"
+
+
+@dataclasses.dataclass(frozen=True)
+class Child(m.HashableClass):
+    a: int
+    b: float = 0.5
+    mode: Mode = Mode.train
+
+
+@dataclasses.dataclass(frozen=True)
+class Parent(m.HashableClass):
+    name_: str
+    child: Child
+    sizes: t.List[int] = None
+    kwargs: t.Dict[str, t.Any] = None
+
+
+def make_info(i: int) -> Parent:
+    return Parent(
+        name_=f"experiment_{i}",
+        child=Child(a=i, mode=Mode.test if i % 2 else Mode.train),
+        sizes=[i, i * 2, i * 3],
+        kwargs={"lr": 0.001 * i, "layers": [64, 32], "tag": "some text"},
+    )
+
+
+def make_config(i: int) -> dict:
+    _now = datetime.datetime(2023, 1, 1) + datetime.timedelta(minutes=i)
+    return {
+        "created_on": _now,
+        "config_updated_on": [_now + datetime.timedelta(seconds=_) for _ in range(10)],
+        "accessed_on": [_now + datetime.timedelta(hours=_) for _ in range(10)],
+        "checked_on": [_now] * 5,
+    }
+
+
+def timeit(title: str, fn: t.Callable, items: t.List) -> t.List:
+    _start = time.perf_counter()
+    _ret = [fn(_) for _ in items]
+    _elapsed = time.perf_counter() - _start
+    print(f"{title:<40} {_elapsed:8.3f} sec  ({len(items) / _elapsed:10.1f} files/sec)")
+    return _ret
+
+
+def dump(use_libyaml: bool, item) -> str:
+    Settings.YAML_USE_LIBYAML_DUMPER = use_libyaml
+    return m.YamlDumper.dump(item)
+
+
+def load(use_libyaml: bool, cls, file: pathlib.Path):
+    Settings.YAML_USE_LIBYAML_LOADER = use_libyaml
+    return m.YamlLoader.load(cls, file_or_text=file.read_text())
+
+
+def try_yaml_backends(num_files: int):
+    print(f"libyaml available: {m.YamlCDumper is not None}")
+    _infos = [make_info(_) for _ in range(num_files)]
+    _configs = [make_config(_) for _ in range(num_files)]
+
+    with tempfile.TemporaryDirectory() as _dir:
+        _dir = pathlib.Path(_dir)
+        _info_files = [_dir / f"{_}.info" for _ in range(num_files)]
+        _config_files = [_dir / f"{_}.config" for _ in range(num_files)]
+        _binary_files = [_dir / f"{_}.config.bin" for _ in range(num_files)]
+
+        # ---------------------------------------------------------- 01
+        # dump
+        print(f"\n>> dump {num_files} files")
+        _py_infos = timeit("info: python yaml", lambda _: dump(False, _), _infos)
+        _c_infos = timeit("info: libyaml", lambda _: dump(True, _), _infos)
+        _py_configs = timeit("config: python yaml", lambda _: dump(False, _), _configs)
+        _c_configs = timeit("config: libyaml", lambda _: dump(True, _), _configs)
+        _bin_configs = timeit("config: binary", m.YamlBinary.dump, _configs)
+        Settings.YAML_USE_LIBYAML_DUMPER = False
+        assert _py_infos == _c_infos, "libyaml dump differs for info"
+        assert _py_configs == _c_configs, "libyaml dump differs for config"
+        assert _py_configs == [m.YamlBinary.to_yaml(_) for _ in _bin_configs], \
+            "binary does not round trip to same yaml"
+        for _f, _t in zip(_info_files, _py_infos):
+            _f.write_text(_t)
+        for _f, _t in zip(_config_files, _py_configs):
+            _f.write_text(_t)
+        for _f, _b in zip(_binary_files, _bin_configs):
+            _f.write_bytes(_b)
+        print(
+            f"config size on disk: yaml {sum(len(_) for _ in _py_configs)} bytes, "
+            f"binary {sum(len(_) for _ in _bin_configs)} bytes"
+        )
+
+        # ---------------------------------------------------------- 02
+        # load
+        print(f"\n>> load {num_files} files")
+        _l1 = timeit("info: python yaml", lambda _: load(False, Parent, _), _info_files)
+        _l2 = timeit("info: libyaml", lambda _: load(True, Parent, _), _info_files)
+        _l3 = timeit("config: python yaml", lambda _: load(False, dict, _), _config_files)
+        _l4 = timeit("config: libyaml", lambda _: load(True, dict, _), _config_files)
+        _l5 = timeit(
+            "config: binary",
+            lambda _: m.YamlBinary.load(_.read_bytes(), expected_cls=dict), _binary_files
+        )
+        Settings.YAML_USE_LIBYAML_LOADER = False
+        assert [_.hex_hash for _ in _l1] == [_.hex_hash for _ in _l2] == \
+               [_.hex_hash for _ in _infos]
+        assert _l3 == _l4 == _l5 == _configs
+
+
+if __name__ == '__main__':
+    try_yaml_backends(num_files=int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
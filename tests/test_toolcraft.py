@@ -1,10 +1,23 @@
 #!/usr/bin/env python
 """Tests for `toolcraft` package."""
 # pylint: disable=redefined-outer-name
+import copy
+import dataclasses
+import hashlib
+import http.server
+import json
+import pathlib
+import pickle
+import sys
+import threading
+import types
+import typing as t
 import pytest
-from toolcraft import rules
-from toolcraft import tools
+import requests
 from typer.testing import CliRunner
+from upath import UPath
+
+from toolcraft import util
 
 
 @pytest.fixture
@@ -27,6 +40,7 @@ def test_content(response):
 
 def test_command_line_interface():
     """Test the CLI."""
+    from toolcraft import tools
     runner = CliRunner()
     result = runner.invoke(tools.APP, ["--help"])
     assert result.exit_code == 0
@@ -34,4 +48,352 @@ def test_command_line_interface():
 
 
 def test_toolcraft_rules():
+    from toolcraft import rules
     rules.main()
+
+
+@dataclasses.dataclass(frozen=True)
+class _CachedThing:
+    value: int
+
+    @property
+    @util.CacheResult
+    def doubled(self) -> list:
+        return [self.value * 2]
+
+    @util.CacheResult
+    def tripled(self) -> list:
+        return [self.value * 3]
+
+
+@dataclasses.dataclass(frozen=True)
+class _CachedPropertyThing(_CachedThing):
+
+    @property
+    @util.CacheResult
+    def squared(self) -> list:
+        return [self.value ** 2]
+
+
+util.replace_cached_properties(_CachedPropertyThing)
+
+
+@util.CacheResult
+def _cached_a() -> list:
+    return ["a"]
+
+
+@util.CacheResult
+def _cached_b() -> list:
+    return ["b"]
+
+
+def _stats(fn) -> util.CacheStats:
+    return util.CACHE_STATS[f"{__name__}.{fn.__qualname__}"]
+
+
+def test_cache_result_hits_and_misses():
+    _doubled = _stats(_CachedThing.doubled.fget)
+    _tripled = _stats(_CachedThing.tripled)
+    _hits, _misses = _doubled.hits, _doubled.misses
+    _obj = _CachedThing(value=2)
+    _first = _obj.doubled
+    assert _first == [4]
+    assert _obj.doubled is _first
+    assert (_doubled.hits - _hits, _doubled.misses - _misses) == (1, 1)
+    # method cache is per instance ... also for equal instances
+    _other = _CachedThing(value=2)
+    assert _other == _obj
+    assert _other.doubled is not _first
+    assert _doubled.misses - _misses == 2
+    # methods share container but not cache key
+    _misses = _tripled.misses
+    assert _obj.tripled() is _obj.tripled()
+    assert _tripled.misses - _misses == 1
+    with pytest.raises(Exception):
+        _obj.tripled(1)
+
+
+def test_cache_result_wipe():
+    _obj = _CachedPropertyThing(value=3)
+    _first = _obj.squared
+    assert _obj.squared is _first
+    util.WipeCacheResult("squared", _obj)
+    assert _obj.squared == _first and _obj.squared is not _first
+    with pytest.raises(Exception):
+        util.WipeCacheResult("doubled", _obj)
+    with pytest.raises(Exception):
+        util.WipeCacheResult("doubled", _CachedThing(value=3))
+    _first = _cached_a()
+    util.WipeCacheResult("_cached_a", __name__)
+    assert _cached_a() is not _first
+
+
+def test_cache_result_module_bounds():
+    _a, _b = _stats(_cached_a), _stats(_cached_b)
+    util.set_module_cache_bounds(__name__, max_size=1)
+    try:
+        _evictions = _a.evictions
+        _first = _cached_a()
+        _cached_b()
+        assert _a.evictions - _evictions == 1
+        assert _cached_a() is not _first
+        _misses = _b.misses
+        _cached_b()
+        assert _b.misses - _misses == 1
+    finally:
+        util.set_module_cache_bounds(__name__)
+
+
+def test_cache_result_pickle_and_copy():
+    _obj = _CachedPropertyThing(value=4)
+    assert (_obj.doubled, _obj.squared, _obj.tripled()) == ([8], [16], [12])
+    assert _obj.__dict__ == {"value": 4}
+    _unpickled = pickle.loads(pickle.dumps(_obj))
+    assert _unpickled == _obj
+    assert _unpickled.squared == [16] and _unpickled.squared is not _obj.squared
+    _copied = copy.copy(_obj)
+    assert _copied.doubled == [8] and _copied.doubled is not _obj.doubled
+    assert copy.deepcopy(_obj).squared == [16]
+    # container is dropped with instance
+    _key = id(_copied)
+    assert _key in util._INSTANCE_CACHES
+    del _copied
+    assert _key not in util._INSTANCE_CACHES
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves `server.data` and honours `Range` if `server.accept_ranges`"""
+
+    def do_GET(self):
+        _data = self.server.data
+        _range = self.headers.get("Range", None)
+        self.server.ranges.append(_range)
+        if _range is not None and self.server.accept_ranges:
+            _start = int(_range[len("bytes="):].split("-")[0])
+            if _start >= len(_data):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {_start}-{len(_data) - 1}/{len(_data)}")
+            _data = _data[_start:]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(_data)))
+        self.end_headers()
+        self.wfile.write(_data)
+
+    def log_message(self, *args):
+        ...
+
+
+@pytest.fixture
+def http_server():
+    _server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    _server.data = bytes(range(256)) * 400
+    _server.ranges = []
+    _server.accept_ranges = True
+    _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    _thread.start()
+    yield _server
+    _server.shutdown()
+    _server.server_close()
+
+
+def _download(server, tmp_path, part: bytes = None) -> t.Tuple[str, UPath, dict]:
+    from toolcraft.storage import file_group
+    _file_path = UPath(tmp_path) / "f.bin"
+    _part_path = UPath(tmp_path) / "_f.bin.part"
+    if part is not None:
+        _part_path.write_bytes(part)
+    _bytes_read, _totals = {"f.bin": 0}, {}
+    with requests.Session() as _session:
+        _hash = file_group._download_file(
+            session=_session,
+            url=f"http://127.0.0.1:{server.server_address[1]}/f.bin",
+            file_path=_file_path, part_path=_part_path,
+            hash_module=hashlib.sha256(), chunk_size=1000,
+            bytes_read=_bytes_read, totals=_totals, file_key="f.bin",
+        )
+    assert not _part_path.exists()
+    assert _bytes_read["f.bin"] == _totals["f.bin"] == len(server.data)
+    return _hash, _file_path, _bytes_read
+
+
+def test_download_file_resumes_part(http_server, tmp_path):
+    _data = http_server.data
+    _hash, _file_path, _ = _download(http_server, tmp_path, part=_data[:30000])
+    assert http_server.ranges == ["bytes=30000-"]
+    assert _file_path.read_bytes() == _data
+    assert _hash == hashlib.sha256(_data).hexdigest()
+
+
+def test_download_file_restarts_if_range_not_served(http_server, tmp_path):
+    _data = http_server.data
+    # server ignores range
+    http_server.accept_ranges = False
+    _hash, _file_path, _ = _download(http_server, tmp_path, part=b"x" * 30000)
+    assert http_server.ranges == ["bytes=30000-", None]
+    assert _file_path.read_bytes() == _data
+    assert _hash == hashlib.sha256(_data).hexdigest()
+    # part file longer than remote file
+    http_server.accept_ranges = True
+    http_server.ranges.clear()
+    _file_path.unlink()
+    _hash, _file_path, _ = _download(
+        http_server, tmp_path, part=_data + b"x")
+    assert http_server.ranges == [f"bytes={len(_data) + 1}-", None]
+    assert _hash == hashlib.sha256(_data).hexdigest()
+
+
+def test_download_file_hash_mismatch(http_server, tmp_path):
+    # corrupt part file is resumed as is ... hash computed while downloading
+    # must then not match so that `do_hash_check` catches it
+    _data = http_server.data
+    _hash, _file_path, _ = _download(http_server, tmp_path, part=b"x" * 30000)
+    assert _file_path.read_bytes() == b"x" * 30000 + _data[30000:]
+    assert _hash == hashlib.sha256(_file_path.read_bytes()).hexdigest()
+    assert _hash != hashlib.sha256(_data).hexdigest()
+
+
+class _FakeLsfJob:
+    """Just what `lsf.LsfSubmitter` needs from `job.Job`"""
+
+    def __init__(self, job_id: str, runner, wait_on_jobs=(), lsf_memory: int = None):
+        from toolcraft.job.__base__ import JobOsEnvVars
+        self.job_id = self.short_name = job_id
+        self.runner = runner
+        self.wait_on_jobs = list(wait_on_jobs)
+        self.launch_parameters = types.SimpleNamespace(
+            lsf_email=False, lsf_cpus=None, lsf_memory=lsf_memory)
+        self.os_env_vars = JobOsEnvVars()
+        self.cli_command = ["python", "main.py", "run", job_id]
+        self.launched = False
+        self.tag_manager = types.SimpleNamespace(
+            launched=types.SimpleNamespace(delete=self._delete_launched_tag))
+
+    def check_health(self, is_on_main_machine: bool):
+        return "already launched" if self.launched else None
+
+    def create_launched_tag(self) -> bool:
+        if self.check_health(is_on_main_machine=True) is not None:
+            return False
+        self.launched = True
+        return True
+
+    def _delete_launched_tag(self):
+        assert self.launched
+        self.launched = False
+
+
+def _lsf_flow(tmp_path, monkeypatch, fail_on: str = None):
+    """
+    Flow of fake jobs with `Settings.LSF_BSUB_COMMAND` pointing at a script
+    that records its args (and fails for arrays with `fail_on` in name) ...
+    prep_0 is finished and arrays are capped at 3 jobs
+    """
+    from toolcraft import Settings
+    _bsub = tmp_path / "bsub"
+    _bsub.write_text(
+        f"#!{sys.executable}\n"
+        f"import json, os, sys\n"
+        f"with open(os.environ['FAKE_BSUB_LOG'], 'a') as _f:\n"
+        f"    _f.write(json.dumps(sys.argv[1:]) + '\\n')\n"
+        f"if {fail_on!r} is not None and {fail_on!r} in sys.argv[2]:\n"
+        f"    sys.exit(255)\n"
+        f"print('Job <1> is submitted to default queue <normal>.')\n"
+    )
+    _bsub.chmod(0o755)
+    monkeypatch.setenv("FAKE_BSUB_LOG", str(tmp_path / "calls"))
+    monkeypatch.setattr(Settings, "LSF_BSUB_COMMAND", str(_bsub))
+    monkeypatch.setattr(Settings, "LSF_MAX_ARRAY_SIZE", 3)
+    _runner = types.SimpleNamespace(
+        hex_hash="abcdef1234567890", results_dir=UPath(tmp_path),
+        py_script=pathlib.Path("main.py"))
+    _prep = [_FakeLsfJob(f"prep_{_i}", _runner) for _i in range(5)]
+    _train = [
+        _FakeLsfJob(f"train_{_i}", _runner, wait_on_jobs=_prep,
+                    lsf_memory=4000 if _i % 2 else None)
+        for _i in range(4)
+    ]
+    _eval = [
+        _FakeLsfJob("eval_0", _runner, wait_on_jobs=[_train[0], _train[2]]),
+        _FakeLsfJob("eval_1", _runner, wait_on_jobs=[_train[0], _train[1]]),
+    ]
+    _stages = {"prep": _prep, "train": _train, "eval x": _eval}
+    return types.SimpleNamespace(
+        runner=_runner,
+        stages={_k: types.SimpleNamespace(all_jobs=_v) for _k, _v in _stages.items()},
+        tag_names=lambda names: {
+            _j.job_id: {"finished"} if _j.job_id == "prep_0" else set()
+            for _v in _stages.values() for _j in _v
+        },
+    )
+
+
+def _lsf_submit(flow, fails: bool = False):
+    from toolcraft import logger, richy
+    from toolcraft.job import lsf
+    with richy.StatusPanel(title="lsf", tc_log=logger.get_logger()) as _rp:
+        _submitter = lsf.LsfSubmitter(flow=flow, richy_panel=_rp)
+        if fails:
+            with pytest.raises(Exception):
+                _submitter.submit()
+        else:
+            _submitter.submit()
+    return _submitter
+
+
+def test_lsf_submit_arrays(tmp_path, monkeypatch):
+    _flow = _lsf_flow(tmp_path, monkeypatch)
+    _submitter = _lsf_submit(_flow)
+    _arrays = _submitter.arrays
+    _names = [_.name for _ in _arrays]
+    assert [_.job_ids for _ in _arrays] == [
+        ["prep_1", "prep_2", "prep_3"], ["prep_4"],
+        ["train_0", "train_2"], ["train_1", "train_3"],
+        ["eval_0"], ["eval_1"],
+    ]
+    assert _names[0] == "abcdef12-prep-0" and _names[5] == "abcdef12-eval_x-5"
+    assert [_.wait_on for _ in _arrays] == [
+        [], [], _names[:2], _names[:2], [_names[2]], _names[2:4],
+    ]
+    _jobs = [_j for _a in _arrays for _j in _a.jobs]
+    assert all(_.os_env_vars.IS_LSF_JOB and _.launched for _ in _jobs)
+
+    # check bsub calls ... arrays are submitted after arrays they wait on
+    _calls = {}
+    for _line in (tmp_path / "calls").read_text().splitlines():
+        _args = json.loads(_line)
+        _calls[_args[_args.index("-J") + 1].split("[")[0]] = _args
+    _order = list(_calls.keys())
+    for _array in _arrays:
+        assert all(_order.index(_w) < _order.index(_array.name) for _w in _array.wait_on)
+    assert _calls[_names[0]][:2] == ["-J", f"{_names[0]}[1-3]"]
+    assert "-w" not in _calls[_names[0]]
+    _args = _calls[_names[3]]
+    assert _args[_args.index("-R") + 1] == "rusage[mem=4000]"
+    assert _args[_args.index("-w") + 1] == f"done({_names[0]}) && done({_names[1]})"
+    _args = _calls[_names[5]]
+    assert "-R" not in _args
+    assert _args[_args.index("-w") + 1] == f"done({_names[2]}) && done({_names[3]})"
+    assert _args[-4:] == [
+        "python", "main.py", "run-array",
+        (UPath(tmp_path) / "lsf" / f"{_names[5]}.jobs").as_posix(),
+    ]
+    assert (tmp_path / "lsf" / f"{_names[2]}.jobs").read_text() == "train_0\ntrain_2"
+
+
+
+def test_lsf_submit_failure_keeps_jobs_launchable(tmp_path, monkeypatch):
+    # bsub of train arrays fails ... so only prep jobs must have launched tag
+    _flow = _lsf_flow(tmp_path, monkeypatch, fail_on="-train-")
+    _submitter = _lsf_submit(_flow, fails=True)
+    _names = [_.name for _ in _submitter.arrays]
+    _calls = (tmp_path / "calls").read_text()
+    assert _names[0] in _calls and _names[1] in _calls and _names[4] not in _calls
+    for _array in _submitter.arrays:
+        assert all(_.launched == (_array.stage == "prep") for _ in _array.jobs)
@@ -423,7 +423,10 @@ class ShouldHaveProperty(_CustomException):
                 _notes = notes + _notes
             raise cls(notes=_notes)
 
-        if not isinstance(getattr(obj.__class__, attr_name), property):
+        from .. import util
+        if not isinstance(
+            getattr(obj.__class__, attr_name), (property, util.CachedProperty)
+        ):
             _notes = [
                 f"The member {attr_name!r} of class {obj.__class__} is "
                 f"not a property.",
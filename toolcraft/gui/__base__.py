@@ -1488,9 +1488,12 @@ class UseMethodInForm:
 
         # ---------------------------------------------------- 02
         # make label for button
+        from ..util import CachedProperty
         if self.label_fmt is None:
             _button_label = f"{hashable.__class__.__name__}.{hashable.hex_hash} ({_callable_name})"
-        elif isinstance(getattr(hashable.__class__, self.label_fmt, None), property):
+        elif isinstance(
+            getattr(hashable.__class__, self.label_fmt, None), (property, CachedProperty)
+        ):
             _button_label = getattr(hashable, self.label_fmt)
         elif isinstance(self.label_fmt, str):
             _button_label = self.label_fmt
@@ -1,6 +1,7 @@
 import functools
 import typing as t
 import inspect
+import types
 import pathlib
 import pickle
 
@@ -87,6 +88,14 @@ class HookUp:
         self.pre_method = pre_method
         self.post_method = post_method
 
+        # default kwargs of method are resolved once here (and not on every
+        # call) so that pre- and post-method gets the default kwargs
+        self.default_kwargs = {
+            _k: _p.default
+            for _k, _p in inspect.signature(method).parameters.items()
+            if _p.default is not inspect.Parameter.empty
+        }
+
         # assign self i.e. HookUp instance in cls
         # Note we do not do `cls.method = self` as that overrides parents HookUp
         # cls.__dict__[method.__name__] = self
@@ -101,11 +110,16 @@ class HookUp:
 
     def __get__(self, method_self, method_self_type):
         """
-        This makes use of description pattern ... now we have access to method's
-        self so that we can use it in __call__
+        This makes use of description pattern ... like functions we return a
+        bound method for instance access so that method's self is passed to
+        __call__
+
+        Note: we do not store method_self on self as HookUp instance is shared
+          by all instances of cls (and threads using them)
         """
-        self.method_self = method_self
-        return self
+        if method_self is None:
+            return self
+        return types.MethodType(self, method_self)
 
     def __eq__(self, other):
         """
@@ -124,7 +138,7 @@ class HookUp:
         """
         return self.method == other.method
 
-    def __call__(self, *args, **kwargs):
+    def __call__(self, method_self, *args, **kwargs):
 
         # -----------------------------------------------------------01
         # although might not be necessary ... we enforce
@@ -135,43 +149,15 @@ class HookUp:
             )
         # get default kwargs if not supplied ...
         # so that pre- and post-method gets the default kwargs
-        for _k, _p in inspect.signature(self.method).parameters.items():
-            if _k not in kwargs.keys():
-                # noinspection PyUnresolvedReferences,PyProtectedMember
-                if _p.default != inspect._empty:
-                    kwargs[_k] = _p.default
+        if bool(self.default_kwargs):
+            kwargs = {**self.default_kwargs, **kwargs}
 
         # -----------------------------------------------------------02
-        # bake title
-        # _kwargs_str = []
-        # for k, v in kwargs.items():
-        #     if isinstance(v, list):
-        #         if len(v) == 1 or len(v) == 2:
-        #             v = f"{v}"
-        #         else:
-        #             v = f"[{v[0]}, ..., {v[-1]}]"
-        #     _kwargs_str.append(
-        #         f"{k}={v}"
-        #     )
-        # _kwargs_str = ", ".join(_kwargs_str)
-        if bool(kwargs):
-            _kwargs_str = "..."
-        else:
-            _kwargs_str = ""
-        # todo: with gui build {self.method_self.name} poses problem find a
-        #  way to avoid logs while building GUI
-        # _title = f"<{self.method_self.name}> {self.cls.__name__}." \
-        _title = f"{self.cls.__name__}." \
-                 f"{self.method.__name__}" \
-                 f"({_kwargs_str})"
-        # _title = logger.replace_with_emoji(_title)
-
-        # -----------------------------------------------------------03
         # call business logic
-        # -----------------------------------------------------------03.01
+        # -----------------------------------------------------------02.01
         # call pre_method is provided
         if self.pre_method is not None:
-            _pre_ret = self.pre_method(self.method_self, **kwargs)
+            _pre_ret = self.pre_method(method_self, **kwargs)
             # pre_method should not return anything
             if _pre_ret is not None:
                 raise Exception(
@@ -181,18 +167,18 @@ class HookUp:
                     f"not return anything ...",
                     f"Found return value {_pre_ret}"
                 )
-        # -----------------------------------------------------------03.03
+        # -----------------------------------------------------------02.02
         # call actual method
-        _ret = self.method(self.method_self, **kwargs)
-        # -----------------------------------------------------------03.04
+        _ret = self.method(method_self, **kwargs)
+        # -----------------------------------------------------------02.03
         # if post_method not provided return what we have
         if self.post_method is not None:
             # call post_method as it is provided
-            # spinner.info(msg=f"pre: {pre_method}")
-            # spinner.info(msg=f"{method}")
-            # spinner.info(msg=f"post: {post_method}")
+            # todo: any updates to _ret to post_method will be lost if _ret is not updated inplace
+            #   be careful ...
+            #   may be return _ret in post_method and check if id(_ret) == id(_post_ret)
             _post_ret = self.post_method(
-                self.method_self, hooked_method_return_value=_ret, **kwargs)
+                method_self, hooked_method_return_value=_ret, **kwargs)
             # post_method should not return anything
             if _post_ret is not None:
                 raise Exception(
@@ -203,6 +189,6 @@ class HookUp:
                     f"Found return value {_post_ret}"
                 )
 
-        # -----------------------------------------------------------04
+        # -----------------------------------------------------------03
         # return the return value of method
         return _ret
@@ -11,6 +11,7 @@ import typing as t
 import dataclasses
 import subprocess
 import itertools
+import sqlite3
 import warnings
 from upath import UPath
 import yaml
@@ -30,6 +31,8 @@ from .. import storage as s
 from .. import richy
 from .. import Settings
 from .. import gui
+from .state_index import JobStateIndex
+from .footprint import FootprintSampler, get_footprint_history
 
 _now = datetime.datetime.now
 
@@ -63,6 +66,10 @@ class JobGroupFlowId(t.NamedTuple):
 
 @dataclasses.dataclass
 class Tag:
+    """
+    Note that when `Settings.JOB_STATE_BACKEND` is "index" the tag lives in
+    `Runner.state_index` and the tag file is only a mirror that is never read.
+    """
 
     name: str
     manager: "TagManager"
@@ -73,8 +80,17 @@ class Tag:
         _ret = self.manager.upath / self.name
         return _ret
 
+    @property
+    def index(self) -> t.Optional["JobStateIndex"]:
+        return self.manager.job.runner.state_index
+
+    @property
+    def job_id(self) -> str:
+        return self.manager.job.job_id
+
     def create(self, data: t.Dict[str, t.Any] = None, exception: str = None):
-        if self.upath.exists():
+        _index = self.index
+        if self.exists():
             raise e.code.CodingError(
                 notes=[f"Tag at {self.upath} already exists ..."]
             )
@@ -94,22 +110,42 @@ class Tag:
             # data['exception'] = "\n".join(["", ">>> EXCEPTION <<<", "", exception])
             data['exception'] = ["", ">>> EXCEPTION <<<", "", *exception.split("\n")]
         _LOGGER.info(msg=f"Creating tag {self.upath}")
+        # index transaction also checks that tag does not exist (in case some
+        # other process created it after above check) ... mirror file is
+        # written only after it is committed so that a failed create never
+        # touches the mirror
+        if _index is not None:
+            _index.create(job_id=self.job_id, tag=self.name, data=data)
+            if not Settings.JOB_STATE_MIRROR_TAGS:
+                return
         _parent_dir = self.upath.parent
         if not _parent_dir.exists():
             _parent_dir.mkdir(create_parents=True)
         self.upath.write_yaml(data=data)
 
     def read(self) -> t.Optional[t.Dict[str, t.Any]]:
+        _index = self.index
+        if _index is not None:
+            return _index.read(job_id=self.job_id, tag=self.name)
         if not self.upath.exists():
             return None
         _LOGGER.info(msg=f"Reading tag {self.upath}")
         return self.upath.read_yaml()
 
     def exists(self) -> bool:
+        _index = self.index
+        if _index is not None:
+            return _index.read(job_id=self.job_id, tag=self.name) is not None
         return self.upath.exists()
 
     def delete(self):
-        if self.upath.exists():
+        _index = self.index
+        if _index is not None:
+            _LOGGER.info(msg=f"Deleting tag {self.upath}")
+            _index.delete(job_id=self.job_id, tag=self.name)
+            if Settings.JOB_STATE_MIRROR_TAGS and self.upath.exists():
+                self.upath.delete()
+        elif self.upath.exists():
             _LOGGER.info(msg=f"Deleting tag {self.upath}")
             self.upath.delete()
         else:
@@ -121,6 +157,12 @@ class Tag:
 
     def update(self, data: t.Dict[str, t.Any], allow_overwrite: bool = False, encoding: str = 'utf-8'):
         _LOGGER.info(msg=f"Updating tag {self.upath}")
+        _index = self.index
+        if _index is not None:
+            _index.update(job_id=self.job_id, tag=self.name, data=data, allow_overwrite=allow_overwrite)
+            if Settings.JOB_STATE_MIRROR_TAGS:
+                self.upath.write_yaml(_index.read(job_id=self.job_id, tag=self.name), encoding=encoding)
+            return
         _old_data = {}
         if self.upath.exists():
             _old_data = self.upath.read_yaml(encoding=encoding)
@@ -183,6 +225,27 @@ class TagManager:
     def description(self) -> Tag:
         return Tag(name="description", manager=self)
 
+    def read_all(self) -> t.Dict[str, t.Optional[t.Dict[str, t.Any]]]:
+        """
+        Returns data (None if absent) of lifecycle tags ... with
+        `Runner.state_index` this is one query instead of one read per tag
+        """
+        _names = ["launched", "started", "running", "finished", "failed"]
+        _index = self.job.runner.state_index
+        if _index is None:
+            return {_n: getattr(self, _n).read() for _n in _names}
+        _tags = _index.read_all(job_id=self.job.job_id)
+        return {_n: _tags.get(_n, None) for _n in _names}
+
+    def clear(self):
+        """
+        Removes tags of job from `Runner.state_index` ... call it when job
+        folder is deleted (tag files go with the folder)
+        """
+        _index = self.job.runner.state_index
+        if _index is not None:
+            _index.delete_job(job_id=self.job.job_id)
+
     def view(self) -> "gui.widget.Widget":
         # ----------------------------------------------------------------- 01
         # read tags
@@ -458,18 +521,25 @@ class JobLaunchParameters:
     lsf_cpus: int = None
     # Amount of memory in MB to reserve for lsf job.
     lsf_memory: int = None
+    # Number of cpus to reserve for job launched on local machine.
+    local_cpus: int = 1
+    # Amount of memory in MB to reserve for job launched on local machine.
+    # When None nothing is reserved and only overall memory usage is checked.
+    local_memory: int = None
 
     def __setattr__(self, key, value):
+        # noinspection PyUnresolvedReferences,DuplicatedCode
+        _default_value = self.__class__.__dataclass_fields__[key].default
+
         # test for lsf parameters
-        if key.startswith("lsf_"):
+        # note that defaults are set by dataclass __init__ on any machine
+        if key.startswith("lsf_") and value != _default_value:
             if not Settings.IS_LSF_MACHINE:
                 raise e.code.CodingError(
                     notes=["Do not try to set LSF launch parameters as this is not LSF environment."]
                 )
 
         # check if value is set multiple times
-        # noinspection PyUnresolvedReferences,DuplicatedCode
-        _default_value = self.__class__.__dataclass_fields__[key].default
         _current_value = getattr(self, key)
         # this means incoming value is not default
         if _default_value != value:
@@ -701,6 +771,17 @@ class Job:
             _ret += f':{self.experiment.hex_hash}:{self.method.__name__}'
         return _ret
 
+    @property
+    @util.CacheResult
+    def footprint_key(self) -> str:
+        """
+        Key for history of measured footprints (see `footprint.FootprintHistory`)
+        ... jobs of same method of same experiment (or runner) class are
+        expected to need similar resources
+        """
+        _cls = (self.runner if self.experiment is None else self.experiment).__class__
+        return f"{_cls.__module__}.{_cls.__qualname__}:{self.method.__name__}"
+
     @property
     @util.CacheResult
     def tf_chkpts_upath(self) -> UPath:
@@ -920,13 +1001,15 @@ class Job:
                               f"{_wj.job_id} is supposed to be finished ..."]
                     )
             _job_kwargs = {} if self.kwargs is None else self.kwargs
-            if self.experiment is None:
-                self.method(**_job_kwargs)
-            else:
-                with self.experiment(richy_panel=_rp):
+            with FootprintSampler() as _sampler:
+                if self.experiment is None:
                     self.method(**_job_kwargs)
+                else:
+                    with self.experiment(richy_panel=_rp):
+                        self.method(**_job_kwargs)
+            _footprint = _sampler.footprint
             self.tag_manager.running.delete()
-            self.tag_manager.finished.create()
+            self.tag_manager.finished.create(data={"footprint": _footprint.as_dict()})
             _end = _now()
             _LOGGER.info(
                 msg=f"Successfully finished job on worker machine ...",
@@ -936,6 +1019,7 @@ class Job:
                         "started": _start.ctime(),
                         "ended": _end.ctime(),
                         "seconds": str((_end - _start).total_seconds()),
+                        "footprint": _footprint.as_dict(),
                     }
                 ]
             )
@@ -959,6 +1043,9 @@ class Job:
                 msg="*** EXCEPTION MESSAGE *** \n" + _ex_str
             )
             self.tag_manager.running.delete()
+            # reset logger as warm workers (see `worker_pool.WorkerPool`) go on
+            # to run other jobs in same process
+            logger.setup_logging(**_previous_log_settings)
             # above thing will tell toolcraft that things failed gracefully
             # while below raise will tell cluster systems like bsub that job has failed
             # todo for `JobRunnerClusterType.local_on_same_thread` this will not allow
@@ -967,6 +1054,26 @@ class Job:
             raise _ex
 
         # ------------------------------------------------------------ 06
+        # record footprint for packing future runs ... this is only
+        # bookkeeping so failing to write history (locked db, read only
+        # TC_HOME, sqlite on NFS etc.) must not fail a finished job
+        try:
+            _history = get_footprint_history()
+            if _history is not None:
+                _history.record(key=self.footprint_key, footprint=_footprint)
+        except (sqlite3.Error, OSError) as _ex:
+            _LOGGER.warning(
+                msg=f"Could not record footprint history for finished job ...",
+                notes=[
+                    {
+                        "job_id": self.job_id,
+                        "footprint_key": self.footprint_key,
+                        "error": repr(_ex),
+                    }
+                ]
+            )
+
+        # ------------------------------------------------------------ 07
         # reset back the logger handling
         logger.setup_logging(**_previous_log_settings)
 
@@ -975,28 +1082,27 @@ class Job:
         cli_command: t.List[str] = None,
         use_current_env_vars: bool = True,
         single_cpu: bool = False,
-    ):
+        wait: bool = True,
+    ) -> t.Optional[subprocess.Popen]:
+        """
+        When `wait` is False the subprocess is not waited on and is returned
+        so that caller (see `scheduler.LocalScheduler`) can track its exit.
+        Note that its stdout is discarded as job logs to `self.log_file`.
+
+        Returns None when job is not launched (see `check_health`) or when
+        it is run on single cpu in current process.
+        """
         # ------------------------------------------------------------- 01
         # make cli command if None
         if cli_command is None:
             cli_command = self.cli_command
 
         # ------------------------------------------------------------- 02
-        # check health
-        _ret = self.check_health(is_on_main_machine=True)
-        if _ret is not None:
-            _LOGGER.error(msg=_ret)
+        # check health and create launched tag
+        if not self.create_launched_tag():
             return
 
         # ------------------------------------------------------------- 03
-        # create tag so that worker machine knows that the client has
-        # launched it
-        _data = None
-        if bool(self.kwargs):
-            _data = {'job_kwargs': self.kwargs}
-        self.tag_manager.launched.create(data=_data)
-
-        # ------------------------------------------------------------- 04
         # run in subprocess
         _env_vars = {}
         if use_current_env_vars:
@@ -1015,6 +1121,10 @@ class Job:
                 log_task_progress_after=10*60,
             ) as _rp:
                 self.run_on_worker(_rp=_rp)
+        elif not wait:
+            return subprocess.Popen(
+                cli_command, env=_env_vars, stdout=subprocess.DEVNULL,
+            )
         else:
             _ret = subprocess.run(cli_command, env=_env_vars)
             if _ret.returncode != 0:
@@ -1022,6 +1132,22 @@ class Job:
                     f"Failed with return code `{_ret.returncode}` while calling `{cli_command}`"
                 )
 
+    def create_launched_tag(self) -> bool:
+        """
+        Creates tag so that worker machine knows that the client has launched
+        the job ... returns False when job must not be launched (see
+        `check_health`)
+        """
+        _ret = self.check_health(is_on_main_machine=True)
+        if _ret is not None:
+            _LOGGER.error(msg=_ret)
+            return False
+        _data = None
+        if bool(self.kwargs):
+            _data = {'job_kwargs': self.kwargs}
+        self.tag_manager.launched.create(data=_data)
+        return True
+
     def wait_on(self, wait_on: t.Union['Job', 'SequentialJobGroup', 'ParallelJobGroup']) -> "Job":
         self._wait_on_jobs.append(wait_on)
         return self
@@ -1056,12 +1182,12 @@ class Job:
         # ------------------------------------------------------------- 01
         # some vars
         _job_info = {"name": self.job_id, "py-script": self.runner.py_script, "path": self.upath.full_path}
-        _tm = self.tag_manager
-        _launched = _tm.launched.read()
-        _started = _tm.started.read()
-        _running = _tm.running.read()
-        _finished = _tm.finished.read()
-        _failed = _tm.failed.read()
+        _tags = self.tag_manager.read_all()
+        _launched = _tags["launched"]
+        _started = _tags["started"]
+        _running = _tags["running"]
+        _finished = _tags["finished"]
+        _failed = _tags["failed"]
 
         # ------------------------------------------------------------- 02
         # if either finished or failed running tag must never be present as we take care in code to delete it
@@ -1396,8 +1522,30 @@ class Flow:
                     _.wait_on(self.stages[_previous_stage_id])
             _previous_stage_id = _stage_id
 
+    def tag_names(self, names: t.List[str]) -> t.Dict[str, t.Set[str]]:
+        """
+        Returns job_id -> which of tags in `names` are present for all jobs
+        in flow ... with `Runner.state_index` this is a single query
+        """
+        _index = self.runner.state_index
+        if _index is not None:
+            _all = _index.tag_names()
+        else:
+            _all = None
+        _ret = {}
+        for _stage in self.stages.values():
+            for _job in _stage.all_jobs:
+                if _all is None:
+                    _ret[_job.job_id] = {
+                        _n for _n in names if getattr(_job.tag_manager, _n).exists()
+                    }
+                else:
+                    _ret[_job.job_id] = _all.get(_job.job_id, set()) & set(names)
+        return _ret
+
     def status(self) -> t.Dict:
         _ret = dict()
+        _tag_names = self.tag_names(names=["started", "running", "finished", "failed"])
         for _sk, _stage in self.stages.items():
             _jobs = _stage.all_jobs
             _total = 0
@@ -1408,13 +1556,14 @@ class Flow:
             _job: Job
             for _job in _jobs:
                 _total += 1
-                if _job.is_started:
+                _tags = _tag_names[_job.job_id]
+                if "started" in _tags:
                     _started += 1
-                if _job.is_running:
+                if "running" in _tags:
                     _running += 1
-                if _job.is_finished:
+                if "finished" in _tags:
                     _finished += 1
-                if _job.is_failed:
+                if "failed" in _tags:
                     _failed += 1
             _ret[f"Stage {_sk}"] = dict(
                 total=_total, started=_started, running=_running, finished=_finished, failed=_failed,
@@ -1779,8 +1928,9 @@ class Experiment(_Common, abc.ABC):
 @m.RuleChecker(
     things_to_be_cached=[
         'cwd', 'results_dir', 'flow', 'monitor', 'registered_experiments',
+        'state_index',
     ],
-    things_not_to_be_overridden=['cwd', 'results_dir', 'py_script', 'monitor'],
+    things_not_to_be_overridden=['cwd', 'results_dir', 'py_script', 'monitor', 'state_index'],
     # we do not want any fields for Runner class
     restrict_dataclass_fields_to=[],
 )
@@ -1855,6 +2005,34 @@ class Runner(_Common, abc.ABC):
             _ret.mkdir(create_parents=True)
         return _ret
 
+    @property
+    @util.CacheResult
+    def state_index(self) -> t.Optional[JobStateIndex]:
+        """
+        Index of tags of all jobs when `Settings.JOB_STATE_BACKEND` is "index"
+        """
+        if Settings.JOB_STATE_BACKEND == "tags":
+            return None
+        if Settings.JOB_STATE_BACKEND != "index":
+            raise e.validation.NotAllowed(
+                notes=[
+                    f"Unknown Settings.JOB_STATE_BACKEND {Settings.JOB_STATE_BACKEND!r}",
+                    "Use one of ['tags', 'index']",
+                ]
+            )
+        _results_dir = self.results_dir
+        if "file" not in _results_dir.fs.protocol:
+            raise e.validation.NotAllowed(
+                notes=[
+                    "Job state index is sqlite database so results dir must be on local (or mounted) disk",
+                    f"Found {_results_dir}",
+                ]
+            )
+        return JobStateIndex(
+            db_path=_results_dir.path + "/job_state.db",
+            journal_mode=Settings.JOB_STATE_JOURNAL_MODE,
+        )
+
     @property
     @util.CacheResult
     def cwd(self) -> UPath:
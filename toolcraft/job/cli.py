@@ -105,6 +105,23 @@ def run(
     _job.run_on_worker(_rp=_rp)
 
 
+@_APP.command(help="Run the job of LSF job array element (used by `launch lsf`)")
+def run_array(
+    array_file: Annotated[
+        str,
+        typer.Argument(
+            help="File with one job ID per line ... line number is picked by env var LSB_JOBINDEX",
+            show_default=False,
+        )
+    ],
+):
+    """
+    Run a job from job array file.
+    """
+    _job_ids = pathlib.Path(array_file).read_text().split("\n")
+    run(job=_job_ids[int(os.environ["LSB_JOBINDEX"]) - 1])
+
+
 @_APP.command(help="View dashboard")
 def view():
     """
@@ -335,6 +352,7 @@ def clean():
             if not _j.is_finished:
                 _rp.update(f"Deleting job {_j.short_name}")
                 _j.upath.delete(recursive=True)
+                _j.tag_manager.clear()
 
 
 @_APP.command(help="Deletes the job in runner even successfully finished runs (use carefully).")
@@ -350,6 +368,7 @@ def delete():
         for _j in _rp.track(_stage.all_jobs, task_name=f"Deleting for stage {_stage_name}"):
             _rp.update(f"Deleting job {_j.short_name}")
             _j.upath.delete(recursive=True)
+            _j.tag_manager.clear()
 
 
 @_APP.command(help="Lists the jobs in runner that are not finished.")
@@ -12,10 +12,6 @@ todo: add richy tracking panel ...that makes a layout for all stages and
  IMP: see docstring we can even have dearpygui client if we can submit jobs
    and track jobs via ssh
 """
-import datetime
-import os
-import time
-import psutil
 import typer
 from typing_extensions import Annotated
 import typing as t
@@ -24,6 +20,8 @@ import subprocess
 from .. import logger, Settings
 from .. import error as e
 from .__base__ import Runner, Job
+from .scheduler import LocalScheduler
+from .lsf import LsfSubmitter
 from . import PRETTY_EXCEPTIONS_ENABLE, PRETTY_EXCEPTIONS_SHOW_LOCALS
 
 
@@ -58,66 +56,23 @@ def lsf():
     # get some vars
     _rp = _RUNNER.richy_panel
     _rp.update(f"launching jobs on LSF cluster ...")
-    _flow = _RUNNER.flow
 
     # --------------------------------------------------------- 02
-    # call jobs ...
+    # submit jobs as job arrays
+    # see `lsf.LsfSubmitter` for how jobs are grouped and submitted
     # todo: we might want this to be called from client machine and submit jobs via
     #   ssh ... rather than using instance on cluster to launch jobs
     #   This will also help to have gui in dearpygui
-    # loop over stages
-    for _stage_key, _stage in _flow.stages.items():
-        _rp.update(f"launching jobs for stage: {_stage_key}...")
-
-        # loop over jobs in current _stage
-        _jobs = _stage.all_jobs
-        for _job in _rp.track(
-            sequence=_jobs, task_name=f"stage {_stage_key}"
-        ):
-            # ------------------------------------------------- 02.01
-            if _job.is_finished:
-                _rp.update(f"skipping {_stage_key}:{_job.short_name}")
-                continue
-            else:
-                _rp.update(f"launching {_stage_key}:{_job.short_name}")
-
-            # ------------------------------------------------- 02.02
-            # make cli command
-            # todo: when self.path is not local we need to see how to log files ...
-            #   should we stream or dump locally ?? ... or maybe figure out
-            #   dapr telemetry
-            _log = _job.upath / "bsub.log"
-            _nxdi_prefix = ["bsub", ]
-            _nxdi_prefix += ["-J", _job.job_id, ]
-            _email = _job.launch_parameters.lsf_email
-            _cpus = _job.launch_parameters.lsf_cpus
-            _memory = _job.launch_parameters.lsf_memory
-            if not _email:
-                _nxdi_prefix += ["-oo", _log.as_posix(), ]
-            if _cpus is not None:
-                _nxdi_prefix += ["-n", f"{_cpus}"]
-            if _memory is not None:
-                _nxdi_prefix += ["-R", f'rusage[mem={_memory}]']
-            _wait_on_jobs = [_ for _ in _job.wait_on_jobs if not _.is_finished]
-            if bool(_wait_on_jobs):
-                _wait_on = \
-                    " && ".join([f"done({_.job_id})" for _ in _wait_on_jobs])
-                _nxdi_prefix += ["-w", f"{_wait_on}"]
-            _cli_command = _nxdi_prefix + _job.cli_command
-            # _rp.log([" ".join(_cli_command)])
-
-            # ------------------------------------------------- 02.03
-            # run job
-            assert not _job.os_env_vars.IS_ON_SINGLE_CPU, "Should be False"
-            _job.os_env_vars.IS_LSF_JOB = True
-            _job.launch_as_subprocess(
-                cli_command=_cli_command,
-            )
+    LsfSubmitter(flow=_RUNNER.flow, richy_panel=_rp).submit()
 
 
 @_APP.command(help="Launches all the jobs in runner on local machine.")
 def local(
     single_cpu: Annotated[bool, typer.Option(help="Launches on single CPU in sequence (good for debugging)")] = False,
+    new_terminal: Annotated[bool, typer.Option(help="Launches every job in new terminal window (ignored with --single-cpu or --workers)")] = True,
+    max_cpus: Annotated[int, typer.Option(help="Max cpus reserved by running jobs (defaults to cpu count)")] = None,
+    max_memory: Annotated[int, typer.Option(help="Max memory in MB reserved by running jobs (defaults to total memory)")] = None,
+    workers: Annotated[int, typer.Option(help="Runs jobs on these many warm worker processes instead of new process per job")] = 0,
     warm_up_time: Annotated[int, typer.Option(help="Warm up time for next job in seconds")] = 1,
 ):
     """
@@ -137,143 +92,25 @@ def local(
                     "Make sure to set --single-cpu to enable full debugging inside jobs ... "
                 ]
             )
+    if workers > 0 and single_cpu:
+        raise e.validation.NotAllowed(
+            notes=["Do not use --workers with --single-cpu"]
+        )
     # get some vars
     _rp = _RUNNER.richy_panel
     _rp.update(f"launching jobs on LOCAL cluster ...")
     if single_cpu:
         _rp.stop()
-    _flow = _RUNNER.flow
 
     # --------------------------------------------------------- 02
-    # some vars
-    _MAX_JOBS = os.cpu_count()
-    _MAX_MEMORY_USAGE_IN_PERCENT = 95.
-    _jobs_running_in_parallel = {}
+    # schedule all jobs in flow
+    # see `scheduler.LocalScheduler` for how jobs are ordered and admitted
+    LocalScheduler(
+        flow=_RUNNER.flow, richy_panel=_rp, single_cpu=single_cpu,
+        new_terminal=new_terminal, max_cpus=max_cpus, max_memory=max_memory,
+        workers=workers, warm_up_time=warm_up_time,
+    ).run()
 
     # --------------------------------------------------------- 03
-    # populate _all_jobs
-    _all_jobs = {}
-    for _stage in _flow.stages.values():
-        for _job in _stage.all_jobs:
-            _all_jobs[_job.job_id] = _job
-    _job_track_task = _rp.add_task(total=len(_all_jobs), task_name="jobs")
-
-    # --------------------------------------------------------- 04
-    # loop infinitely until all jobs complete
-    _start_time = datetime.datetime.now()
-    while bool(_all_jobs):
-
-        # loop over _all_jobs
-        for _job_flow_id in list(_all_jobs.keys()):
-
-            # ------------------------------------------------- 04.01
-            # get job
-            _job = _all_jobs[_job_flow_id]
-            _job_short_name = _job.short_name
-            # make cli command
-            _cli_command = _job.cli_command
-            if not single_cpu:
-                import platform
-                if 'WSL2' in platform.uname().release:
-                    # _cli_command = ["gnome-terminal", "--", "bash", "-c", ] + [
-                    #     '"' + ' '.join(_cli_command) + '"']
-                    _cli_command = ["gnome-terminal", "--"] + _cli_command
-                else:
-                    _cli_command = ["start", "cmd", "/c", ] + _cli_command
-
-            # ------------------------------------------------- 04.02
-            # if finished skip
-            if _job.is_finished:
-                _rp.log([f"✅ {_job_short_name} :: skipping already finished"])
-                del _all_jobs[_job_flow_id]
-                _job_track_task.update(advance=1)
-                continue
-
-            # ------------------------------------------------- 04.03
-            # if failed skip
-            if _job.is_failed:
-                _rp.log([f"❌ {_job_short_name} :: skipping as it is failed"])
-                del _all_jobs[_job_flow_id]
-                _job_track_task.update(advance=1)
-                continue
-
-            # ------------------------------------------------- 04.04
-            # look in all _wait_on jobs
-            # if one or more failed in _wait_on jobs then skip
-            _one_or_more_failed = False
-            for _wait_job in _job.wait_on_jobs:
-                if _wait_job.is_failed:
-                    _one_or_more_failed = True
-                    break
-            if _one_or_more_failed:
-                _rp.log([f"❌ {_job_short_name} :: skipping as one or more wait_on job failed"])
-                del _all_jobs[_job_flow_id]
-                _job_track_task.update(advance=1)
-                continue
-
-            # ------------------------------------------------- 04.05
-            # look in all _wait_on jobs
-            # if any one job is still not finished then skip and do not log it to richy_panel
-            _all_finished = True
-            for _wait_job in _job.wait_on_jobs:
-                if not _wait_job.is_finished:
-                    _all_finished = False
-                    break
-            if not _all_finished:
-                if (datetime.datetime.now() - _start_time).total_seconds() > 10:
-                    _rp.update(f"⏰ {_job_short_name} :: postponed wait_on jobs not completed")
-                    _start_time = datetime.datetime.now()
-                continue
-
-            # ------------------------------------------------- 04.06
-            # if any already launched job is finished then remove from dict _jobs_running_in_parallel
-            for _k in list(_jobs_running_in_parallel.keys()):
-                if _jobs_running_in_parallel[_k].is_finished:
-                    _rp.update(f"✅ {_job_short_name} :: completed")
-                    del _jobs_running_in_parallel[_k]
-                    _job_track_task.update(advance=1)
-                    continue
-                if _jobs_running_in_parallel[_k].is_failed:
-                    _rp.update(f"❌ {_job_short_name} :: failed")
-                    del _jobs_running_in_parallel[_k]
-                    _job_track_task.update(advance=1)
-                    continue
-
-            # ------------------------------------------------- 04.07
-            # if we reach here that means all jobs are over and current job is eligible to execute
-            # ------------------------------------------------- 04.07.01
-            # But before launching make sure that memory and cpus are available only if there are
-            # jobs running in parallel
-            if len(_jobs_running_in_parallel) > 0:
-                # if not enough cpus then skip
-                if len(_jobs_running_in_parallel) >= _MAX_JOBS:
-                    _rp.update(f"⏰ {_job_short_name} :: postponed not enough cpu's")
-                    continue
-                # if enough memory not available then skip
-                if psutil.virtual_memory()[2] > _MAX_MEMORY_USAGE_IN_PERCENT:
-                    _rp.update(f"⏰ {_job_short_name} :: postponed not enough memory")
-                    continue
-            # ------------------------------------------------- 04.07.02
-            # all is well launch
-            # set os env for job to be called
-            if single_cpu:
-                _job.os_env_vars.IS_ON_SINGLE_CPU = single_cpu
-            else:
-                assert not _job.os_env_vars.IS_ON_SINGLE_CPU, "Should be False"
-            _job.os_env_vars.IS_LOCAL_JOB = True
-            _job.launch_as_subprocess(
-                cli_command=_cli_command, single_cpu=single_cpu,
-            )
-            _jobs_running_in_parallel[_job.job_id] = _job
-            _rp.log([f"🏁 {_job_short_name} :: launching"])
-            del _all_jobs[_job_flow_id]
-            _job_track_task.update(advance=1)
-            # ------------------------------------------------- 04.07.03
-            # _WARM_UP_TIME_FOR_NEXT_JOB_IN_SECONDS
-            # this allows the job to enter properly and get realistic ram usage
-            if len(_jobs_running_in_parallel) > 0:
-                time.sleep(warm_up_time)
-
-    # --------------------------------------------------------- 05
     if single_cpu:
         _rp.start()
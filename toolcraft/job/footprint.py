@@ -0,0 +1,181 @@
+"""
+Measured resource footprints of jobs (peak RSS, cpu time and wall time).
+
++ `FootprintSampler` measures footprint of a job while it runs on worker ...
+  RSS of worker process and its children is sampled on a thread as process
+  level peak RSS is meaningless for warm workers that run many jobs
++ footprint is saved in `finished` tag of job and in `FootprintHistory`
+  keyed by `Job.footprint_key` (i.e. experiment/runner class and method)
++ `scheduler.LocalScheduler` uses `FootprintHistory.estimate` to reserve
+  cpus and memory for jobs that do not request them explicitly
+
+History is a sqlite database at `Settings.JOB_FOOTPRINT_DB_PATH` (defaults to
+TC_HOME/job_footprints.db) as it must outlive results dirs of runners.
+"""
+
+import dataclasses
+import math
+import sqlite3
+import threading
+import time
+import typing as t
+
+import psutil
+
+from .. import Settings
+from .. import util
+
+
+@dataclasses.dataclass(frozen=True)
+class Footprint:
+    peak_rss_in_mb: float
+    cpu_time_in_sec: float
+    wall_time_in_sec: float
+
+    @property
+    def cpus(self) -> int:
+        """
+        Number of cpus the job kept busy on average
+        """
+        if self.wall_time_in_sec <= 0:
+            return 1
+        return max(1, math.ceil(self.cpu_time_in_sec / self.wall_time_in_sec - 0.05))
+
+    @property
+    def memory(self) -> int:
+        """
+        Memory in MB to reserve for job (peak RSS with margin)
+        """
+        return math.ceil(
+            self.peak_rss_in_mb * (1 + Settings.JOB_FOOTPRINT_MEMORY_MARGIN_IN_PERCENT / 100))
+
+    def as_dict(self) -> t.Dict[str, float]:
+        return dataclasses.asdict(self)
+
+
+class FootprintSampler:
+    """
+    Context manager that measures footprint of code run inside it ... get it
+    with `footprint` after exit
+    """
+
+    def __init__(self, interval_in_sec: float = None):
+        self.interval_in_sec = \
+            Settings.JOB_FOOTPRINT_SAMPLE_INTERVAL_IN_SEC if interval_in_sec is None else interval_in_sec
+        self.footprint = None  # type: t.Optional[Footprint]
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None  # type: t.Optional[threading.Thread]
+        self._peak_rss = 0
+        self._start_cpu = 0.
+        self._start_wall = 0.
+
+    def _rss(self) -> int:
+        _ret = self._process.memory_info().rss
+        for _child in self._process.children(recursive=True):
+            try:
+                _ret += _child.memory_info().rss
+            except psutil.Error:
+                ...
+        return _ret
+
+    def _cpu_time(self) -> float:
+        # children_* are available only on some platforms and cover only
+        # children that were waited on
+        _times = self._process.cpu_times()
+        return _times.user + _times.system + \
+            getattr(_times, "children_user", 0.) + getattr(_times, "children_system", 0.)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_in_sec):
+            self._peak_rss = max(self._peak_rss, self._rss())
+
+    def __enter__(self) -> "FootprintSampler":
+        self._start_wall = time.perf_counter()
+        self._start_cpu = self._cpu_time()
+        self._peak_rss = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self._peak_rss = max(self._peak_rss, self._rss())
+        self.footprint = Footprint(
+            peak_rss_in_mb=self._peak_rss / (1024 * 1024),
+            cpu_time_in_sec=self._cpu_time() - self._start_cpu,
+            wall_time_in_sec=time.perf_counter() - self._start_wall,
+        )
+
+
+class FootprintHistory(util.SqliteDb):
+    """
+    SQLite database with footprints of finished jobs.
+
+    Note: uses default rollback journal as TC_HOME can be on network file
+      system on clusters.
+    """
+
+    def init_connection(self, conn: sqlite3.Connection):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS footprints ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, "
+            "peak_rss_in_mb REAL NOT NULL, cpu_time_in_sec REAL NOT NULL, "
+            "wall_time_in_sec REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS footprints_key ON footprints (key, seq)")
+
+    def record(self, key: str, footprint: Footprint):
+        with self.transaction() as _conn:
+            _conn.execute(
+                "INSERT INTO footprints (key, peak_rss_in_mb, cpu_time_in_sec, wall_time_in_sec) "
+                "VALUES (?, ?, ?, ?)",
+                (key, footprint.peak_rss_in_mb, footprint.cpu_time_in_sec, footprint.wall_time_in_sec)
+            )
+            # keep only recent footprints per key
+            _conn.execute(
+                "DELETE FROM footprints WHERE key = ? AND seq NOT IN ("
+                "SELECT seq FROM footprints WHERE key = ? ORDER BY seq DESC LIMIT ?)",
+                (key, key, Settings.JOB_FOOTPRINT_HISTORY_SIZE)
+            )
+
+    def estimate(self, keys: t.Iterable[str]) -> t.Dict[str, Footprint]:
+        """
+        Returns key -> conservative footprint from recent history (max peak
+        RSS and max cpu utilization) for keys that have history
+        """
+        _keys = list(set(keys))
+        _ret = {}
+        for _i in range(0, len(_keys), 500):
+            _chunk = _keys[_i:_i + 500]
+            for _key, _rss, _cpus, _wall in self.connection.execute(
+                "SELECT key, MAX(peak_rss_in_mb), "
+                "MAX(cpu_time_in_sec / MAX(wall_time_in_sec, 1e-6)), AVG(wall_time_in_sec) "
+                f"FROM footprints WHERE key IN ({','.join('?' * len(_chunk))}) GROUP BY key",
+                _chunk,
+            ).fetchall():
+                _ret[_key] = Footprint(
+                    peak_rss_in_mb=_rss, cpu_time_in_sec=_cpus * _wall, wall_time_in_sec=_wall)
+        return _ret
+
+
+_FOOTPRINT_HISTORY_INSTANCES = {}  # type: t.Dict[str, FootprintHistory]
+
+
+def get_footprint_history() -> t.Optional[FootprintHistory]:
+    """
+    Returns history configured in Settings or None when disabled
+    """
+    if not Settings.JOB_FOOTPRINT_HISTORY:
+        return None
+    _db_path = Settings.JOB_FOOTPRINT_DB_PATH
+    if _db_path is None:
+        _db_path = Settings.TC_HOME / "job_footprints.db"
+    _db_path = str(_db_path)
+    try:
+        return _FOOTPRINT_HISTORY_INSTANCES[_db_path]
+    except KeyError:
+        _history = FootprintHistory(_db_path)
+        _FOOTPRINT_HISTORY_INSTANCES[_db_path] = _history
+        return _history
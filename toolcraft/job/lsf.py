@@ -0,0 +1,246 @@
+"""
+Batched submission of jobs of `Flow` to LSF.
+
++ unfinished jobs are grouped into LSF job arrays ... jobs go in same array
+  when they are in same stage, have same `JobLaunchParameters` and wait on
+  same arrays ... an array element runs `run-array` cli command which picks
+  its job id from array file by `LSB_JOBINDEX`
++ dependencies are expressed per array i.e. `done(<array_name>)` for every
+  array that has at least one of the wait_on jobs ... this waits a bit more
+  than needed when only some jobs of array are waited on, but `-w` stays
+  small irrespective of number of jobs
++ arrays are submitted in waves (an array is submitted only after arrays it
+  waits on are submitted as LSF rejects `done()` on unknown names) and within
+  a wave `bsub` calls run on a small thread pool with rate limiting (see
+  `Settings.LSF_SUBMIT_MAX_WORKERS` and `Settings.LSF_SUBMIT_MAX_PER_SEC`)
+
+`Settings.LSF_BSUB_COMMAND` can point to a fake `bsub` script that records
+calls to test this without LSF.
+"""
+import concurrent.futures
+import dataclasses
+import os
+import re
+import subprocess
+import threading
+import time
+import typing as t
+
+from upath import UPath
+
+from .. import logger
+from .. import error as e
+from .. import richy
+from .. import Settings
+from .__base__ import Job, Flow
+from .scheduler import topological_order
+
+_LOGGER = logger.get_logger()
+
+
+@dataclasses.dataclass
+class JobArray:
+    name: str
+    stage: str
+    # (lsf_email, lsf_cpus, lsf_memory)
+    launch_parameters: t.Tuple[bool, t.Optional[int], t.Optional[int]]
+    wait_on: t.List[str]
+    jobs: t.List[Job] = dataclasses.field(default_factory=list)
+
+    @property
+    def job_ids(self) -> t.List[str]:
+        return [_.job_id for _ in self.jobs]
+
+    def bsub_command(self, array_file: UPath, log_dir: UPath) -> t.List[str]:
+        _email, _cpus, _memory = self.launch_parameters
+        _ret = [Settings.LSF_BSUB_COMMAND, "-J", f"{self.name}[1-{len(self.jobs)}]"]
+        if not _email:
+            _ret += ["-oo", (log_dir / f"{self.name}.%I.log").as_posix()]
+        if _cpus is not None:
+            _ret += ["-n", f"{_cpus}"]
+        if _memory is not None:
+            _ret += ["-R", f"rusage[mem={_memory}]"]
+        if bool(self.wait_on):
+            _ret += ["-w", " && ".join([f"done({_})" for _ in self.wait_on])]
+        _runner = self.jobs[0].runner
+        _ret += [
+            self.jobs[0].cli_command[0], _runner.py_script.name,
+            "run-array", array_file.as_posix(),
+        ]
+        return _ret
+
+
+class _RateLimiter:
+
+    def __init__(self, max_per_sec: float):
+        self.min_interval = 0. if max_per_sec <= 0 else 1. / max_per_sec
+        self._lock = threading.Lock()
+        self._next = 0.
+
+    def wait(self):
+        with self._lock:
+            _now = time.monotonic()
+            _sleep = self._next - _now
+            self._next = max(_now, self._next) + self.min_interval
+        if _sleep > 0:
+            time.sleep(_sleep)
+
+
+class LsfSubmitter:
+    """
+    Groups unfinished jobs of flow into job arrays and submits them.
+    """
+
+    def __init__(self, flow: Flow, richy_panel: richy.StatusPanel):
+        self.flow = flow
+        self.richy_panel = richy_panel
+        self.arrays = []  # type: t.List[JobArray]
+
+    @property
+    def folder(self) -> UPath:
+        """
+        Folder with array files and bsub logs
+        """
+        _ret = self.flow.runner.results_dir / "lsf"
+        _ret.mkdir(parents=True, exist_ok=True)
+        return _ret
+
+    def make_arrays(self) -> t.List[JobArray]:
+        # ------------------------------------------------------------ 01
+        # some vars
+        _rp = self.richy_panel
+        _max_size = Settings.LSF_MAX_ARRAY_SIZE
+        _prefix = f"{self.flow.runner.hex_hash[:8]}"
+        _stage_of = {}
+        for _stage_key, _stage in self.flow.stages.items():
+            for _job in _stage.all_jobs:
+                _stage_of.setdefault(_job.job_id, _stage_key)
+        _finished = {
+            _k for _k, _v in self.flow.tag_names(names=["finished"]).items() if bool(_v)
+        }
+
+        # ------------------------------------------------------------ 02
+        # group jobs in topological order so that arrays waited on are
+        # always made before
+        _array_of = {}  # type: t.Dict[str, JobArray]
+        _open = {}  # type: t.Dict[t.Tuple, JobArray]
+        for _job in topological_order(self.flow):
+            _job_id = _job.job_id
+            # -------------------------------------------------------- 02.01
+            if _job_id in _finished:
+                _rp.update(f"skipping {_job.short_name} as it is finished")
+                continue
+            # -------------------------------------------------------- 02.02
+            # wait_on arrays ... skip if some wait_on job cannot finish
+            _wait_on = []
+            _can_run = True
+            for _wj in _job.wait_on_jobs:
+                if _wj.job_id in _finished:
+                    continue
+                if _wj.job_id not in _array_of:
+                    _can_run = False
+                    break
+                _name = _array_of[_wj.job_id].name
+                if _name not in _wait_on:
+                    _wait_on.append(_name)
+            if not _can_run:
+                _rp.log([f"❌ {_job.short_name} :: skipping as one or more wait_on job is not submitted"])
+                continue
+            # -------------------------------------------------------- 02.03
+            # job should be launchable ... note that launched tag is created
+            # only right before bsub of its array (see `submit`)
+            _health = _job.check_health(is_on_main_machine=True)
+            if _health is not None:
+                _LOGGER.error(msg=_health)
+                continue
+            if not _job.os_env_vars.IS_LSF_JOB:
+                _job.os_env_vars.IS_LSF_JOB = True
+            # -------------------------------------------------------- 02.04
+            # add to array
+            _lp = _job.launch_parameters
+            _stage_key = _stage_of[_job_id]
+            _key = (_stage_key, (_lp.lsf_email, _lp.lsf_cpus, _lp.lsf_memory), tuple(sorted(_wait_on)))
+            _array = _open.get(_key, None)
+            if _array is None or len(_array.jobs) >= _max_size:
+                _array = JobArray(
+                    name=f"{_prefix}-{re.sub(r'[^A-Za-z0-9_-]', '_', _stage_key)}-{len(self.arrays)}",
+                    stage=_stage_key, launch_parameters=_key[1], wait_on=_wait_on,
+                )
+                self.arrays.append(_array)
+                _open[_key] = _array
+            _array.jobs.append(_job)
+            _array_of[_job_id] = _array
+
+        # ------------------------------------------------------------ 03
+        return self.arrays
+
+    def submit(self):
+        # ------------------------------------------------------------ 01
+        # make arrays and write array files
+        _rp = self.richy_panel
+        _arrays = self.make_arrays()
+        _folder = self.folder
+        _commands = {}
+        for _array in _arrays:
+            _array_file = _folder / f"{_array.name}.jobs"
+            _array_file.write_text("\n".join(_array.job_ids))
+            _commands[_array.name] = _array.bsub_command(array_file=_array_file, log_dir=_folder)
+        _rp.update(
+            f"submitting {sum(len(_.jobs) for _ in _arrays)} jobs as {len(_arrays)} job arrays ...")
+
+        # ------------------------------------------------------------ 02
+        # env vars ... note that LSF passes env of bsub to the job
+        _env_vars = os.environ.copy()
+        if bool(_arrays):
+            _env_vars.update(_arrays[0].jobs[0].os_env_vars.get_environ_dict())
+
+        # ------------------------------------------------------------ 03
+        # submit in waves on thread pool
+        _limiter = _RateLimiter(max_per_sec=Settings.LSF_SUBMIT_MAX_PER_SEC)
+
+        def _bsub(_array: JobArray) -> str:
+            # launched tags are created right before bsub and deleted if bsub
+            # fails ... so that jobs of arrays that are not submitted can be
+            # launched again without `clean`
+            _launched = []
+            try:
+                for _job in _array.jobs:
+                    if not _job.create_launched_tag():
+                        raise e.code.CodingError(
+                            notes=[f"Cannot create launched tag for job {_job.short_name} of array {_array.name}"]
+                        )
+                    _launched.append(_job)
+                _limiter.wait()
+                _ret = subprocess.run(
+                    _commands[_array.name], env=_env_vars, capture_output=True, text=True,
+                )
+                if _ret.returncode != 0:
+                    raise e.code.CodingError(
+                        notes=[
+                            f"bsub failed with return code {_ret.returncode} for array {_array.name}",
+                            _commands[_array.name], _ret.stderr,
+                        ]
+                    )
+            except Exception:
+                for _job in _launched:
+                    _job.tag_manager.launched.delete()
+                raise
+            return _ret.stdout
+
+        _submitted = set()
+        _pending = list(_arrays)
+        _track = _rp.add_task(task_name="bsub", total=len(_arrays))
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=Settings.LSF_SUBMIT_MAX_WORKERS,
+        ) as _executor:
+            while bool(_pending):
+                _wave = [_ for _ in _pending if all(_w in _submitted for _w in _.wait_on)]
+                if not bool(_wave):
+                    raise e.code.ShouldNeverHappen(
+                        notes=["Arrays are made in topological order so some array must be ready ..."]
+                    )
+                _pending = [_ for _ in _pending if _ not in _wave]
+                for _array, _stdout in zip(_wave, _executor.map(_bsub, _wave)):
+                    _submitted.add(_array.name)
+                    _track.update(advance=1)
+                    _rp.log([f"🏁 {_array.name} :: {len(_array.jobs)} jobs :: {_stdout.strip()}"])
@@ -0,0 +1,408 @@
+"""
+Event driven scheduler that launches jobs of `Flow` on local machine.
+
++ jobs are topologically sorted once from `Job.wait_on_jobs` (order of stages
+  breaks ties) and their states are kept in memory ... tags are read once at
+  start (see `Flow.tag_names`) and then only when process of a job exits
++ scheduler sleeps till a child process exits (watcher threads post on a
+  queue) or `Settings.JOB_SCHEDULER_POLL_INTERVAL_IN_SEC` elapses ... on
+  timeout only tags of jobs whose process cannot be waited on are checked
+  (i.e. launched in new terminal or already running elsewhere)
++ a job is admitted only if its cpus and memory fit in what is not reserved
+  by running jobs ... these come from `JobLaunchParameters.local_cpus` and
+  `JobLaunchParameters.local_memory` or else from measured footprints of
+  earlier runs of same experiment class and method (see `footprint`)
++ ready jobs are packed first fit decreasing i.e. largest memory first and
+  smaller jobs fill what is left ... jobs with no known footprint reserve
+  nothing and are admitted on live memory usage after warm up time of job
+  launched before them (warm up time is waited only after launching such
+  jobs as for others memory is already reserved) ... optionally they can
+  wait till a job with same key has finished so that its footprint is known
+  (see `Settings.JOB_FOOTPRINT_PROBE_UNKNOWN`)
++ with `workers` jobs are run by warm worker processes (see
+  `worker_pool.WorkerPool`) instead of fresh process per job
+"""
+import enum
+import heapq
+import os
+import platform
+import queue
+import threading
+import time
+import typing as t
+
+import psutil
+
+from .. import logger
+from .. import error as e
+from .. import richy
+from .. import Settings
+from .__base__ import Job, Flow
+from .worker_pool import WorkerPool
+from .footprint import Footprint, get_footprint_history
+
+_LOGGER = logger.get_logger()
+
+
+class JobState(enum.Enum):
+    pending = "pending"
+    running = "running"
+    finished = "finished"
+    failed = "failed"
+    skipped = "skipped"
+
+
+def topological_order(flow: Flow) -> t.List[Job]:
+    """
+    Returns unique jobs of flow such that every job comes after all of its
+    `wait_on_jobs` ... otherwise jobs retain the order of stages
+    """
+    # ------------------------------------------------------------ 01
+    # collect unique jobs in stage order
+    _jobs = {}  # type: t.Dict[str, Job]
+    for _stage in flow.stages.values():
+        for _job in _stage.all_jobs:
+            _jobs.setdefault(_job.job_id, _job)
+    _keys = list(_jobs.keys())
+    _index = {_k: _i for _i, _k in enumerate(_keys)}
+
+    # ------------------------------------------------------------ 02
+    # count dependencies
+    _num_deps = {}
+    _dependents = {_k: [] for _k in _keys}
+    for _k, _job in _jobs.items():
+        _deps = {_.job_id for _ in _job.wait_on_jobs}
+        for _d in _deps:
+            if _d not in _index:
+                raise e.code.CodingError(
+                    notes=[
+                        f"Job {_job.short_name} waits on job {_d} which is "
+                        f"not part of any stage in flow ..."
+                    ]
+                )
+            _dependents[_d].append(_k)
+        _num_deps[_k] = len(_deps)
+
+    # ------------------------------------------------------------ 03
+    # Kahn's algorithm ... heap on index keeps order of stages
+    _heap = [_index[_k] for _k in _keys if _num_deps[_k] == 0]
+    heapq.heapify(_heap)
+    _ret = []
+    while bool(_heap):
+        _k = _keys[heapq.heappop(_heap)]
+        _ret.append(_jobs[_k])
+        for _d in _dependents[_k]:
+            _num_deps[_d] -= 1
+            if _num_deps[_d] == 0:
+                heapq.heappush(_heap, _index[_d])
+    if len(_ret) != len(_keys):
+        raise e.code.CodingError(
+            notes=[
+                "There is a cycle in wait_on jobs of below jobs ...",
+                [_jobs[_k].short_name for _k in _keys if _num_deps[_k] > 0],
+            ]
+        )
+
+    # ------------------------------------------------------------ 04
+    return _ret
+
+
+class LocalScheduler:
+    """
+    Launches all jobs of flow on local machine and returns when every job is
+    finished, failed or skipped (i.e. one of its wait_on jobs failed).
+    """
+
+    def __init__(
+        self,
+        flow: Flow,
+        richy_panel: richy.StatusPanel,
+        single_cpu: bool = False,
+        new_terminal: bool = False,
+        max_cpus: int = None,
+        max_memory: int = None,
+        workers: int = 0,
+        warm_up_time: float = 0,
+    ):
+        """
+        Args:
+            single_cpu: run jobs one after other in current process
+            new_terminal: launch every job in new terminal window ... note
+              that exit of terminal is not exit of job so such jobs are
+              tracked by polling their tags (ignored with `single_cpu` or
+              `workers`)
+            max_cpus: cpus that can be reserved by jobs (defaults to
+              `os.cpu_count()`)
+            max_memory: memory in MB that can be reserved by jobs (defaults to
+              total memory)
+            workers: when > 0 run jobs on these many warm worker processes
+              ... at most these many jobs run at a time
+            warm_up_time: seconds to wait after launching a job with unknown
+              footprint before launching next one so that it gets to
+              realistic memory usage
+        """
+        self.flow = flow
+        self.richy_panel = richy_panel
+        self.single_cpu = single_cpu
+        self.workers = 0 if single_cpu else workers
+        self.new_terminal = new_terminal and not single_cpu and self.workers == 0
+        self.warm_up_time = warm_up_time
+        self.max_cpus = os.cpu_count() if max_cpus is None else max_cpus
+        self.max_memory = \
+            psutil.virtual_memory().total // (1024 * 1024) if max_memory is None else max_memory
+
+        # jobs and their states
+        self.jobs = topological_order(flow)
+        self.states = {}  # type: t.Dict[str, JobState]
+        # job_id -> True when its exit is posted on queue (child process or
+        # warm worker) else its tags need to be polled
+        self.running = {}  # type: t.Dict[str, bool]
+
+        # internals
+        self._index = {_j.job_id: _i for _i, _j in enumerate(self.jobs)}
+        self._dependents = {_j.job_id: [] for _j in self.jobs}
+        self._num_unfinished_deps = {}  # type: t.Dict[str, int]
+        self._ready = []  # type: t.List[int]
+        self._reserved = {}  # type: t.Dict[str, t.Tuple[int, int]]
+        # footprint_key -> estimated footprint
+        self._history = get_footprint_history()
+        self._estimates = {}  # type: t.Dict[str, Footprint]
+        # job_id -> footprint_key for running jobs with unknown footprint
+        self._probing = {}  # type: t.Dict[str, str]
+        self._exits = queue.Queue()  # type: queue.Queue[t.Tuple[str, int]]
+        self._track = None
+        self._worker_pool = None  # type: t.Optional[WorkerPool]
+
+    def cli_command(self, job: Job) -> t.List[str]:
+        _ret = job.cli_command
+        if self.new_terminal:
+            if 'WSL2' in platform.uname().release:
+                _ret = ["gnome-terminal", "--"] + _ret
+            else:
+                _ret = ["start", "cmd", "/c", ] + _ret
+        return _ret
+
+    def run(self):
+        _rp = self.richy_panel
+        _poll_interval = Settings.JOB_SCHEDULER_POLL_INTERVAL_IN_SEC
+
+        # ------------------------------------------------------------ 01
+        # read states from tags once
+        self._track = _rp.add_task(total=len(self.jobs), task_name="jobs")
+        _tag_names = self.flow.tag_names(names=["finished", "failed"])
+        for _job in self.jobs:
+            _job_id = _job.job_id
+            _deps = {_.job_id for _ in _job.wait_on_jobs}
+            for _d in _deps:
+                self._dependents[_d].append(_job_id)
+            if "finished" in _tag_names[_job_id]:
+                self._set_state(_job, JobState.finished, "skipping already finished")
+            elif "failed" in _tag_names[_job_id]:
+                self._set_state(_job, JobState.failed, "skipping as it is failed")
+            elif any(self.states[_d] in (JobState.failed, JobState.skipped) for _d in _deps):
+                # topological order makes sure that states of deps are known
+                self._set_state(_job, JobState.skipped, "skipping as one or more wait_on job failed")
+            else:
+                self.states[_job_id] = JobState.pending
+                self._num_unfinished_deps[_job_id] = \
+                    sum(self.states[_d] != JobState.finished for _d in _deps)
+                if self._num_unfinished_deps[_job_id] == 0:
+                    heapq.heappush(self._ready, self._index[_job_id])
+
+        # ------------------------------------------------------------ 02
+        # estimate footprints from history
+        if self._history is not None:
+            self._estimates = self._history.estimate(
+                [_j.footprint_key for _j in self.jobs if self.states[_j.job_id] is JobState.pending])
+
+        # ------------------------------------------------------------ 03
+        # start warm workers if needed
+        if self.workers > 0:
+            self._worker_pool = WorkerPool(
+                runner=self.flow.runner, num_workers=self.workers, exits=self._exits)
+
+        # ------------------------------------------------------------ 04
+        # loop till nothing is ready or running
+        while bool(self._ready) or bool(self.running):
+            # -------------------------------------------------------- 04.01
+            self._admit()
+            if not bool(self.running):
+                continue
+            # -------------------------------------------------------- 04.02
+            # sleep till some job exits or poll interval elapses
+            try:
+                _exit = self._exits.get(timeout=_poll_interval)
+                while True:
+                    self._resolve(*_exit)
+                    _exit = self._exits.get_nowait()
+            except queue.Empty:
+                ...
+            # -------------------------------------------------------- 04.03
+            # check tags of jobs that cannot be waited on
+            for _job_id in [_k for _k, _v in self.running.items() if not _v]:
+                self._resolve(_job_id)
+
+        # ------------------------------------------------------------ 05
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+
+    def _set_state(self, job: Job, state: JobState, msg: str):
+        _job_id = job.job_id
+        self.states[_job_id] = state
+        self._track.update(advance=1)
+        _icon = "✅" if state is JobState.finished else "❌"
+        self.richy_panel.log([f"{_icon} {job.short_name} :: {msg}"])
+
+    def request(self, job: Job) -> t.Tuple[int, int, bool]:
+        """
+        Returns cpus and memory (MB) to reserve for job and if they are known
+        i.e. requested explicitly or estimated from history
+        """
+        _lp = job.launch_parameters
+        _footprint = self._estimates.get(job.footprint_key, None)
+        _cpus = _lp.local_cpus if _footprint is None else max(_lp.local_cpus, _footprint.cpus)
+        if _lp.local_memory is not None:
+            return _cpus, _lp.local_memory, True
+        if _footprint is not None:
+            return _cpus, _footprint.memory, True
+        return _cpus, 0, False
+
+    def _admit(self):
+        # ------------------------------------------------------------ 01
+        # first fit decreasing ... ties are broken by topological order
+        _requests = {}
+        for _i in self._ready:
+            _requests[_i] = self.request(self.jobs[_i])
+        _candidates = sorted(
+            self._ready, key=lambda _i: (-_requests[_i][1], -_requests[_i][0], _i))
+        self._ready = []
+
+        # ------------------------------------------------------------ 02
+        _postponed = []
+        for _n, _i in enumerate(_candidates):
+            _job = self.jobs[_i]
+            _cpus, _memory, _known = _requests[_i]
+            # warm workers are busy
+            if 0 < self.workers <= len(self.running):
+                _postponed.append(_i)
+                continue
+            # footprint is being probed by other job with same key
+            if not _known and Settings.JOB_FOOTPRINT_PROBE_UNKNOWN and \
+                    _job.footprint_key in self._probing.values():
+                _postponed.append(_i)
+                continue
+            # always admit when nothing is running else job will never run
+            if bool(self.running) and not self._fits(_cpus, _memory):
+                _postponed.append(_i)
+                continue
+            if not _known:
+                self._probing[_job.job_id] = _job.footprint_key
+            self._launch(_job, _cpus, _memory)
+            # let job with unknown footprint allocate memory so that memory
+            # check for next job sees realistic usage
+            if not _known and self.warm_up_time > 0 and _n < len(_candidates) - 1 \
+                    and bool(self.running):
+                time.sleep(self.warm_up_time)
+
+        # ------------------------------------------------------------ 03
+        for _i in _postponed:
+            heapq.heappush(self._ready, _i)
+        if bool(_postponed):
+            self.richy_panel.update(
+                f"⏰ {len(_postponed)} ready jobs postponed as not enough cpus or memory")
+
+    def _fits(self, cpus: int, memory: int) -> bool:
+        _reserved_cpus = sum(_[0] for _ in self._reserved.values())
+        _reserved_memory = sum(_[1] for _ in self._reserved.values())
+        if _reserved_cpus + cpus > self.max_cpus:
+            return False
+        if _reserved_memory + memory > self.max_memory:
+            return False
+        if psutil.virtual_memory().percent > Settings.JOB_SCHEDULER_MAX_MEMORY_USAGE_IN_PERCENT:
+            return False
+        return True
+
+    def _launch(self, job: Job, cpus: int, memory: int):
+        # ------------------------------------------------------------ 01
+        # set os env for job to be called
+        _job_id = job.job_id
+        if self.single_cpu:
+            job.os_env_vars.IS_ON_SINGLE_CPU = True
+        else:
+            assert not job.os_env_vars.IS_ON_SINGLE_CPU, "Should be False"
+        job.os_env_vars.IS_LOCAL_JOB = True
+
+        # ------------------------------------------------------------ 02
+        # launch
+        self.richy_panel.log([f"🏁 {job.short_name} :: launching"])
+        self.states[_job_id] = JobState.running
+        self._reserved[_job_id] = (cpus, memory)
+        # ------------------------------------------------------------ 02.01
+        # on warm worker ... it posts on exits queue when job is over
+        if self._worker_pool is not None:
+            self.running[_job_id] = job.create_launched_tag()
+            if self.running[_job_id]:
+                self._worker_pool.submit(_job_id)
+            return
+        # ------------------------------------------------------------ 02.02
+        # in new process
+        _process = job.launch_as_subprocess(
+            cli_command=self.cli_command(job), single_cpu=self.single_cpu, wait=False,
+        )
+        self.running[_job_id] = _process is not None
+
+        # ------------------------------------------------------------ 03
+        # watch process or check tags right away if job was run in this process
+        if _process is None:
+            self._resolve(_job_id)
+        else:
+            threading.Thread(
+                target=lambda: self._exits.put((_job_id, _process.wait())),
+                daemon=True,
+            ).start()
+
+    def _resolve(self, job_id: str, return_code: int = None):
+        """
+        Called when job exits (`return_code` is not None) or when its tags
+        need to be checked
+        """
+        # ------------------------------------------------------------ 01
+        # find out new state
+        _job = self.jobs[self._index[job_id]]
+        if _job.is_finished:
+            _state, _msg = JobState.finished, "completed"
+        elif _job.is_failed:
+            _state, _msg = JobState.failed, "failed"
+        elif return_code is not None and not self.new_terminal:
+            _state, _msg = JobState.failed, f"exited with return code {return_code} without finished tag"
+        else:
+            # keep checking tags
+            self.running[job_id] = False
+            return
+
+        # ------------------------------------------------------------ 02
+        # release and update state
+        del self.running[job_id]
+        del self._reserved[job_id]
+        self._probing.pop(job_id, None)
+        self._set_state(_job, _state, _msg)
+        # footprint of finished job is in history now
+        if _state is JobState.finished and self._history is not None:
+            self._estimates.update(self._history.estimate([_job.footprint_key]))
+
+        # ------------------------------------------------------------ 03
+        # make dependents ready or skip them (and their dependents)
+        _to_visit = list(self._dependents[job_id])
+        while bool(_to_visit):
+            _d = _to_visit.pop()
+            if self.states[_d] is not JobState.pending:
+                continue
+            if _state is JobState.finished:
+                self._num_unfinished_deps[_d] -= 1
+                if self._num_unfinished_deps[_d] == 0:
+                    heapq.heappush(self._ready, self._index[_d])
+            else:
+                self._set_state(
+                    self.jobs[self._index[_d]], JobState.skipped,
+                    "skipping as one or more wait_on job failed")
+                _to_visit += self._dependents[_d]
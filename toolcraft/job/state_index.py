@@ -0,0 +1,168 @@
+"""
+Job state index that keeps tags of all jobs of a `Runner` (launched, started,
+running, finished, failed, description ...) in one SQLite database in its
+results dir instead of one yaml file per tag.
+
++ `job_tags` table is the snapshot i.e. one row per (job_id, tag) as if it
+  was a tag file ... `Flow.status()` is answered with one query on it
++ `job_events` table is append-only log of every create/update/delete of a
+  tag with time and host
++ every operation updates both tables in single `BEGIN IMMEDIATE`
+  transaction so readers never see a half done transition
+
+Select with `Settings.JOB_STATE_BACKEND`. Tag files are still written when
+`Settings.JOB_STATE_MIRROR_TAGS` is set (handy for browsing results dir) but
+they are never read.
+"""
+
+import datetime
+import socket
+import sqlite3
+import typing as t
+
+from .. import error as e
+from .. import marshalling as m
+from .. import util
+
+_now = datetime.datetime.now
+
+
+class JobStateIndex(util.SqliteDb):
+    """
+    Note: results dir is often on network file system which is why journal
+      mode is configurable (see `Settings.JOB_STATE_JOURNAL_MODE`) ... WAL
+      needs shared memory so use it only when results dir is on local disk.
+    """
+
+    def __init__(self, db_path: str, journal_mode: str = "DELETE"):
+        super().__init__(db_path)
+        self.journal_mode = journal_mode
+
+    def init_connection(self, conn: sqlite3.Connection):
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_tags ("
+            "job_id TEXT NOT NULL, tag TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (job_id, tag))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, "
+            "tag TEXT NOT NULL, op TEXT NOT NULL, time TEXT NOT NULL, "
+            "hostname TEXT NOT NULL, data BLOB)"
+        )
+
+    def _transaction(
+        self, job_id: str, tag: str, op: str,
+        fn: t.Callable[[sqlite3.Connection, t.Optional[t.Dict]], t.Optional[t.Dict]],
+    ):
+        """
+        Calls fn with connection and current data of tag (None if absent) and
+        logs event with data returned by fn ... all in one transaction
+        """
+        with self.transaction() as _conn:
+            _row = _conn.execute(
+                "SELECT data FROM job_tags WHERE job_id = ? AND tag = ?", (job_id, tag)
+            ).fetchone()
+            _data = fn(_conn, None if _row is None else m.YamlBinary.load(_row[0]))
+            _conn.execute(
+                "INSERT INTO job_events (job_id, tag, op, time, hostname, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, tag, op, _now().isoformat(), socket.gethostname(),
+                 None if _data is None else m.YamlBinary.dump(_data))
+            )
+
+    def create(self, job_id: str, tag: str, data: t.Dict[str, t.Any]):
+        def _fn(_conn, _old):
+            if _old is not None:
+                raise e.code.CodingError(
+                    notes=[f"Tag {tag} for job {job_id} already exists in {self.db_path} ..."]
+                )
+            _conn.execute(
+                "INSERT INTO job_tags (job_id, tag, data) VALUES (?, ?, ?)",
+                (job_id, tag, m.YamlBinary.dump(data))
+            )
+            return data
+        self._transaction(job_id, tag, "create", _fn)
+
+    def update(self, job_id: str, tag: str, data: t.Dict[str, t.Any], allow_overwrite: bool = False):
+        def _fn(_conn, _old):
+            _new = {} if _old is None else _old
+            for _k in data.keys():
+                if _k in _new.keys() and not allow_overwrite:
+                    raise e.validation.NotAllowed(
+                        notes=[f"Cannot overwrite key {_k} in tag ..."]
+                    )
+            _new.update(data)
+            _conn.execute(
+                "INSERT OR REPLACE INTO job_tags (job_id, tag, data) VALUES (?, ?, ?)",
+                (job_id, tag, m.YamlBinary.dump(_new))
+            )
+            return _new
+        self._transaction(job_id, tag, "update", _fn)
+
+    def delete(self, job_id: str, tag: str):
+        def _fn(_conn, _old):
+            if _old is None:
+                raise e.code.CodingError(
+                    notes=[f"The tag {tag} for job {job_id} does not exist so cannot delete ..."]
+                )
+            _conn.execute(
+                "DELETE FROM job_tags WHERE job_id = ? AND tag = ?", (job_id, tag)
+            )
+            return None
+        self._transaction(job_id, tag, "delete", _fn)
+
+    def delete_job(self, job_id: str):
+        """
+        Deletes all tags of job (events are retained)
+        """
+        for _tag in list(self.read_all(job_id).keys()):
+            self.delete(job_id, _tag)
+
+    def read(self, job_id: str, tag: str) -> t.Optional[t.Dict[str, t.Any]]:
+        _row = self.connection.execute(
+            "SELECT data FROM job_tags WHERE job_id = ? AND tag = ?", (job_id, tag)
+        ).fetchone()
+        return None if _row is None else m.YamlBinary.load(_row[0])
+
+    def read_all(self, job_id: str) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """
+        Returns tag -> data for all tags of job
+        """
+        return {
+            _tag: m.YamlBinary.load(_data) for _tag, _data in self.connection.execute(
+                "SELECT tag, data FROM job_tags WHERE job_id = ?", (job_id, )
+            ).fetchall()
+        }
+
+    def tag_names(self) -> t.Dict[str, t.Set[str]]:
+        """
+        Returns job_id -> names of tags present for all jobs in one query
+        """
+        _ret = {}
+        for _job_id, _tag in self.connection.execute(
+            "SELECT job_id, tag FROM job_tags"
+        ).fetchall():
+            _ret.setdefault(_job_id, set()).add(_tag)
+        return _ret
+
+    def events(self, job_id: str = None) -> t.List[t.Dict[str, t.Any]]:
+        """
+        Returns event log (of one job if job_id is supplied) in order
+        """
+        _query = "SELECT seq, job_id, tag, op, time, hostname, data FROM job_events"
+        _args = ()
+        if job_id is not None:
+            _query += " WHERE job_id = ?"
+            _args = (job_id, )
+        return [
+            dict(
+                seq=_seq, job_id=_job_id, tag=_tag, op=_op,
+                time=datetime.datetime.fromisoformat(_time), hostname=_hostname,
+                data=None if _data is None else m.YamlBinary.load(_data),
+            )
+            for _seq, _job_id, _tag, _op, _time, _hostname, _data in self.connection.execute(
+                _query + " ORDER BY seq", _args
+            ).fetchall()
+        ]
@@ -0,0 +1,157 @@
+"""
+Pool of warm worker processes that run jobs launched on local machine.
+
++ every worker process holds the `Runner` built by launcher (inherited on
+  fork, pickled on platforms without fork) so a job costs no interpreter
+  startup, imports or rebuild of `Runner`/`Flow`
++ job ids are dispatched over a queue ... one thread per worker takes a job
+  id, sends it to its worker over a pipe and waits for result or for worker
+  to die and then posts (job_id, return_code) on `exits` queue (same as
+  watcher threads of `scheduler.LocalScheduler` do for child processes)
++ worker runs job with `Job.run_on_worker` so tags and log file are same as
+  for `run` cli command
++ worker is replaced after `Settings.JOB_WORKER_MAX_JOBS` jobs or when its
+  memory grows by `Settings.JOB_WORKER_MAX_MEMORY_GROWTH_IN_MB`
+"""
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import threading
+import typing as t
+
+import psutil
+
+from .. import logger
+from .. import richy
+from .. import Settings
+
+if False:
+    from .__base__ import Runner
+
+_LOGGER = logger.get_logger()
+
+
+def _worker_main(
+    runner: "Runner", conn: multiprocessing.connection.Connection,
+    max_jobs: int, max_memory_growth_in_mb: float,
+):
+    # ------------------------------------------------------------ 01
+    # stdout is discarded as for subprocess launched jobs ... job logs to
+    # its log file
+    _devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(_devnull, 1)
+    _process = psutil.Process()
+    _baseline_rss = _process.memory_info().rss
+    _num_jobs = 0
+
+    # ------------------------------------------------------------ 02
+    # run jobs till asked to stop or till it needs to be recycled
+    while True:
+        _job_id = conn.recv()
+        if _job_id is None:
+            return
+        _return_code, _recycle = 0, False
+        try:
+            _job = runner.get_job_from_cli_run_arg(job=_job_id)
+            if not _job.os_env_vars.IS_LOCAL_JOB:
+                _job.os_env_vars.IS_LOCAL_JOB = True
+            with richy.StatusPanel(
+                tc_log=_LOGGER,
+                title=f"Running on worker {os.getpid()}",
+                sub_title=[_job.short_name],
+                log_task_progress_after=10*60,
+            ) as _rp:
+                _job.run_on_worker(_rp=_rp)
+        except Exception:
+            # note that run_on_worker has already logged exception and
+            # created failed tag
+            _return_code = 1
+        except BaseException:
+            # SystemExit/KeyboardInterrupt raised by job skip cleanup done by
+            # run_on_worker so the job did not finish and worker is replaced
+            _return_code, _recycle = 1, True
+        _num_jobs += 1
+        _growth_in_mb = (_process.memory_info().rss - _baseline_rss) / (1024 * 1024)
+        _recycle = _recycle or _num_jobs >= max_jobs or _growth_in_mb > max_memory_growth_in_mb
+        conn.send((_return_code, _recycle))
+        if _recycle:
+            return
+
+
+class WorkerPool:
+
+    def __init__(self, runner: "Runner", num_workers: int, exits: queue.Queue):
+        self.runner = runner
+        self.num_workers = num_workers
+        self.exits = exits
+        self._jobs = queue.Queue()  # type: queue.Queue[t.Optional[str]]
+        self._context = multiprocessing.get_context()
+        self._threads = [
+            threading.Thread(target=self._serve, daemon=True) for _ in range(num_workers)
+        ]
+        for _thread in self._threads:
+            _thread.start()
+
+    def submit(self, job_id: str):
+        self._jobs.put(job_id)
+
+    def close(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for _thread in self._threads:
+            _thread.join()
+
+    def _start_worker(self) -> t.Tuple[multiprocessing.Process, multiprocessing.connection.Connection]:
+        _conn, _child_conn = self._context.Pipe()
+        _process = self._context.Process(
+            target=_worker_main,
+            args=(
+                self.runner, _child_conn, Settings.JOB_WORKER_MAX_JOBS,
+                Settings.JOB_WORKER_MAX_MEMORY_GROWTH_IN_MB,
+            ),
+            daemon=True,
+        )
+        _process.start()
+        _child_conn.close()
+        _LOGGER.info(msg=f"Started job worker process {_process.pid}")
+        return _process, _conn
+
+    def _serve(self):
+        _process, _conn = None, None
+        while True:
+            # -------------------------------------------------------- 01
+            # wait for job ... worker is started lazily
+            _job_id = self._jobs.get()
+            if _job_id is None:
+                if _process is not None:
+                    _conn.send(None)
+                    _process.join()
+                return
+            if _process is not None and not _process.is_alive():
+                _conn.close()
+                _process, _conn = None, None
+            if _process is None:
+                _process, _conn = self._start_worker()
+
+            # -------------------------------------------------------- 02
+            # dispatch and wait for result or for worker to die
+            _conn.send(_job_id)
+            multiprocessing.connection.wait([_conn, _process.sentinel])
+            try:
+                _return_code, _recycle = _conn.recv()
+            except (EOFError, ConnectionError):
+                # worker died mid job so job has failed even if exit code is 0
+                _process.join()
+                _return_code, _recycle = _process.exitcode or 1, True
+                _LOGGER.error(
+                    msg=f"Job worker process {_process.pid} died with exit code "
+                        f"{_return_code} while running job {_job_id}")
+
+            # -------------------------------------------------------- 03
+            # recycle
+            if _recycle:
+                _process.join()
+                _conn.close()
+                _process, _conn = None, None
+            self.exits.put((_job_id, _return_code))
@@ -2,7 +2,9 @@ import abc
 import dataclasses
 import datetime
 import hashlib
+import importlib
 import inspect
+import io
 import types
 import enum
 import typing as t
@@ -77,6 +79,26 @@ NOT_PROVIDED = "__NOT_PROVIDED__"
 # META_Suffix.INFO = ".metainfo"
 
 
+# optional modules looked up by `_optional_module` (None when not installed)
+_OPTIONAL_MODULES = {}  # type: t.Dict[str, t.Optional[types.ModuleType]]
+
+
+def _optional_module(module_name: str) -> t.Optional[types.ModuleType]:
+    """
+    Import optional module only once ... note that a failed import is not
+    cached by python and retrying it for every field value (as in
+    `_tf_serialize`) searches entire sys.path
+    """
+    try:
+        return _OPTIONAL_MODULES[module_name]
+    except KeyError:
+        try:
+            _OPTIONAL_MODULES[module_name] = importlib.import_module(module_name)
+        except ImportError:
+            _OPTIONAL_MODULES[module_name] = None
+        return _OPTIONAL_MODULES[module_name]
+
+
 def _tf_serialize(_data):
     """
     Handle serialization for keras loss, optimizer and layer
@@ -91,8 +113,8 @@ def _tf_serialize(_data):
 
     # ------------------------------------------------------- 02
     # keras
-    try:
-        import keras as ke
+    ke = _optional_module("keras")
+    if ke is not None:
         if isinstance(_data, ke.losses.Loss):
             _data = ke.losses.serialize(_data)
             _data['__keras_instance__'] = "loss"
@@ -105,13 +127,11 @@ def _tf_serialize(_data):
             _data = ke.optimizers.serialize(_data)
             _data['__keras_instance__'] = "optimizer"
             return _data
-    except ImportError:
-        ...
 
     # ------------------------------------------------------- 03
     # tensorflow
-    try:
-        import tensorflow as tf
+    tf = _optional_module("tensorflow")
+    if tf is not None:
         if isinstance(_data, tf.TensorSpec):
             _data = {
                 "__tf_instance__": "spec",
@@ -120,8 +140,6 @@ def _tf_serialize(_data):
                 "name": _data.name,
             }
             return _data
-    except ImportError:
-        ...
 
     # ------------------------------------------------------- 04
     # return
@@ -171,6 +189,82 @@ def _tf_deserialize(_data):
         return _data
 
 
+def _str_bytes(_str: str) -> bytes:
+    """
+    Length prefixed utf-8 bytes so that concatenated strings stay unambiguous
+    """
+    _b = _str.encode("utf-8")
+    return b"%d:" % len(_b) + _b
+
+
+def _structural_bytes(_data) -> bytes:
+    """
+    Canonical byte encoding of values supported by HashableClass fields that is
+    used by `HashableClass.hex_hash` when `Settings.HEX_HASH_MODE` is
+    "structural".
+
+    + nested HashableClass contributes its (cached) `hex_hash` so that it is
+      never serialized again
+    + FrozenEnum contributes its tag and name
+    + dict items are sorted by encoded key (like `sort_keys=True` in yaml dump)
+    + keras/tf objects are encoded via `_tf_serialize` and anything else
+      falls back to yaml dump
+    """
+    # ------------------------------------------------------- 01
+    # builtin scalars (exact type check so that subclasses like FrozenEnum
+    # with str mixin are not treated as str)
+    _type = type(_data)
+    if _data is None:
+        return b"n;"
+    if _type is str:
+        return b"s" + _str_bytes(_data)
+    if _type is bool:
+        return b"b1;" if _data else b"b0;"
+    if _type is int:
+        return b"i%d;" % _data
+    if _type is float:
+        return b"f" + _str_bytes(repr(_data))
+
+    # ------------------------------------------------------- 02
+    # yaml repr's
+    if isinstance(_data, HashableClass):
+        return b"H" + _str_bytes(_data.yaml_tag()) + _str_bytes(_data.hex_hash)
+    if isinstance(_data, FrozenEnum):
+        # noinspection PyUnresolvedReferences
+        return b"E" + _str_bytes(_data.yaml_tag()) + _str_bytes(_data.name)
+    if isinstance(_data, YamlRepr):
+        return b"R" + _str_bytes(_data.yaml_tag()) + _structural_bytes(_data.as_dict())
+
+    # ------------------------------------------------------- 03
+    # containers
+    if isinstance(_data, dict):
+        _items = sorted(
+            (_structural_bytes(_k), _structural_bytes(_v)) for _k, _v in _data.items()
+        )
+        return b"d%d:" % len(_items) + b"".join(_k + _v for _k, _v in _items)
+    if isinstance(_data, list):
+        return b"l%d:" % len(_data) + b"".join(_structural_bytes(_) for _ in _data)
+    if isinstance(_data, tuple):
+        return b"u%d:" % len(_data) + b"".join(_structural_bytes(_) for _ in _data)
+
+    # ------------------------------------------------------- 04
+    # other supported objects
+    if isinstance(_data, slice):
+        return b"S" + _structural_bytes((_data.start, _data.stop, _data.step))
+    if isinstance(_data, datetime.datetime):
+        return b"t" + _str_bytes(_data.isoformat())
+    if getattr(_data, "ndim", None) == 0 and hasattr(_data, "dtype"):
+        # numpy scalars
+        return b"N" + _str_bytes(_data.dtype.str) + _str_bytes(repr(_data.item()))
+
+    # ------------------------------------------------------- 05
+    # keras and tf objects else fallback to yaml
+    _serialized = _tf_serialize(_data)
+    if _serialized is not _data:
+        return b"K" + _structural_bytes(_serialized)
+    return b"Y" + _str_bytes(YamlDumper.dump(_data))
+
+
 class _ReadOnlyClass(type):
     def __setattr__(self, key, value):
         raise e.code.NotAllowed(notes=[
@@ -633,6 +727,7 @@ class RuleChecker:
             # anything and we can continue
             _allowed_types = (
                 property,
+                util.CachedProperty,
                 types.FunctionType,
                 types.MethodType,
                 util.HookUp,
@@ -993,6 +1088,9 @@ class Checker:
         # call super
         super().__init_subclass__(**kwargs)
 
+        # cached properties are replaced by value on first access
+        util.replace_cached_properties(cls)
+
         # call class_init
         cls.class_init()
 
@@ -1325,10 +1423,17 @@ class YamlDumper(yaml.Dumper):
     def dump(cls, item) -> str:
         """
         The method that dumps with specific yaml config for toolcraft
+
+        Uses libyaml based `YamlCDumper` when
+        `Settings.YAML_USE_LIBYAML_DUMPER` is set and libyaml is available
         """
+        from .settings import Settings
+        _dumper = YamlDumper
+        if Settings.YAML_USE_LIBYAML_DUMPER and YamlCDumper is not None:
+            _dumper = YamlCDumper
         return yaml.dump(
             item,
-            Dumper=YamlDumper,
+            Dumper=_dumper,
             sort_keys=True,
             default_flow_style=False,
         )
@@ -1353,14 +1458,17 @@ class YamlLoader(yaml.UnsafeLoader):
 
     @staticmethod
     def load(cls, file_or_text: t.Union[UPath, str], **kwargs) -> t.Union[dict, TYamlRepr]:
-        from . import storage
+        from .settings import Settings
         # get text
         _text = file_or_text
         if isinstance(file_or_text, UPath):
             _text = file_or_text.read_text()
 
-        # load with Loader
-        _loader = YamlLoader(stream=_text, extra_kwargs=kwargs)
+        # load with Loader ... libyaml based parser if available
+        if Settings.YAML_USE_LIBYAML_LOADER and YamlCLoader is not None:
+            _loader = YamlCLoader(stream=_text, extra_kwargs=kwargs)
+        else:
+            _loader = YamlLoader(stream=_text, extra_kwargs=kwargs)
         try:
             _instance = _loader.get_single_data()
         finally:
@@ -1382,6 +1490,348 @@ class YamlLoader(yaml.UnsafeLoader):
         return _instance
 
 
+# libyaml (C) based counterparts of YamlDumper and YamlLoader ... note that
+# representers and constructors are registered for both in
+# `YamlRepr.class_init`
+if yaml.__with_libyaml__:
+    class YamlCDumper(yaml.CDumper):
+
+        def ignore_aliases(self, data):
+            return True
+
+    class YamlCLoader(yaml.CUnsafeLoader):
+
+        def __init__(self, stream, extra_kwargs):
+            self.extra_kwargs = extra_kwargs
+            super().__init__(stream=stream)
+else:
+    YamlCDumper = None
+    YamlCLoader = None
+
+
+class YamlBinary:
+    """
+    Compact binary encoding of the yaml node graph that YamlDumper builds.
+
+    We use the same representers to build nodes and the same constructors to
+    load them, so anything that can go to yaml can go to binary and back.
+    `to_yaml` emits exactly the text that `YamlDumper.dump` would have
+    emitted for the item.
+
+    Layout (all integers are unsigned LEB128 varints):
+    + MAGIC
+    + number of tags followed by length prefixed utf-8 tags ... standard tags
+      are stored in short form i.e. `!!str` instead of `tag:yaml.org,2002:str`
+    + nodes in depth first order where each node is a header byte
+      (kind | style << 2 | encoding << 5) and tag index followed by
+      + for sequences and mappings number of items and then child nodes
+        (key, value pairs for mappings)
+      + for scalars the value as per encoding
+        + TEXT: length prefixed utf-8
+        + REF: index of an earlier TEXT scalar with same value (repeated keys,
+          enum values, paths ...)
+        + INT: zigzag encoded `!!int` that is in canonical form
+        + SECONDS/MICROSECONDS: zigzag encoded offset from epoch for naive
+          `!!timestamp` in the form written by `datetime.isoformat(" ")`
+    + scalars that will not give back the exact text are stored as TEXT so
+      `to_yaml` stays exact
+
+    Note: msgpack like formats cannot carry yaml tags and scalar styles so we
+      use this instead and avoid the extra dependency
+    """
+
+    MAGIC = b"\x89TCY2\n"
+    _TAG_PREFIX = "tag:yaml.org,2002:"
+    _INT_TAG = "tag:yaml.org,2002:int"
+    _TIMESTAMP_TAG = "tag:yaml.org,2002:timestamp"
+    _EPOCH = datetime.datetime(1970, 1, 1)
+    _SCALAR, _SEQUENCE, _MAPPING = 0, 1, 2
+    _TEXT, _REF, _INT, _SECONDS, _MICROSECONDS = 0, 1, 2, 3, 4
+    _STYLES = [None, "", "'", '"', "|", ">"]
+    _FLOW_STYLES = [None, False, True]
+
+    @staticmethod
+    def _write_uint(buffer: bytearray, value: int):
+        while value > 0x7f:
+            buffer.append((value & 0x7f) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    @staticmethod
+    def _read_uint(data: bytes, offset: int) -> t.Tuple[int, int]:
+        _ret, _shift = 0, 0
+        while True:
+            _byte = data[offset]
+            offset += 1
+            _ret |= (_byte & 0x7f) << _shift
+            if _byte < 0x80:
+                return _ret, offset
+            _shift += 7
+
+    @classmethod
+    def _encode_number(cls, node: yaml.ScalarNode) -> t.Optional[t.Tuple[int, int]]:
+        """
+        Returns (encoding, zigzag encoded value) when scalar can be stored as
+        number and decoded back to exactly same text
+        """
+        if node.tag == cls._INT_TAG:
+            try:
+                _value = int(node.value)
+            except ValueError:
+                return None
+            if str(_value) != node.value:
+                return None
+            _encoding = cls._INT
+        elif node.tag == cls._TIMESTAMP_TAG:
+            try:
+                _dt = datetime.datetime.fromisoformat(node.value)
+            except ValueError:
+                return None
+            if _dt.tzinfo is not None or _dt.isoformat(" ") != node.value:
+                return None
+            if _dt.microsecond == 0:
+                _value = (_dt - cls._EPOCH) // datetime.timedelta(seconds=1)
+                _encoding = cls._SECONDS
+            else:
+                _value = (_dt - cls._EPOCH) // datetime.timedelta(microseconds=1)
+                _encoding = cls._MICROSECONDS
+        else:
+            return None
+        return _encoding, (_value << 1) if _value >= 0 else ((-_value << 1) - 1)
+
+    @classmethod
+    def _decode_number(cls, encoding: int, value: int) -> t.Union[int, datetime.datetime]:
+        _value = (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        if encoding == cls._INT:
+            return _value
+        if encoding == cls._SECONDS:
+            return cls._EPOCH + datetime.timedelta(seconds=_value)
+        if encoding == cls._MICROSECONDS:
+            return cls._EPOCH + datetime.timedelta(microseconds=_value)
+        raise e.code.CodingError(notes=[
+            f"Unknown scalar encoding {encoding}"
+        ])
+
+    @classmethod
+    def is_binary(cls, data: bytes) -> bool:
+        return data[:len(cls.MAGIC)] == cls.MAGIC
+
+    @classmethod
+    def dump(cls, item) -> bytes:
+        # ------------------------------------------------------- 01
+        # represent item to nodes with same config as `YamlDumper.dump`
+        _dumper = YamlDumper(
+            stream=None, sort_keys=True, default_flow_style=False)
+        try:
+            _node = _dumper.represent_data(item)
+        finally:
+            _dumper.dispose()
+
+        # ------------------------------------------------------- 02
+        # encode nodes
+        _tags = {}  # type: t.Dict[str, int]
+        _strings = {}  # type: t.Dict[str, int]
+        _body = bytearray()
+        _write_uint = cls._write_uint
+        _styles = {_s: _i for _i, _s in enumerate(cls._STYLES)}
+        _flow_styles = {_s: _i for _i, _s in enumerate(cls._FLOW_STYLES)}
+        _stack = [_node]
+        while _stack:
+            _n = _stack.pop()
+            _tag_index = _tags.setdefault(_n.tag, len(_tags))
+            if isinstance(_n, yaml.ScalarNode):
+                _number = cls._encode_number(_n)
+                if _number is not None:
+                    _encoding, _value = _number
+                elif _n.value in _strings:
+                    _encoding, _value = cls._REF, _strings[_n.value]
+                else:
+                    _encoding, _value = cls._TEXT, _n.value.encode("utf-8")
+                    _strings[_n.value] = len(_strings)
+                _body.append(cls._SCALAR | _styles[_n.style] << 2 | _encoding << 5)
+                _write_uint(_body, _tag_index)
+                if _encoding == cls._TEXT:
+                    _write_uint(_body, len(_value))
+                    _body += _value
+                else:
+                    _write_uint(_body, _value)
+            elif isinstance(_n, yaml.SequenceNode):
+                _body.append(cls._SEQUENCE | _flow_styles[_n.flow_style] << 2)
+                _write_uint(_body, _tag_index)
+                _write_uint(_body, len(_n.value))
+                _stack.extend(reversed(_n.value))
+            elif isinstance(_n, yaml.MappingNode):
+                _body.append(cls._MAPPING | _flow_styles[_n.flow_style] << 2)
+                _write_uint(_body, _tag_index)
+                _write_uint(_body, len(_n.value))
+                for _k, _v in reversed(_n.value):
+                    _stack.append(_v)
+                    _stack.append(_k)
+            else:
+                raise e.code.CodingError(notes=[
+                    f"Unknown yaml node type {type(_n)}"
+                ])
+
+        # ------------------------------------------------------- 03
+        # header with tags
+        _header = bytearray(cls.MAGIC)
+        _write_uint(_header, len(_tags))
+        for _tag in _tags.keys():
+            if _tag.startswith(cls._TAG_PREFIX):
+                _tag = "!!" + _tag[len(cls._TAG_PREFIX):]
+            _tag = _tag.encode("utf-8")
+            _write_uint(_header, len(_tag))
+            _header += _tag
+
+        # ------------------------------------------------------- 04
+        # return
+        return bytes(_header + _body)
+
+    @classmethod
+    def node(cls, data: bytes) -> yaml.Node:
+        """
+        Decode bytes written by `dump` to yaml node graph
+        """
+        return cls._decode(data, with_text=True)[0]
+
+    @classmethod
+    def _decode(
+        cls, data: bytes, with_text: bool,
+    ) -> t.Tuple[yaml.Node, t.Dict[yaml.Node, t.Any]]:
+        """
+        Returns root node and values of scalars stored as numbers ... loader
+        uses these values as is so when `with_text` is False we skip making
+        text for such scalars
+        """
+        # ------------------------------------------------------- 01
+        # check
+        if not cls.is_binary(data):
+            raise e.validation.NotAllowed(notes=[
+                "The data does not start with expected magic bytes ...",
+                f"Found {data[:len(cls.MAGIC)]!r}",
+            ])
+
+        # ------------------------------------------------------- 02
+        # read tags
+        _read_uint = cls._read_uint
+        _num_tags, _offset = _read_uint(data, len(cls.MAGIC))
+        _tags = []
+        for _ in range(_num_tags):
+            _len, _offset = _read_uint(data, _offset)
+            _tag = data[_offset:_offset + _len].decode("utf-8")
+            if _tag.startswith("!!"):
+                _tag = cls._TAG_PREFIX + _tag[2:]
+            _tags.append(_tag)
+            _offset += _len
+
+        # ------------------------------------------------------- 03
+        # read nodes ... each stack entry is (children, num_children_to_read)
+        _strings = []  # type: t.List[str]
+        _numbers = {}  # type: t.Dict[yaml.Node, t.Any]
+        _root = []
+        _stack = [(_root, 1)]
+        while _stack:
+            _children, _remaining = _stack[-1]
+            if len(_children) == _remaining:
+                _stack.pop()
+                continue
+            _header = data[_offset]
+            _kind, _style, _encoding = _header & 0b11, (_header >> 2) & 0b111, _header >> 5
+            _tag_index, _offset = _read_uint(data, _offset + 1)
+            _value, _offset = _read_uint(data, _offset)
+            if _kind == cls._SCALAR:
+                if _encoding == cls._TEXT:
+                    _text = data[_offset:_offset + _value].decode("utf-8")
+                    _strings.append(_text)
+                    _offset += _value
+                elif _encoding == cls._REF:
+                    _text = _strings[_value]
+                else:
+                    _number = cls._decode_number(_encoding, _value)
+                    if not with_text:
+                        _text = ""
+                    elif _encoding == cls._INT:
+                        _text = str(_number)
+                    else:
+                        _text = _number.isoformat(" ")
+                _n = yaml.ScalarNode(_tags[_tag_index], _text, style=cls._STYLES[_style])
+                _children.append(_n)
+                if _encoding > cls._REF:
+                    _numbers[_n] = _number
+            elif _kind == cls._SEQUENCE:
+                _n = yaml.SequenceNode(
+                    _tags[_tag_index], [], flow_style=cls._FLOW_STYLES[_style])
+                _children.append(_n)
+                _stack.append((_n.value, _value))
+            elif _kind == cls._MAPPING:
+                _n = yaml.MappingNode(
+                    _tags[_tag_index], [], flow_style=cls._FLOW_STYLES[_style])
+                _children.append(_n)
+                # keys and values are read flat and paired later
+                _stack.append((_n.value, 2 * _value))
+            else:
+                raise e.code.CodingError(notes=[
+                    f"Unknown node kind {_kind} at offset {_offset}"
+                ])
+
+        # ------------------------------------------------------- 04
+        # pair up flat keys and values of mappings
+        _to_visit = list(_root)
+        while _to_visit:
+            _n = _to_visit.pop()
+            if isinstance(_n, yaml.MappingNode):
+                _flat = _n.value
+                _n.value = list(zip(_flat[0::2], _flat[1::2]))
+                _to_visit.extend(_flat)
+            elif isinstance(_n, yaml.SequenceNode):
+                _to_visit.extend(_n.value)
+
+        # ------------------------------------------------------- 05
+        # return
+        return _root[0], _numbers
+
+    @classmethod
+    def load(cls, data: bytes, expected_cls: t.Type = None, **kwargs) -> t.Union[dict, TYamlRepr]:
+        """
+        Construct item from bytes with constructors used by YamlLoader
+
+        Args:
+            data: bytes written by `dump`
+            expected_cls: if provided we check that loaded item is of that class
+            kwargs: extra_kwargs as used by YamlLoader
+        """
+        _node, _numbers = cls._decode(data, with_text=False)
+        _loader = YamlLoader(stream="", extra_kwargs=kwargs)
+        # scalars stored as numbers are already constructed
+        _loader.constructed_objects.update(_numbers)
+        try:
+            _instance = _loader.construct_document(_node)
+        finally:
+            _loader.dispose()
+        if expected_cls is not None and _instance.__class__ != expected_cls:
+            raise e.code.CodingError(notes=[
+                f"We expect binary data is for correct class ",
+                {"expected": expected_cls, "found": _instance.__class__},
+            ])
+        return _instance
+
+    @classmethod
+    def to_yaml(cls, data: bytes) -> str:
+        """
+        Yaml text for bytes written by `dump` (same as `YamlDumper.dump`)
+        """
+        _stream = io.StringIO()
+        _dumper = YamlDumper(
+            stream=_stream, sort_keys=True, default_flow_style=False)
+        try:
+            _dumper.open()
+            _dumper.serialize(cls.node(data))
+            _dumper.close()
+        finally:
+            _dumper.dispose()
+        return _stream.getvalue()
+
+
 @RuleChecker(
     things_not_to_be_overridden=['yaml'],
 )
@@ -1418,6 +1868,12 @@ class YamlRepr(Tracker):
             yaml.add_representer(cls, cls._yaml_representer, Dumper=YamlDumper)
             # noinspection PyTypeChecker
             yaml.add_constructor(cls.yaml_tag(), cls._yaml_constructor)
+            # ... same for libyaml based dumper and loader
+            if YamlCDumper is not None:
+                yaml.add_representer(cls, cls._yaml_representer, Dumper=YamlCDumper)
+                # noinspection PyTypeChecker
+                yaml.add_constructor(
+                    cls.yaml_tag(), cls._yaml_constructor, Loader=YamlCLoader)
 
             # save the map for tags and see if there is repetition
             _yaml_tag = cls.yaml_tag()
@@ -1939,8 +2395,28 @@ class HashableClass(YamlRepr, abc.ABC):
         #   so that dataclass based hash can be generated
         # todo: find dataclass based alternative (explore dataclass generated
         #  __repr__ and __hash__ dunder methods)
-        # return
-        return hashlib.md5(f"{self.yaml()}".encode("utf-8")).hexdigest()
+        from .settings import Settings
+
+        # ---------------------------------------------------------- 01
+        # md5 of yaml ... compatible with hashes of existing folders on disk
+        if Settings.HEX_HASH_MODE == "yaml":
+            return hashlib.md5(f"{self.yaml()}".encode("utf-8")).hexdigest()
+
+        # ---------------------------------------------------------- 02
+        # structural hash over canonical encoding of `as_dict()` ... nested
+        # hashables contribute their own cached hex_hash
+        if Settings.HEX_HASH_MODE == "structural":
+            return hashlib.md5(
+                b"H" + _str_bytes(self.yaml_tag()) + _structural_bytes(self.as_dict())
+            ).hexdigest()
+
+        # ---------------------------------------------------------- 03
+        raise e.code.CodingError(
+            notes=[
+                f"Unknown Settings.HEX_HASH_MODE {Settings.HEX_HASH_MODE!r}",
+                "Supported modes are 'yaml' and 'structural'",
+            ]
+        )
 
     # noinspection PyPropertyDefinition,PyTypeChecker
     # @property
@@ -35,6 +35,16 @@ class Settings:
     # todo: adapt code based on OS platform
     FILE_SYSTEMS_PATH_LENGTH = 260 - 60
 
+    # opt-in local read-through cache (see `storage.fs.LocalCache`) for files
+    # read from file systems in FILE_SYSTEMS ... key is name of file system and
+    # value is max size of cache in MB (cache dir under TC_HOME/fs_cache is
+    # keyed on url of file system so changing size keeps using same dir)
+    FS_LOCAL_CACHE_SIZE_IN_MB = {}  # type: t.Dict[str, float]
+
+    # max number of UPath's kept for reuse when listing folders (see
+    # `storage.fs.child_upaths`) ... set to 0 to disable interning
+    UPATH_INTERN_MAX_SIZE = 200000
+
 
     # time interval between to check hashes on disk
     # note that this is a list ... any one of the values in list will be picked
@@ -45,6 +55,139 @@ class Settings:
     CHECK_INTERVALS_IN_SEC = list(np.arange(CHECK_MIN_HOURS, CHECK_MAX_HOURS, 3) * 60 * 60)
     # CHECK_INTERVALS_IN_SEC = [1]
 
+    # settings for hashing files in FileGroup (see `FileGroup.do_hash_check`)
+    # + read buffer size used while hashing ... note that hashlib releases GIL for
+    #   large buffers so bigger buffers keep all worker threads busy
+    # + number of file keys hashed in parallel (use 0 for `os.cpu_count()`)
+    # + min interval between two progress updates while hashing
+    # + skip rehashing files with unchanged stat signature (size, mtime, inode)
+    #   by using hashes stored in `*.hash_cache` file next to `*.config` file
+    HASH_CHUNK_SIZE_IN_MB = 8
+    HASH_MAX_WORKERS = 0
+    HASH_PROGRESS_INTERVAL_IN_SEC = 0.5
+    HASH_USE_CACHE = True
+
+    # settings for downloading files in DownloadFileGroup (see
+    # `DownloadFileGroup.create`)
+    # + number of files downloaded in parallel (also the connection pool size)
+    # + size of chunks streamed from server
+    # + min interval between two progress updates while downloading
+    DOWNLOAD_MAX_WORKERS = 8
+    DOWNLOAD_CHUNK_SIZE_IN_MB = 1
+    DOWNLOAD_PROGRESS_INTERVAL_IN_SEC = 0.5
+
+    # settings for walking over StorageHashable's in a folder (see
+    # `StorageHashable.walk`)
+    # + number of `*.info` files fetched together (one `fs.cat_ranges` call
+    #   which fetches concurrently on async file systems like gcs)
+    # + number of threads building instances from fetched `*.info` files
+    #   (use 0 for `os.cpu_count()`)
+    WALK_BATCH_SIZE = 256
+    WALK_MAX_WORKERS = 0
+
+    # settings for launching jobs of `job.Flow` on local machine (see
+    # `job.scheduler.LocalScheduler`)
+    # + interval at which tags are checked for jobs whose process cannot be
+    #   waited on (e.g. launched in new terminal) ... exit of child processes
+    #   wakes up scheduler immediately
+    # + no new job is admitted while memory usage is above this
+    JOB_SCHEDULER_POLL_INTERVAL_IN_SEC = 2.
+    JOB_SCHEDULER_MAX_MEMORY_USAGE_IN_PERCENT = 95.
+
+    # settings for warm worker processes that run jobs launched with
+    # `launch local --workers N` (see `job.worker_pool.WorkerPool`)
+    # + worker is replaced after running these many jobs
+    # + worker is replaced when its memory grows by more than this since it
+    #   was started
+    JOB_WORKER_MAX_JOBS = 100
+    JOB_WORKER_MAX_MEMORY_GROWTH_IN_MB = 1024
+
+    # settings for measured footprints (peak RSS, cpu time, wall time) of
+    # finished jobs (see `job.footprint`)
+    # + keep history in sqlite database at JOB_FOOTPRINT_DB_PATH (defaults to
+    #   TC_HOME/job_footprints.db) and use it to reserve cpus and memory for
+    #   jobs launched locally that do not request them explicitly
+    # + interval at which RSS of job is sampled
+    # + number of recent footprints kept per experiment class and method
+    # + margin added to peak RSS when reserving memory
+    # + while a job with no history is running do not launch other jobs with
+    #   same experiment class and method (so that its footprint is known) ...
+    #   off by default as with empty history jobs of one method then run one
+    #   at a time ... when off such jobs are admitted after warm up time if
+    #   live memory usage allows (like before history was kept)
+    JOB_FOOTPRINT_HISTORY = True
+    JOB_FOOTPRINT_DB_PATH = None  # type: t.Optional[pathlib.Path]
+    JOB_FOOTPRINT_SAMPLE_INTERVAL_IN_SEC = 0.5
+    JOB_FOOTPRINT_HISTORY_SIZE = 20
+    JOB_FOOTPRINT_MEMORY_MARGIN_IN_PERCENT = 10.
+    JOB_FOOTPRINT_PROBE_UNKNOWN = False
+
+    # settings for submitting jobs to LSF with `launch lsf` (see
+    # `job.lsf.LsfSubmitter`)
+    # + bsub executable (point it to a fake script to test without LSF)
+    # + max jobs in one job array (keep it <= MAX_JOB_ARRAY_SIZE of cluster)
+    # + number of bsub calls run in parallel and max bsub calls per second
+    LSF_BSUB_COMMAND = "bsub"
+    LSF_MAX_ARRAY_SIZE = 1000
+    LSF_SUBMIT_MAX_WORKERS = 4
+    LSF_SUBMIT_MAX_PER_SEC = 5.
+
+    # where tags of jobs (launched, started, running, finished, failed ...)
+    # are kept (see `job.state_index`)
+    # + "tags": one yaml file per tag in `tags` folder of every job
+    # + "index": sqlite database `job_state.db` in results dir of runner with
+    #   snapshot of tags and append-only event log of transitions
+    # + also write tag files with "index" backend (they are never read)
+    # + sqlite journal mode for "index" ... keep "DELETE" when results dir is
+    #   on network file system as "WAL" needs shared memory
+    JOB_STATE_BACKEND = "tags"  # type: t.Literal["tags", "index"]
+    JOB_STATE_MIRROR_TAGS = True
+    JOB_STATE_JOURNAL_MODE = "DELETE"
+
+    # settings for compacting small files written by `storage.Table.append`
+    # (see `Table.compact`)
+    # + files smaller than this are merged
+    # + max rows per merged file (0 means no limit) and per row group
+    # + when a partition dir has at least these many files append triggers
+    #   compaction of that partition (0 means no auto compaction)
+    TABLE_COMPACT_SMALL_FILE_SIZE_IN_MB = 16
+    TABLE_COMPACT_MAX_ROWS_PER_FILE = 0
+    TABLE_COMPACT_MAX_ROWS_PER_GROUP = 1024 * 1024
+    TABLE_AUTO_COMPACT_MIN_FILES = 0
+
+    # how `HashableClass.hex_hash` is computed
+    # + "yaml": md5 of `yaml()` ... reproduces hashes of existing folders on disk
+    # + "structural": md5 over canonical encoding of `as_dict()` that reuses
+    #   cached `hex_hash` of nested hashables (no yaml dump) ... note that hashes
+    #   differ from "yaml" mode so do not switch for existing results folders
+    HEX_HASH_MODE = "yaml"  # type: t.Literal["yaml", "structural"]
+
+    # yaml backends (see `marshalling.YamlDumper` and `marshalling.YamlLoader`)
+    # + use libyaml based loader when available (parsing is done in C) ... opt-in
+    #   so that default behaviour for existing users does not change
+    # + use libyaml based dumper when available ... opt-in as `hex_hash` in
+    #   "yaml" mode and `*.info` files on disk depend on the dumped text
+    # + write `*.config` files in binary format (see
+    #   `marshalling.YamlBinary`) ... both formats are readable irrespective
+    #   of this setting
+    YAML_USE_LIBYAML_LOADER = False
+    YAML_USE_LIBYAML_DUMPER = False
+    CONFIG_USE_BINARY_FORMAT = False
+
+    # when > 0 updates to `*.config` files within this window are coalesced
+    # into a single write (see `storage.state.Config.request_sync`) ... useful
+    # for object stores like gcs where every write is a full object upload
+    CONFIG_SYNC_DEBOUNCE_IN_SEC = 0.
+
+    # where fields of `*.config` files are kept (see `storage.config_store`)
+    # + "file": only in yaml files next to `*.info` files
+    # + "sqlite": in sqlite database (WAL mode) at CONFIG_DB_PATH (defaults to
+    #   TC_HOME/config_store.db) so that many processes on a machine can
+    #   update them concurrently ... yaml files are written through on every
+    #   sync (i.e. on `Config.batch` exit or debounced flush)
+    CONFIG_BACKEND = "file"  # type: t.Literal["file", "sqlite"]
+    CONFIG_DB_PATH = None  # type: t.Optional[pathlib.Path]
+
     # when you want to debug if auto_hashing feature creates same files in
     # consecutive runs
     DEBUG_HASHABLE_STATE = False
@@ -6,6 +6,9 @@ These are special hashables whose state can be serialized on disk.
 import typing as t
 import datetime
 import dataclasses
+import hashlib
+import os
+import concurrent.futures
 from fsspec import AbstractFileSystem
 from upath import UPath
 import abc
@@ -14,6 +17,7 @@ _now = datetime.datetime.now
 from .. import util, logger
 from .. import marshalling as m
 from .. import error as e
+from . import fs
 
 # noinspection PyUnreachableCode
 if False:
@@ -26,6 +30,37 @@ _DOT_DOT_TYPE = t.Literal['..']
 _DOT_DOT = _DOT_DOT_TYPE.__args__[0]
 
 
+@dataclasses.dataclass
+class WalkItem:
+    """
+    Lightweight descriptor of StorageHashable found on disk by
+    `StorageHashable.walk(only_names=True)` ... the instance is built from
+    already fetched `*.info` text only when `hashable` is accessed
+    """
+    name: str
+    hashable_cls: t.Type["StorageHashable"]
+    info_text: str
+    parent_folder: "StorageHashable"
+    _hashable: t.Optional["StorageHashable"] = dataclasses.field(
+        default=None, init=False, repr=False)
+
+    @property
+    def hex_hash(self) -> str:
+        from .. import Settings
+        # `*.info` file is yaml of the hashable so no need to build it
+        if Settings.HEX_HASH_MODE == "yaml":
+            return hashlib.md5(self.info_text.encode("utf-8")).hexdigest()
+        return self.hashable.hex_hash
+
+    @property
+    def hashable(self) -> "StorageHashable":
+        if self._hashable is None:
+            # noinspection PyTypeChecker
+            self._hashable = self.hashable_cls.from_yaml(
+                self.info_text, parent_folder=self.parent_folder)
+        return self._hashable
+
+
 @dataclasses.dataclass(frozen=True)
 @m.RuleChecker(
     things_to_be_cached=[
@@ -75,13 +110,28 @@ class StorageHashable(m.HashableClass, abc.ABC):
         # ------------------------------------------------------------- 03
         # note that we allow separators in name so split name with seperator
         _split_strs += [self.name]
-        # build path
-        for _ in _split_strs:
-            _path /= _
+        # build path ... single join so that only one UPath is created (and it
+        # shares file system already resolved by parent path)
+        _path = _path.joinpath(*_split_strs)
 
         # return
         return _path
 
+    @property
+    @util.CacheResult
+    def local_cache(self) -> t.Optional[fs.LocalCache]:
+        """
+        Local read-through cache of the file system where this is stored ...
+        None if not enabled for the file system
+        """
+        if self.uses_parent_folder:
+            return self.parent_folder.local_cache
+        from .. import Settings
+        return fs.get_local_cache(
+            file_system=Settings.FILE_SYSTEMS[self.file_system],
+            max_size_in_mb=Settings.FS_LOCAL_CACHE_SIZE_IN_MB.get(self.file_system, 0),
+        )
+
     @property
     @util.CacheResult
     def uses_file_system(self) -> bool:
@@ -89,7 +139,9 @@ class StorageHashable(m.HashableClass, abc.ABC):
         if not _found_file_system:
             _found_file_system = "file_system" in dir(self)
             if _found_file_system:
-                if not isinstance(getattr(self.__class__, "file_system"), property):
+                if not isinstance(
+                    getattr(self.__class__, "file_system"), (property, util.CachedProperty)
+                ):
                     raise e.code.CodingError(
                         notes=[
                             f"Was expecting `file_system` to be property in class "
@@ -105,7 +157,9 @@ class StorageHashable(m.HashableClass, abc.ABC):
         if not _found_parent_folder:
             _found_parent_folder = "parent_folder" in dir(self)
             if _found_parent_folder:
-                if not isinstance(getattr(self.__class__, "parent_folder"), property):
+                if not isinstance(
+                    getattr(self.__class__, "parent_folder"), (property, util.CachedProperty)
+                ):
                     raise e.code.CodingError(
                         notes=[
                             f"Was expecting `parent_folder` to be property in class "
@@ -357,15 +411,14 @@ class StorageHashable(m.HashableClass, abc.ABC):
         # sync to disk ... note that from here on state files will be on the
         # disc and the child methods that will call super can take over and
         # modify state files like config
+        # also set the created on ... note that config can auto sync on
+        # update to its fields so we batch it to have only one write
         self.info.sync()
-        self.config.sync()
+        with self.config.batch():
+            self.config.sync()
+            self.config.created_on = _now()
 
         # ----------------------------------------------------------- 03
-        # also sync the created on ... note that config can auto sync on
-        # update to its fields
-        self.config.created_on = _now()
-
-        # ----------------------------------------------------------- 04
         # check if property updated
         if not self.is_created:
             raise e.code.NotAllowed(
@@ -490,18 +543,16 @@ class StorageHashable(m.HashableClass, abc.ABC):
         """
         _fs = self.upath.fs
         _upath = self.upath
-        _upath_class = _upath.__class__
-        _upath_protocol = _upath.protocol
         if sub_path is not None:
             _upath /= sub_path
         _res = _fs.ls(
-            path=_upath,
+            path=_upath.path,
             detail=detail
         )
         if isinstance(_res, list):
-            return [
-                _upath_class(_, protocol=_upath_protocol) for _ in _res
-            ]
+            if detail:
+                _res = [_["name"] for _ in _res]
+            return fs.child_upaths(_upath, _res)
         # elif isinstance(_res, dict):
         #     return [
         #         UPath(
@@ -519,19 +570,16 @@ class StorageHashable(m.HashableClass, abc.ABC):
         Inspired by
         >>> AbstractFileSystem.find
         """
-        _ret = []
         _fs = self.upath.fs
         _upath = self.upath
-        _upath_class = _upath.__class__
-        _upath_protocol = _upath.protocol
         if sub_path is not None:
             _upath /= sub_path
-        for _ in _fs.find(
-            path=_upath,
-            maxdepth=maxdepth, detail=detail, withdirs=withdirs
-        ):
-            _ret.append(_upath_class(_, protocol=_upath_protocol))
-        return _ret
+        return fs.child_upaths(
+            _upath, _fs.find(
+                path=_upath.path,
+                maxdepth=maxdepth, detail=detail, withdirs=withdirs
+            )
+        )
 
     def warn_about_garbage(self):
         """
@@ -549,7 +597,9 @@ class StorageHashable(m.HashableClass, abc.ABC):
         """
         ...
 
-    def walk(self) -> t.Iterable["StorageHashable"]:
+    def walk(
+        self, only_names: bool = False
+    ) -> t.Iterable[t.Union["StorageHashable", WalkItem]]:
         """
         Note that walk will not test if other components are present or not
         On disk a StorageHashable will have two files and one folder
@@ -559,7 +609,14 @@ class StorageHashable(m.HashableClass, abc.ABC):
         [NOTE]
         This method will only look for *.info files so be aware that if other files
         are not present this can falsely yield a StorageHashable
+
+        *.info files are fetched in batches with one `fs.cat_ranges` call per batch
+        and instances are built on a thread pool (see `Settings.WALK_*`).
+        With only_names=True lightweight `WalkItem`'s (name, class, hex_hash)
+        are yielded and instances are built only when `WalkItem.hashable` is
+        accessed.
         """
+        from .. import Settings
         from .state import Suffix
 
         # -----------------------------------------------------------------01
@@ -575,15 +632,41 @@ class StorageHashable(m.HashableClass, abc.ABC):
         # The max we can do in that case is warn users that some
         # thing else is lying around in folder check method
         # warn_about_garbage.
-        for _f in self.upath.glob(pattern=f"*{Suffix.info}"):
-            _f_txt = _f.read_text()
-            # build instance
-            _cls = m.YamlRepr.get_class(_f_txt)
-            # noinspection PyTypeChecker
-            _hashable = _cls.from_yaml(_f_txt, parent_folder=self,
-            )  # type: StorageHashable
-            # yield
-            yield _hashable
+        _info_paths = sorted(
+            _info["name"] for _name, _info in fs.list_infos(self.upath).items()
+            if _name.endswith(Suffix.info) and _info["type"] == "file"
+        )
+        if not bool(_info_paths):
+            return
+
+        # -----------------------------------------------------------------02
+        # fetch and build in batches
+        _fs = self.upath.fs
+        _batch_size = max(1, Settings.WALK_BATCH_SIZE)
+        _max_workers = Settings.WALK_MAX_WORKERS or os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_max_workers
+        ) as _executor:
+            for _start in range(0, len(_info_paths), _batch_size):
+                _batch = _info_paths[_start:_start + _batch_size]
+                # Note: `cat_ranges` (unlike `cat`) does not expand glob
+                #   characters in paths and is concurrent on async file systems
+                _texts = _fs.cat_ranges(
+                    _batch, starts=None, ends=None, on_error="raise")
+                _items = []
+                for _path, _f_txt in zip(_batch, _texts):
+                    _f_txt = _f_txt.decode("utf-8")
+                    _items.append(
+                        WalkItem(
+                            name=_path.rsplit("/", 1)[-1][:-len(Suffix.info)],
+                            hashable_cls=m.YamlRepr.get_class(_f_txt),
+                            info_text=_f_txt, parent_folder=self,
+                        )
+                    )
+                if only_names:
+                    yield from _items
+                else:
+                    yield from _executor.map(lambda _: _.hashable, _items)
 
         # -----------------------------------------------------------------02
         # todo: we might not need this as we are yielding above ... delete later
@@ -22,8 +22,8 @@ todo: storage in point of view of mlflow (also see top of individual module for
 """
 
 from .fs import BaseFileSystem, LocalFileSystem, get_fs_from_toml_config
-from .__base__ import StorageHashable
-from .state import Info, Config, Suffix
+from .__base__ import StorageHashable, WalkItem
+from .state import StateFile, Info, Config, Suffix
 from .folder import Folder
 from .file_group import FileGroup, FileGroupFromPaths, USE_ALL, \
     SELECT_TYPE, FileGroupConfig
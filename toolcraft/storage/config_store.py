@@ -0,0 +1,245 @@
+"""
+Pluggable backends that keep `state.Config` fields outside the `*.config` yaml
+files so that multiple processes can update them concurrently.
+
++ Every field of a config is a row keyed by (config path, field name) with a
+  version number ... so updates are row level
++ Writes are optimistic i.e. a row is updated only if its version is the one
+  we last saw ... on conflict the field is merged with the value written by
+  other process (see `merge_field_value`)
++ The yaml file is written through i.e. every commit writes merged state of
+  all fields to the `*.config` file before the transaction is committed ...
+  so other hosts and the "file" backend never read a stale file
+
+Select backend with `Settings.CONFIG_BACKEND`. Register new backends in
+`CONFIG_STORES`.
+"""
+
+import abc
+import sqlite3
+import typing as t
+
+from .. import error as e
+from .. import marshalling as m
+from .. import util
+
+# field name -> (value, version)
+TFieldRows = t.Dict[str, t.Tuple[t.Any, int]]
+
+
+def merge_field_value(field: str, base: t.Any, ours: t.Any, theirs: t.Any) -> t.Any:
+    """
+    Three-way merge of a config field that was concurrently updated.
+
+    Args:
+        field: name of field (for error message)
+        base: value when we last read it from store
+        ours: value we want to write
+        theirs: value written meanwhile by other process
+
+    + lists: items we removed are removed from theirs and items we added are
+      appended ... if our update did not grow the list (bounded lists like
+      `accessed_on`) the result is trimmed to the longer of ours and theirs
+    + dicts: keys we added/updated/removed are applied to theirs
+    + anything else can only be merged if both sides agree
+    """
+    if ours == theirs:
+        return theirs
+    if theirs == base:
+        return ours
+    if isinstance(ours, list) and isinstance(theirs, list):
+        _base = base if isinstance(base, list) else []
+        _removed = [_ for _ in _base if _ not in ours]
+        _added = [_ for _ in ours if _ not in _base and _ not in theirs]
+        _merged = [_ for _ in theirs if _ not in _removed] + _added
+        if len(ours) <= len(_base):
+            _max_len = max(len(ours), len(theirs))
+            if len(_merged) > _max_len:
+                _merged = _merged[len(_merged) - _max_len:]
+        return _merged
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        _base = base if isinstance(base, dict) else {}
+        _merged = dict(theirs)
+        for _k, _v in ours.items():
+            if _k not in _base or _base[_k] != _v:
+                _merged[_k] = _v
+        for _k in _base.keys():
+            if _k not in ours:
+                _merged.pop(_k, None)
+        return _merged
+    raise e.code.NotAllowed(
+        notes=[
+            f"Config field `{field}` was concurrently updated by other process "
+            f"to a different value ...",
+            dict(base=base, ours=ours, theirs=theirs),
+        ]
+    )
+
+
+class ConfigStore(abc.ABC):
+    """
+    Backend that stores config fields as versioned rows keyed by config path.
+    """
+
+    @abc.abstractmethod
+    def load(self, key: str) -> TFieldRows:
+        """
+        Returns all fields stored for config `key`
+        """
+        ...
+
+    @abc.abstractmethod
+    def commit(
+        self, key: str, changes: t.Dict[str, t.Tuple[t.Any, t.Any]],
+        versions: t.Dict[str, int],
+        write_through: t.Callable[[TFieldRows], None] = None,
+    ) -> TFieldRows:
+        """
+        Atomically writes changed fields of config `key`.
+
+        Args:
+            key: config key
+            changes: field name -> (base, ours) i.e. value we last read and
+              value we want to write
+            versions: field name -> version we last read (missing if we never
+              read the field from store)
+            write_through: called with all fields of config before commit
+              completes (if it raises nothing is committed) ... used to write
+              the `*.config` file in commit order
+
+        Returns all fields of config as field name -> (value, version) after
+        commit, which can differ from ours when the field was merged or
+        updated by other process.
+        """
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def keys(self) -> t.List[str]:
+        ...
+
+
+class SqliteConfigStore(ConfigStore, util.SqliteDb):
+    """
+    SQLite database in WAL mode ... readers never block writers and row
+    updates of one config are done in single `BEGIN IMMEDIATE` transaction
+    (which also serializes the write through of `*.config` files).
+
+    Note: WAL needs shared memory so keep the database on local disk (do not
+      place it on network file systems). It is only meant for processes on
+      same machine ... which is the case for `job.Job` workers launched
+      locally or on the same LSF host.
+    """
+
+    def init_connection(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS config_fields ("
+            "key TEXT NOT NULL, field TEXT NOT NULL, value BLOB NOT NULL, "
+            "version INTEGER NOT NULL, PRIMARY KEY (key, field))"
+        )
+
+    def load(self, key: str) -> TFieldRows:
+        _rows = self.connection.execute(
+            "SELECT field, value, version FROM config_fields WHERE key = ?", (key, )
+        ).fetchall()
+        return {
+            _field: (m.YamlBinary.load(_value), _version)
+            for _field, _value, _version in _rows
+        }
+
+    def commit(
+        self, key: str, changes: t.Dict[str, t.Tuple[t.Any, t.Any]],
+        versions: t.Dict[str, int],
+        write_through: t.Callable[[TFieldRows], None] = None,
+    ) -> TFieldRows:
+        with self.transaction() as _conn:
+            for _field, (_base, _ours) in changes.items():
+                _row = _conn.execute(
+                    "SELECT value, version FROM config_fields "
+                    "WHERE key = ? AND field = ?", (key, _field)
+                ).fetchone()
+                # ------------------------------------------------ 01
+                # new row
+                if _row is None:
+                    _value, _version = _ours, 1
+                    _conn.execute(
+                        "INSERT INTO config_fields (key, field, value, version) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, _field, m.YamlBinary.dump(_value), _version)
+                    )
+                # ------------------------------------------------ 02
+                # existing row ... merge if someone updated it since we read it
+                else:
+                    _theirs_version = _row[1]
+                    if versions.get(_field, None) == _theirs_version:
+                        _value = _ours
+                    else:
+                        _value = merge_field_value(
+                            _field, _base, _ours, m.YamlBinary.load(_row[0]))
+                    _version = _theirs_version + 1
+                    _conn.execute(
+                        "UPDATE config_fields SET value = ?, version = ? "
+                        "WHERE key = ? AND field = ? AND version = ?",
+                        (m.YamlBinary.dump(_value), _version, key, _field,
+                         _theirs_version)
+                    )
+            # ---------------------------------------------------- 03
+            # all fields including the ones updated by other processes
+            _ret = {
+                _field: (m.YamlBinary.load(_value), _version)
+                for _field, _value, _version in _conn.execute(
+                    "SELECT field, value, version FROM config_fields WHERE key = ?", (key, )
+                ).fetchall()
+            }
+            if write_through is not None:
+                write_through(_ret)
+        return _ret
+
+    def delete(self, key: str):
+        self.connection.execute("DELETE FROM config_fields WHERE key = ?", (key, ))
+
+    def keys(self) -> t.List[str]:
+        return [
+            _[0] for _ in self.connection.execute(
+                "SELECT DISTINCT key FROM config_fields").fetchall()
+        ]
+
+
+# backend name -> class ... `Settings.CONFIG_BACKEND` picks one of these (or
+# "file" to keep using only the yaml files)
+CONFIG_STORES = {
+    "sqlite": SqliteConfigStore,
+}  # type: t.Dict[str, t.Type[ConfigStore]]
+_CONFIG_STORE_INSTANCES = {}  # type: t.Dict[t.Tuple[str, str], ConfigStore]
+
+
+def get_config_store() -> t.Optional[ConfigStore]:
+    """
+    Returns store configured in Settings or None for "file" backend
+    """
+    from ..settings import Settings
+    _backend = Settings.CONFIG_BACKEND
+    if _backend == "file":
+        return None
+    if _backend not in CONFIG_STORES.keys():
+        raise e.validation.NotAllowed(
+            notes=[
+                f"Unknown Settings.CONFIG_BACKEND {_backend!r}",
+                f"Use 'file' or one of {list(CONFIG_STORES.keys())}",
+            ]
+        )
+    _db_path = Settings.CONFIG_DB_PATH
+    if _db_path is None:
+        _db_path = Settings.TC_HOME / "config_store.db"
+    _db_path = str(_db_path)
+    try:
+        return _CONFIG_STORE_INSTANCES[(_backend, _db_path)]
+    except KeyError:
+        _store = CONFIG_STORES[_backend](_db_path)
+        _CONFIG_STORE_INSTANCES[(_backend, _db_path)] = _store
+        return _store
@@ -16,6 +16,7 @@ todo: in context to mlflow this will also be used as log_artifact ... where
 
 import requests
 import typing as t
+import os
 import subprocess
 import dataclasses
 import abc
@@ -26,6 +27,12 @@ import hashlib
 import zipfile
 import platform
 import random
+import itertools
+import threading
+import queue
+import collections
+import collections.abc
+import concurrent.futures
 from fsspec import AbstractFileSystem
 from upath import UPath
 
@@ -58,17 +65,280 @@ SELECT_TYPE = t.Union[
 ]
 
 
+def _get_hash_module(hash_len: int) -> t.Tuple[t.Any, str]:
+    """
+    Based on provided hash str length select hashlib module
+    """
+    # if nothing specified use 64
+    # todo: if file is too large switch to md5 ...
+    if hash_len == 0:
+        hash_len = 64
+    if hash_len == 64:
+        return hashlib.sha256(), "sha256"
+    elif hash_len == 40:
+        return hashlib.sha1(), "sha1"
+    elif hash_len == 32:
+        return hashlib.md5(), "md5"
+    else:
+        raise e.code.CodingError(
+            notes=[
+                f"Should not happen found unsupported hash length {hash_len}"
+            ]
+        )
+
+
+def _hash_file(
+    file_path: UPath, hash_module: t.Any, chunk_size: int,
+    bytes_read: t.Dict[str, int], file_key: str,
+) -> str:
+    """
+    Runs on worker thread of `FileGroup.do_hash_check`.
+
+    Note that hashlib releases GIL while digesting large buffers so multiple
+    files can be hashed in parallel with threads. The progress is only
+    recorded in `bytes_read` as richy widgets are updated from main thread.
+    """
+    _buffer = bytearray(chunk_size)
+    _view = memoryview(_buffer)
+    with file_path.open(mode='rb') as fb:
+        while True:
+            _n = fb.readinto(_buffer)
+            if not _n:
+                break
+            hash_module.update(_view[:_n])
+            bytes_read[file_key] += _n
+    return hash_module.hexdigest()
+
+
+def _download_file(
+    session: requests.Session, url: str, file_path: UPath, part_path: UPath,
+    hash_module: t.Any, chunk_size: int,
+    bytes_read: t.Dict[str, int], totals: t.Dict[str, int], file_key: str,
+) -> str:
+    """
+    Runs on worker thread of `DownloadFileGroup.create`.
+
+    + Bytes are streamed to `part_path` which is renamed to `file_path` once
+      download completes.
+    + If `part_path` is already present (i.e. an earlier download was
+      interrupted) we request only the remaining bytes with HTTP range
+      header. If server does not support ranges we download from scratch.
+    + Hash is computed while bytes stream in so that we need not read the
+      file again for hash check.
+    """
+    # ------------------------------------------------------ 01
+    # if partially downloaded hash the bytes already on disk
+    _offset = 0
+    if part_path.exists():
+        _hash_file(
+            file_path=part_path, hash_module=hash_module,
+            chunk_size=chunk_size, bytes_read=bytes_read, file_key=file_key,
+        )
+        _offset = bytes_read[file_key]
+
+    # ------------------------------------------------------ 02
+    # request ... ask for remaining bytes if resuming
+    _headers = {"Range": f"bytes={_offset}-"} if _offset > 0 else {}
+    _response = session.get(url, stream=True, headers=_headers)
+    if _offset > 0 and _response.status_code != 206:
+        # server ignored range (200) or partial file is not valid (416) ...
+        # so we download from scratch
+        _response.close()
+        _offset = 0
+        bytes_read[file_key] = 0
+        hash_module = hashlib.new(hash_module.name)
+        _response = session.get(url, stream=True)
+    with _response:
+        _response.raise_for_status()
+        # note that for encoded (e.g. gzip) content the length is not of the
+        # bytes that we write
+        _length = _response.headers.get('content-length', None)
+        if _length is not None and 'content-encoding' not in _response.headers:
+            totals[file_key] = _offset + int(_length)
+
+        # -------------------------------------------------- 03
+        # stream to disk while hashing
+        with part_path.open('ab' if _offset > 0 else 'wb') as _f:
+            for _chunk in _response.iter_content(chunk_size=chunk_size):
+                if _chunk:  # filter out keep-alive new chunks
+                    _f.write(_chunk)
+                    hash_module.update(_chunk)
+                    bytes_read[file_key] += len(_chunk)
+
+    # ------------------------------------------------------ 04
+    # validate length and move to final path
+    if file_key in totals and bytes_read[file_key] != totals[file_key]:
+        raise Exception(
+            f"incomplete download: expected {totals[file_key]} bytes but "
+            f"received {bytes_read[file_key]} bytes"
+        )
+    part_path.rename(file_path)
+    return hash_module.hexdigest()
+
+
+def _index_to_write_as_slice(index_to_write: t.Union[int, slice]) -> slice:
+    """
+    Generator elements can be a row (int `index_to_write`) or a contiguous
+    block of rows (slice `index_to_write` with stacked arrays)
+    """
+    if isinstance(index_to_write, slice):
+        if index_to_write.step not in [None, 1]:
+            raise e.code.CodingError(
+                notes=[
+                    f"Blocks yielded by generator must be contiguous i.e. "
+                    f"`index_to_write` slice cannot have step "
+                    f"{index_to_write.step}"
+                ]
+            )
+        return slice(index_to_write.start, index_to_write.stop)
+    _i = int(index_to_write)
+    return slice(_i, _i + 1)
+
+
+def _write_to_memmaps(
+    iterator: t.Iterator[t.Dict[str, t.Any]],
+    memmaps: t.Dict[str, np.memmap], batch_size: int,
+    on_rows: t.Callable[[int], None] = None,
+) -> int:
+    """
+    Writes elements yielded by generator ... elements can be rows or blocks
+    (refer `Generator`).
+
+    Elements are buffered till `batch_size` rows are collected. While
+    flushing buffer adjacent rows/blocks are coalesced so that every
+    contiguous run is written with one vectorized slice assignment. If the
+    buffer has only scattered rows we use one fancy indexing assignment.
+
+    Returns number of rows written.
+    """
+    _rows = 0
+    _buffered_rows = 0
+    # list of (slice, is_row, dict of arrays)
+    _pieces = []
+
+    def _flush_buffer():
+        _all_rows = all(_p[1] for _p in _pieces)
+        # group in contiguous runs
+        _runs = [[_pieces[0]]]
+        for _p in _pieces[1:]:
+            if _p[0].start == _runs[-1][-1][0].stop:
+                _runs[-1].append(_p)
+            else:
+                _runs.append([_p])
+        # scattered rows ... single fancy index write
+        if _all_rows and len(_runs) == len(_pieces) > 1:
+            _where = np.asarray([_p[0].start for _p in _pieces])
+            for __k in memmaps.keys():
+                memmaps[__k][_where] = np.stack([_p[2][__k] for _p in _pieces])
+        # contiguous runs ... slice write per run
+        else:
+            for _run in _runs:
+                _where = slice(_run[0][0].start, _run[-1][0].stop)
+                for __k in memmaps.keys():
+                    if len(_run) == 1:
+                        _v = _run[0][2][__k]
+                        memmaps[__k][_where] = np.asarray(_v)[None] if _run[0][1] else _v
+                    elif _all_rows:
+                        memmaps[__k][_where] = np.stack([_p[2][__k] for _p in _run])
+                    else:
+                        memmaps[__k][_where] = np.concatenate(
+                            [np.asarray(_p[2][__k])[None] if _p[1] else _p[2][__k] for _p in _run]
+                        )
+        _pieces.clear()
+
+    for _element in iterator:
+        _index_to_write = _element["index_to_write"]
+        _where = _index_to_write_as_slice(_index_to_write)
+        _pieces.append(
+            (
+                _where, not isinstance(_index_to_write, slice),
+                {_k: _element[_k] for _k in memmaps.keys()},
+            )
+        )
+        _n = _where.stop - _where.start
+        _rows += _n
+        _buffered_rows += _n
+        if _buffered_rows >= batch_size:
+            _flush_buffer()
+            if on_rows is not None:
+                on_rows(_buffered_rows)
+            _buffered_rows = 0
+    if bool(_pieces):
+        _flush_buffer()
+        if on_rows is not None:
+            on_rows(_buffered_rows)
+    return _rows
+
+
+def _save_generator_range(
+    range_gen_fn: t.Callable, start: int, stop: int,
+    files: t.Dict[str, t.Tuple[str, np.dtype, t.Tuple]], batch_size: int,
+) -> int:
+    """
+    Runs in worker process of `NpyFileGroup.save_using_generator`.
+
+    Opens already allocated memmap files and writes rows in `[start, stop)`.
+    Note that we do not flush here as all workers share the page cache ...
+    the main process does single flush once all workers are done.
+    """
+    _memmaps = {
+        _k: np.memmap(filename=_f, dtype=_d, shape=_s, mode='r+')
+        for _k, (_f, _d, _s) in files.items()
+    }
+    _rows = _write_to_memmaps(
+        iterator=range_gen_fn(start, stop), memmaps=_memmaps,
+        batch_size=batch_size,
+    )
+    del _memmaps
+    return _rows
+
+
 class Generator:
+    """
+    + gen_fn: yields dict with `index_to_write` and numpy array for every key
+      + either a row i.e. int `index_to_write` and array for that row
+      + or a block of rows i.e. slice `index_to_write` (contiguous) and
+        arrays stacked along first axis ... prefer this when rows are small
+        as writer can then do vectorized slice assignments
+    + length: number of rows that will be written
+    + meta: dict of numpy arrays that are saved as they are
+    + range_gen_fn: (optional) `range_gen_fn(start, stop)` yields only the
+      elements with `start <= index_to_write < stop` ... needed for parallel
+      writes in `NpyFileGroup.save_using_generator`. Note that it will be
+      pickled to worker processes so use module level function or
+      `functools.partial` of it.
+    """
 
-    def __init__(self, gen_fn: t.Callable, length: int, meta: t.Dict[str, t.Any] = None):
+    def __init__(
+        self, gen_fn: t.Callable, length: int, meta: t.Dict[str, t.Any] = None,
+        range_gen_fn: t.Callable[[int, int], t.Iterator[t.Dict[str, t.Any]]] = None,
+    ):
         self._length = length
         self.gen_fn = gen_fn
         self.meta = meta
+        self.range_gen_fn = range_gen_fn
         self.generator_cache = None  # type: dict
 
     def __len__(self) -> int:
         return self._length
 
+    def split(self, num_splits: int) -> t.List[t.Tuple[int, int]]:
+        """
+        Splits indices in `num_splits` contiguous index ranges `[start, stop)`
+        """
+        if self.range_gen_fn is None:
+            raise e.code.CodingError(
+                notes=[
+                    "Please supply `range_gen_fn` to Generator so that it can "
+                    "be split in index ranges"
+                ]
+            )
+        _edges = np.linspace(0, self._length, max(1, num_splits) + 1).astype(int)
+        return [
+            (int(_start), int(_stop)) for _start, _stop in zip(_edges[:-1], _edges[1:])
+            if _stop > _start
+        ]
+
 
 @dataclasses.dataclass
 class FileGroupConfig(s.Config):
@@ -138,11 +408,99 @@ class FileGroupConfig(s.Config):
                     f"checked_on list multiple times"
                 ]
             )
-        # limit the list
-        if len(self.checked_on) == self.LITERAL.checked_on_list_limit:
-            self.checked_on = self.checked_on[1:]
-        # append time
-        self.checked_on.append(_now())
+        # limit the list and append time ... written to disk only once
+        with self.batch():
+            if len(self.checked_on) == self.LITERAL.checked_on_list_limit:
+                self.checked_on = self.checked_on[1:]
+            self.checked_on.append(_now())
+
+
+@dataclasses.dataclass
+class FileGroupHashCache(s.StateFile):
+    """
+    Content hash cache saved next to *.config file.
+
+    For every file key we store the stat signature (size, mtime_ns, inode) of
+    the file along with hash computed for it. This allows
+    `FileGroup.do_hash_check` to skip re-hashing files that did not change on
+    disk since last check ...
+
+    Note that this is deliberately not part of FileGroupConfig as this is a
+    pure performance cache ... deleting it only means that next check will
+    rehash all files.
+    """
+
+    # file_key -> dict(size=..., mtime_ns=..., inode=..., hash=...)
+    entries: t.Dict[str, t.Dict[str, t.Any]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    @property
+    def suffix(self) -> str:
+        return s.Suffix.hash_cache
+
+    def __post_init__(self):
+        """
+        __post_init__ is allowed as it is not m.HashableClass
+        """
+        if self.upath.exists():
+            self.entries = m.YamlLoader.load(
+                cls=dict, file_or_text=self.upath
+            )
+
+    @staticmethod
+    def stat_signature(info: t.Dict[str, t.Any]) -> t.Optional[t.Dict[str, int]]:
+        """
+        Makes signature from `fs.info()` dict ... returns None when file
+        system does not provide modification time as then we cannot trust
+        cached hash
+        """
+        _mtime = info.get("mtime", None)
+        if not isinstance(_mtime, (int, float)):
+            return None
+        return dict(
+            size=int(info["size"]),
+            mtime_ns=int(round(_mtime * 1e9)),
+            inode=int(info.get("ino", 0) or 0),
+        )
+
+    def get(self, file_key: str, signature: t.Optional[t.Dict[str, int]], hash_len: int) -> t.Optional[str]:
+        """
+        Returns cached hash only if stat signature is unchanged and the hash
+        was computed with same hash type (i.e. same length)
+        """
+        if signature is None:
+            return None
+        _entry = self.entries.get(file_key, None)
+        if _entry is None:
+            return None
+        _hash = _entry["hash"]
+        if len(_hash) != hash_len:
+            return None
+        for _k, _v in signature.items():
+            if _entry.get(_k, None) != _v:
+                return None
+        return _hash
+
+    def set(self, file_key: str, signature: t.Optional[t.Dict[str, int]], hash_str: str):
+        if signature is None:
+            self.entries.pop(file_key, None)
+        else:
+            self.entries[file_key] = {**signature, "hash": hash_str}
+
+    def sync(self):
+        self.upath.write_text(m.YamlDumper.dump(self.entries))
+
+    def reset(self):
+        self.entries = {}
+
+    def delete(self):
+        if self.is_available:
+            super().delete()
+
+    def check_if_backup_matches(self):
+        # nothing to check as this is cache and we never backup it
+        ...
 
 
 @dataclasses.dataclass(frozen=True)
@@ -209,6 +567,13 @@ class FileGroup(StorageHashable, abc.ABC):
             hashable=self,
         )
 
+    @property
+    @util.CacheResult
+    def hash_cache(self) -> FileGroupHashCache:
+        return FileGroupHashCache(
+            hashable=self,
+        )
+
     @property
     @util.CacheResult
     def file_keys(self) -> t.List[str]:
@@ -231,9 +596,11 @@ class FileGroup(StorageHashable, abc.ABC):
         # ----------------------------------------------------------------01
         # Note that if some file_groups are missing we raise error ... either
         # all file_groups should be present or none of them should exist
-        _present_files = [
-            (self.upath / fk).exists() for fk in self.file_keys
-        ]
+        # Note that we stat all files together as on object stores every
+        # `exists()` call is one round trip
+        _present_files = list(
+            s.fs.exists_many(self.upath, self.file_keys).values()
+        )
         _all_files_in_fg_present = all(_present_files)
         _some_files_in_fg_present = any(_present_files)
 
@@ -282,18 +649,19 @@ class FileGroup(StorageHashable, abc.ABC):
                         f"We expect path to be a dir for FileGroup"
                     ]
                 )
-            # look inside path dir
-            for _upath in self.find(maxdepth=1, detail=False, withdirs=True):
-                if _upath == self.upath:
-                    continue
-                if _upath.name in self.file_keys and _upath.is_file():
+            # look inside path dir ... listing with details tells which
+            # entries are files without a round trip per entry
+            _unknown_paths = []
+            for _name, _info in s.fs.list_infos(self.upath).items():
+                if _name in self.file_keys and _info["type"] == "file":
                     continue
                 # anything starting with `_` will be ignored
                 # helpful in case you want to store results cached by `@s.dec.XYZ`
                 # which uses `stores` property
-                if _upath.name.startswith("_"):
+                if _name.startswith("_"):
                     continue
-                _unknown_upaths.append(_upath)
+                _unknown_paths.append(_info["name"])
+            _unknown_upaths = s.fs.child_upaths(self.upath, _unknown_paths)
 
         # return
         return _unknown_upaths
@@ -642,18 +1010,25 @@ class FileGroup(StorageHashable, abc.ABC):
             self.create()
             self.check()
 
-    def do_hash_check(self, compute: bool) -> t.Dict[str, str]:
+    def do_hash_check(self, compute: bool, force: bool = False) -> t.Dict[str, str]:
         """
         When compute returns computed hashes else returns failed hashes if any ...
 
         If compute is false that means that in case of auto hash the hashes will
         already be computed and be present in config file
+
+        Files whose stat signature (size, mtime_ns, inode) did not change since
+        last hash computation are not rehashed ... instead hash from
+        `self.hash_cache` is used. Use `force=True` to rehash all files.
         """
 
         # ------------------------------------------------------ 01
         # some vars
+        from .. import Settings
         _rp = self.richy_panel
-        _chunk_size = 1024 * 50
+        _chunk_size = int(Settings.HASH_CHUNK_SIZE_IN_MB * 1024 * 1024)
+        _max_workers = Settings.HASH_MAX_WORKERS or os.cpu_count() or 1
+        _max_workers = max(1, min(_max_workers, len(self.file_keys)))
         _correct_hashes = {} if compute else self.get_hashes()
         _failed_hashes = {}
         _computed_hashes = {}
@@ -661,6 +1036,9 @@ class FileGroup(StorageHashable, abc.ABC):
             fk: self.upath / fk for fk in self.file_keys
         }  # type: t.Dict[str, UPath]
         _lengths = {}
+        _signatures = {}
+        _use_cache = Settings.HASH_USE_CACHE and not force
+        _hash_cache = self.hash_cache
         # get panels ... reusing richy.Progress.for_download as the stats
         # needed are similar
         if compute:
@@ -679,68 +1057,116 @@ class FileGroup(StorageHashable, abc.ABC):
         _rp[_rp_key] = _progress
 
         # ------------------------------------------------------ 02
-        # now add tasks
+        # now add tasks ... stat all files together (see `s.fs.stat_many`)
+        _infos = s.fs.stat_many(self.upath, self.file_keys)
         for fk in self.file_keys:
-            _lengths[fk] = _file_paths[fk].stat()['size']
+            _info = _infos[fk]
+            if _info is None:
+                raise FileNotFoundError(_file_paths[fk].path)
+            _lengths[fk] = _info['size']
+            _signatures[fk] = _hash_cache.stat_signature(_info)
             _progress.add_task(
                 task_name=fk, total=_lengths[fk]
             )
 
         # ------------------------------------------------------ 03
-        # now check/compute hash
-        _for_type = "computing" if compute else "checking"
+        # use cached hashes for files that did not change on disk
+        _file_keys_to_hash = []
         for fk in self.file_keys:
-            # fetch length
-            _len = len(_correct_hashes.get(fk, ""))
-            # if nothing specified use 64
-            # todo: if file is too large switch to md5 ...
-            if _len == 0:
-                _len = 64
-            # based on provided hash str length select hashlib module
-            if _len == 64:
-                _hash_module = hashlib.sha256()
-                _hash_type = "sha256"
-            elif _len == 40:
-                _hash_module = hashlib.sha1()
-                _hash_type = "sha1"
-            elif _len == 32:
-                _hash_module = hashlib.md5()
-                _hash_type = "md5"
-            else:
-                raise e.code.CodingError(
-                    notes=[
-                        f"Should not happen found unsupported hash length {_len}"
-                    ]
+            _cached_hash = None
+            if _use_cache:
+                _cached_hash = _hash_cache.get(
+                    file_key=fk, signature=_signatures[fk],
+                    # if nothing specified sha256 is used
+                    hash_len=len(_correct_hashes.get(fk, "")) or 64,
                 )
-            # status update
-            _rp.update(f"{fk}: {_for_type} {_hash_type} hash")
-            # get task id
-            with _file_paths[fk].open(mode='rb') as fb:
-                # compute
-                for _chunk in iter(lambda: fb.read(_chunk_size), b''):
-                    _hash_module.update(_chunk)
-                    _progress.tasks[fk].update(advance=len(_chunk),)
-                    _rp.log_tasks_progress()
-                fb.close()
-                _computed_hash = _hash_module.hexdigest()
-            # make dicts to return
-            _computed_hashes[fk] = _computed_hash
-            if not compute:
-                if _computed_hash != _correct_hashes[fk]:
-                    _progress.tasks[fk].failed()
-                    _failed_hashes[fk] = {
-                        'correct': _correct_hashes[fk],
-                        'computed': _computed_hash,
-                    }
+            if _cached_hash is None:
+                _file_keys_to_hash.append(fk)
+                continue
+            _computed_hashes[fk] = _cached_hash
+            if not compute and _cached_hash != _correct_hashes[fk]:
+                _progress.tasks[fk].failed()
+                _failed_hashes[fk] = {
+                    'correct': _correct_hashes[fk],
+                    'computed': _cached_hash,
+                }
+            else:
+                _progress.tasks[fk].already_finished()
 
         # ------------------------------------------------------ 04
+        # now check/compute hash
+        # Note that multiple file keys are hashed in parallel on threads while
+        # the main thread updates progress (throttled) and collects results
+        _for_type = "computing" if compute else "checking"
+        _rp.update(
+            f"{_for_type} hash for {len(_file_keys_to_hash)} files "
+            f"with {_max_workers} workers "
+            f"({len(self.file_keys) - len(_file_keys_to_hash)} unchanged files skipped)"
+        )
+        _bytes_read = {fk: 0 for fk in _file_keys_to_hash}
+        _bytes_reported = {fk: 0 for fk in _file_keys_to_hash}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_max_workers
+        ) as _executor:
+            # ------------------------------------------------------ 04.01
+            # submit
+            _futures = {}
+            for fk in _file_keys_to_hash:
+                _hash_module, _ = _get_hash_module(
+                    len(_correct_hashes.get(fk, "")))
+                _futures[_executor.submit(
+                    _hash_file,
+                    file_path=_file_paths[fk], hash_module=_hash_module,
+                    chunk_size=_chunk_size, bytes_read=_bytes_read,
+                    file_key=fk,
+                )] = fk
+            # ------------------------------------------------------ 04.02
+            # wait for results while updating progress periodically
+            _pending = set(_futures.keys())
+            while bool(_pending):
+                _done, _pending = concurrent.futures.wait(
+                    _pending, timeout=Settings.HASH_PROGRESS_INTERVAL_IN_SEC,
+                )
+                for fk in _file_keys_to_hash:
+                    _advance = _bytes_read[fk] - _bytes_reported[fk]
+                    if _advance > 0:
+                        _progress.tasks[fk].update(advance=_advance)
+                        _bytes_reported[fk] += _advance
+                _rp.log_tasks_progress()
+                for _future in _done:
+                    fk = _futures[_future]
+                    # this will also raise any exception from worker thread
+                    _computed_hash = _future.result()
+                    # make dicts to return
+                    _computed_hashes[fk] = _computed_hash
+                    _hash_cache.set(
+                        file_key=fk, signature=_signatures[fk],
+                        hash_str=_computed_hash,
+                    )
+                    if not compute:
+                        if _computed_hash != _correct_hashes[fk]:
+                            _progress.tasks[fk].failed()
+                            _failed_hashes[fk] = {
+                                'correct': _correct_hashes[fk],
+                                'computed': _computed_hash,
+                            }
+
+        # ------------------------------------------------------ 05
+        # persist hash cache if something was hashed
+        # Note that failed hashes are also cached as the hash is of what is
+        # on disk ... so until the file changes the check will fail anyways
+        if bool(_file_keys_to_hash) and Settings.HASH_USE_CACHE:
+            _hash_cache.sync()
+
+        # ------------------------------------------------------ 06
         # now remove progress indicator to save some spaces in render panel
         del _rp[_rp_key]
 
-        # ------------------------------------------------------ 05
-        # return
+        # ------------------------------------------------------ 07
+        # return ... note that results arrive in order of completion so we
+        # restore the order of file keys
         if compute:
-            return _computed_hashes
+            return {fk: _computed_hashes[fk] for fk in self.file_keys}
         else:
             return _failed_hashes
 
@@ -789,7 +1215,8 @@ class FileGroup(StorageHashable, abc.ABC):
                 ]
             )
         # get failed hashes
-        _failed_hashes = self.do_hash_check(compute=False)
+        # Note that when forced we rehash all files ignoring hash cache
+        _failed_hashes = self.do_hash_check(compute=False, force=force)
 
         # delete state files and print failed hashes
         if bool(_failed_hashes):
@@ -1205,6 +1632,10 @@ class FileGroup(StorageHashable, abc.ABC):
                             f"with path {self.upath}"
                         ]
                     )
+
+            # -----------------------------------------------------------03.03
+            # hashes cached for deleted files are no longer useful
+            self.hash_cache.delete()
         else:
             raise e.code.ExitGracefully(
                 notes=[
@@ -1224,6 +1655,71 @@ class HFFileGroup(FileGroup, abc.ABC):
     ...
 
 
+class NpyMemoryBoundedDict(collections.abc.Mapping):
+    """
+    Read only dict of numpy arrays returned by `NpyFileGroup.load_as_dict`
+    when `memory_limit_in_gbytes` is supplied.
+
+    + All arrays are memmapped to start with
+    + On access the array is promoted (copied) in RAM if it fits in memory
+      budget ... least recently accessed arrays in RAM are demoted back to
+      memmaps to make space
+    + Arrays larger than the budget are always served as memmaps
+    + If `broadcast_length` is supplied arrays with singular length are
+      returned as zero-copy broadcast views of that length
+    """
+
+    def __init__(
+        self, npy_data: t.Dict[str, np.ndarray], memory_limit_in_bytes: int,
+        broadcast_length: int = None,
+    ):
+        self._memmaps = npy_data
+        self._memory_limit_in_bytes = memory_limit_in_bytes
+        self._broadcast_length = broadcast_length
+        self._in_ram = collections.OrderedDict()  # type: t.Dict[str, np.ndarray]
+        self._lock = threading.Lock()
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(_v.nbytes for _v in self._in_ram.values())
+
+    @property
+    def keys_in_ram(self) -> t.List[str]:
+        return list(self._in_ram.keys())
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        with self._lock:
+            # -------------------------------------------------- 01
+            # if in ram mark as recently used
+            if key in self._in_ram:
+                self._in_ram.move_to_end(key)
+                _v = self._in_ram[key]
+            # -------------------------------------------------- 02
+            # else promote in ram if it fits in budget
+            else:
+                _v = self._memmaps[key]
+                _nbytes = _v.nbytes
+                if _nbytes <= self._memory_limit_in_bytes:
+                    _used_bytes = self.used_bytes
+                    while _used_bytes + _nbytes > self._memory_limit_in_bytes:
+                        _, _evicted = self._in_ram.popitem(last=False)
+                        _used_bytes -= _evicted.nbytes
+                    _v = np.array(_v)
+                    _v.setflags(write=False)
+                    self._in_ram[key] = _v
+        # -------------------------------------------------- 03
+        # broadcast singular elements
+        if self._broadcast_length is not None and len(_v) == 1:
+            _v = np.broadcast_to(_v, (self._broadcast_length, *_v.shape[1:]))
+        return _v
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._memmaps)
+
+    def __len__(self) -> int:
+        return len(self._memmaps)
+
+
 @dataclasses.dataclass
 class NpyFileGroupConfig(FileGroupConfig):
 
@@ -1296,20 +1792,29 @@ class NpyFileGroup(FileGroup, abc.ABC):
 
     def load_as_dict(
         self,
-        memory_limit_in_gbytes: int = None, fix_all_lengths_same: bool = False, memmap: bool = True,
+        memory_limit_in_gbytes: float = None, fix_all_lengths_same: bool = False, memmap: bool = True,
         # optional_slice: slice = slice(0, 4000),
-    ) -> t.Dict[str, t.Union[np.ndarray, t.Dict[str, np.ndarray]]]:
+    ) -> t.Union[t.Dict[str, t.Union[np.ndarray, t.Dict[str, np.ndarray]]], "NpyMemoryBoundedDict"]:
         """
         Full load in memory for fast access
+
+        + When `memory_limit_in_gbytes` is supplied arrays are kept memmapped
+          and a `NpyMemoryBoundedDict` is returned which promotes accessed
+          keys in RAM only up to memory budget (LRU by access) ... in that
+          case `memmap` is ignored
+        + When `fix_all_lengths_same` the arrays with singular length are
+          exposed as zero-copy (read-only) broadcast views
         """
         self.richy_panel.update("loading NpyFileGroup as dict")
         # -------------------------------------------------- 01
         # validate
-        # todo: test memory limit
         if memory_limit_in_gbytes is not None:
-            raise e.code.NotYetImplemented(
-                notes=["This feature is not yet implemented"]
-            )
+            if memory_limit_in_gbytes < 0:
+                raise e.validation.NotAllowed(
+                    notes=[f"memory_limit_in_gbytes cannot be negative, "
+                           f"found {memory_limit_in_gbytes}"]
+                )
+            memmap = True
         if fix_all_lengths_same:
             if self.has_arbitrary_lengths:
                 raise e.code.NotAllowed(
@@ -1327,30 +1832,190 @@ class NpyFileGroup(FileGroup, abc.ABC):
             _ret[_k] = _v
 
         # -------------------------------------------------- 03
-        # augment singular elements
+        # length to which singular elements will be broadcast
+        _len = None
         if fix_all_lengths_same:
-            _len = None
             for _k in self.file_keys:
                 if len(_ret[_k]) != 1:
                     _len = len(_ret[_k])
                     break
             if _len is None:
                 raise e.code.ShouldNeverHappen()
+
+        # -------------------------------------------------- 04
+        # memory bounded
+        if memory_limit_in_gbytes is not None:
+            self.richy_panel.update(
+                f"loaded NpyFileGroup as memmaps with memory limit of "
+                f"{memory_limit_in_gbytes} GB")
+            return NpyMemoryBoundedDict(
+                npy_data=_ret,
+                memory_limit_in_bytes=int(memory_limit_in_gbytes * 1024 ** 3),
+                broadcast_length=_len,
+            )
+
+        # -------------------------------------------------- 05
+        # augment singular elements
+        if _len is not None:
             for _k in self.file_keys:
                 if len(_ret[_k]) == 1:
-                    _ret[_k] = np.repeat(_ret[_k][:], _len, axis=0)
+                    _ret[_k] = np.broadcast_to(_ret[_k], (_len, *_ret[_k].shape[1:]))
 
-        # -------------------------------------------------- 04
+        # -------------------------------------------------- 06
         # return
         self.richy_panel.update("finished loading NpyFileGroup as dict")
         return _ret
 
+    def iter_batches(
+        self, batch_size: int, shuffle: bool = False, set_seed: int = -1,
+        block_size: int = None, prefetch: int = 2, drop_last: bool = False,
+    ) -> t.Iterator[t.Dict[str, np.ndarray]]:
+        """
+        Yields aligned batches (dict of arrays for all file keys) read from
+        memmaps.
+
+        + When `shuffle` we do a block shuffle that stays page cache
+          friendly i.e. memmaps are always read in contiguous blocks of
+          `block_size` rows (default is 4 x batch_size) ... the order of
+          blocks is permuted and rows inside every block are shuffled with
+          one permutation applied to all keys so that they stay aligned ...
+          permutations come from generators local to this call so that
+          global `np.random` state is never touched by prefetch thread
+        + `set_seed` has same semantics as in `util.shuffle_arrays` i.e.
+          seed if int >= 0 else seed is random
+        + A background thread reads next `prefetch` batches while consumer
+          works on current batch
+        + Arrays with singular length are broadcast to batch length while
+          files with arbitrary lengths are not supported
+        """
+        # -------------------------------------------------- 01
+        # validate
+        if self.has_arbitrary_lengths:
+            raise e.code.NotAllowed(
+                notes=[f"This {self.__class__} has files with arbitrary lengths "
+                       f"so we cannot iterate over aligned batches"]
+            )
+        if batch_size < 1:
+            raise e.validation.NotAllowed(
+                notes=[f"batch_size should be positive, found {batch_size}"]
+            )
+
+        # -------------------------------------------------- 02
+        # some vars
+        _memmaps = {
+            _k: self.load_npy_data(file_key=_k, memmap=True)
+            for _k in self.file_keys
+        }
+        _singular_keys = [_k for _k, _v in _memmaps.items() if len(_v) == 1]
+        _keys = [_k for _k in self.file_keys if _k not in _singular_keys]
+        if not bool(_keys):
+            raise e.code.NotAllowed(
+                notes=[f"All files of {self.__class__} have singular length "
+                       f"so there is nothing to iterate over"]
+            )
+        _length = len(_memmaps[_keys[0]])
+        _block_size = batch_size * 4 if block_size is None else block_size
+        _blocks = [
+            (_start, min(_start + _block_size, _length))
+            for _start in range(0, _length, _block_size)
+        ]
+        _rng = np.random.RandomState(None if set_seed < 0 else set_seed)
+        if shuffle:
+            _blocks = [_blocks[_i] for _i in _rng.permutation(len(_blocks))]
+        _block_seeds = _rng.randint(0, 2**(32 - 1) - 1, size=len(_blocks))
+
+        def _make_batch(_batch: t.Dict[str, np.ndarray]) -> t.Dict[str, np.ndarray]:
+            _n = len(_batch[_keys[0]])
+            for __k in _singular_keys:
+                _batch[__k] = np.broadcast_to(
+                    _memmaps[__k], (_n, *_memmaps[__k].shape[1:]))
+            return {__k: _batch[__k] for __k in self.file_keys}
+
+        def _produce():
+            # read contiguous blocks and cut batches out of them
+            _pending = {__k: [] for __k in _keys}
+            _pending_rows = 0
+            for (_start, _stop), _block_seed in zip(_blocks, _block_seeds):
+                if shuffle:
+                    _perm = np.random.default_rng(int(_block_seed)).permutation(_stop - _start)
+                    _block = [np.asarray(_memmaps[__k][_start:_stop])[_perm] for __k in _keys]
+                else:
+                    _block = [np.array(_memmaps[__k][_start:_stop]) for __k in _keys]
+                for __k, __v in zip(_keys, _block):
+                    _pending[__k].append(__v)
+                _pending_rows += _stop - _start
+                while _pending_rows >= batch_size:
+                    _batch = {}
+                    for __k in _keys:
+                        __v = np.concatenate(_pending[__k]) \
+                            if len(_pending[__k]) > 1 else _pending[__k][0]
+                        _batch[__k] = __v[:batch_size]
+                        _pending[__k] = [__v[batch_size:]]
+                    _pending_rows -= batch_size
+                    yield _make_batch(_batch)
+            if _pending_rows > 0 and not drop_last:
+                yield _make_batch(
+                    {__k: np.concatenate(_pending[__k]) for __k in _keys})
+
+        # -------------------------------------------------- 03
+        # without prefetch
+        if prefetch < 1:
+            yield from _produce()
+            return
+
+        # -------------------------------------------------- 04
+        # prefetch in background thread
+        _queue = queue.Queue(maxsize=prefetch)
+        _stop_event = threading.Event()
+        _end = object()
+
+        def _worker():
+            try:
+                for __batch in _produce():
+                    while not _stop_event.is_set():
+                        try:
+                            _queue.put(__batch, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if _stop_event.is_set():
+                        return
+                _queue.put(_end)
+            except Exception as __exp:
+                _queue.put(__exp)
+
+        _thread = threading.Thread(target=_worker, daemon=True)
+        _thread.start()
+        try:
+            while True:
+                _item = _queue.get()
+                if _item is _end:
+                    break
+                if isinstance(_item, Exception):
+                    raise _item
+                yield _item
+        finally:
+            # consumer might stop early so signal worker and unblock it
+            _stop_event.set()
+            while _thread.is_alive():
+                try:
+                    _queue.get_nowait()
+                except queue.Empty:
+                    _thread.join(timeout=0.1)
+
     def load_npy_data(self, file_key: str, memmap: bool) -> t.Union[np.ndarray, t.Dict[str, np.ndarray]]:
         """
         Note that for npy record the type is t.Dict[str, np.ndarray]
         As we can treat it as dict of numpy arrays
+
+        If local cache is enabled for the file system the file is read (or
+        memmapped) from validated local copy (see `s.fs.LocalCache`)
         """
-        return util.npy_load(self.upath / file_key, memmap=memmap, shape=self.shape[file_key], dtype=self.dtype[file_key])
+        _file = self.upath / file_key
+        _local_cache = self.local_cache
+        if _local_cache is not None:
+            _file = _local_cache.local_path(_file.path)
+        return util.npy_load(_file, memmap=memmap, shape=self.shape[file_key], dtype=self.dtype[file_key])
 
     def save_npy_data(
         self,
@@ -1387,7 +2052,21 @@ class NpyFileGroup(FileGroup, abc.ABC):
         # return
         return _file
 
-    def save_using_generator(self, generator: Generator, task_name: str = None):
+    def save_using_generator(
+        self, generator: Generator, task_name: str = None,
+        num_workers: int = None, batch_size: int = 1024,
+    ):
+        """
+        Rows/blocks yielded by generator are buffered and written in batches
+        of `batch_size` rows where adjacent rows/blocks are coalesced in one
+        slice assignment ... refer `Generator` and `_write_to_memmaps`.
+
+        When `num_workers` is more than 1 the generator is split in index
+        ranges that are consumed by a process pool ... refer
+        `Generator.range_gen_fn`. Each worker writes directly in memmaps
+        (allocated by this process with shape and dtype from `self.shape`
+        and `self.dtype`) in batches of `batch_size` rows.
+        """
         # get richy panel
         _rp = self.richy_panel
 
@@ -1416,6 +2095,11 @@ class NpyFileGroup(FileGroup, abc.ABC):
                 del _memmap
 
         # now save data obtained from generator
+        if num_workers is not None and num_workers > 1:
+            return self._save_using_generator_in_parallel(
+                generator=generator, task_name=task_name,
+                num_workers=num_workers, batch_size=batch_size,
+            )
         _rp.update("saving to memmap")
         _memmaps = {}
         _length = len(generator)
@@ -1424,28 +2108,100 @@ class NpyFileGroup(FileGroup, abc.ABC):
         _iterator = generator.gen_fn()
         _first_element = next(_iterator)
         _keys = [k for k in _first_element.keys() if k != "index_to_write"]
-        _first_element_index_to_write = _first_element["index_to_write"]
+        _first_element_is_block = isinstance(
+            _first_element["index_to_write"], slice)
         for _k in _keys:
             _v = _first_element[_k]
             _memmaps[_k] = np.memmap(
                 filename=(self.upath / _k),
                 dtype=_v.dtype,
-                shape=(_length, *_v.shape), mode='w+'
+                shape=(
+                    _length, *(_v.shape[1:] if _first_element_is_block else _v.shape)
+                ), mode='w+'
             )
-            _memmaps[_k][_first_element_index_to_write] = _v
-        _task.update(advance=1)
-        for _ in _iterator:
-            _task.update(advance=1)
+
+        def _on_rows(_rows: int):
+            _task.update(advance=_rows)
             _rp.log_tasks_progress()
-            _index_to_write = _["index_to_write"]
-            for _k in _keys:
-                _memmaps[_k][_index_to_write] = _[_k]
+
+        _write_to_memmaps(
+            iterator=itertools.chain([_first_element], _iterator),
+            memmaps=_memmaps, batch_size=batch_size, on_rows=_on_rows,
+        )
         _rp.update("flushing the memmaps")
         for _k in _keys:
             _memmaps[_k].flush()
             del _memmaps[_k]
         del _memmaps
 
+    def _save_using_generator_in_parallel(
+        self, generator: Generator, task_name: t.Optional[str],
+        num_workers: int, batch_size: int,
+    ):
+        # ----------------------------------------------------------------01
+        # some vars
+        _rp = self.richy_panel
+        _length = len(generator)
+        _meta_keys = list(generator.meta.keys()) if bool(generator.meta) else []
+        _keys = [_k for _k in self.file_keys if _k not in _meta_keys]
+        _shape = self.shape
+        _dtype = self.dtype
+        # we split in more ranges than workers so that progress can be shown
+        # and slow ranges do not stall other workers
+        _ranges = generator.split(num_splits=num_workers * 4)
+
+        # ----------------------------------------------------------------02
+        # allocate memmap files so that workers can open them in r+ mode
+        _rp.update("allocating memmaps")
+        _files = {}
+        for _k in _keys:
+            if _shape[_k][0] != _length:
+                raise e.validation.NotAllowed(
+                    notes=[
+                        f"The length of generator is {_length} but shape for "
+                        f"file_key {_k} is {_shape[_k]}"
+                    ]
+                )
+            _file = self.upath / _k
+            _memmap = np.memmap(
+                filename=_file, dtype=_dtype[_k], shape=_shape[_k], mode='w+'
+            )
+            del _memmap
+            _files[_k] = (_file.path, np.dtype(_dtype[_k]), tuple(_shape[_k]))
+
+        # ----------------------------------------------------------------03
+        # submit ranges to process pool and track progress
+        _rp.update(f"saving to memmap with {num_workers} workers")
+        _task_name = "save in memmap#" if task_name is None else task_name
+        _task = _rp.add_task(task_name=_task_name, total=_length)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers
+        ) as _executor:
+            _pending = {
+                _executor.submit(
+                    _save_generator_range,
+                    range_gen_fn=generator.range_gen_fn, start=_start,
+                    stop=_stop, files=_files, batch_size=batch_size,
+                )
+                for _start, _stop in _ranges
+            }
+            while bool(_pending):
+                _done, _pending = concurrent.futures.wait(
+                    _pending, return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for _future in _done:
+                    # this will also raise any exception from worker process
+                    _task.update(advance=_future.result())
+                _rp.log_tasks_progress()
+
+        # ----------------------------------------------------------------04
+        # single flush for all memmaps
+        _rp.update("flushing the memmaps")
+        for _k, (_f, _d, _s) in _files.items():
+            _memmap = np.memmap(filename=_f, dtype=_d, shape=_s, mode='r+')
+            _memmap.flush()
+            del _memmap
+
     def create_pre_runner(self):
 
         # make sure that shape and dtype are properly overridden
@@ -1628,12 +2384,13 @@ class NpyFileGroup(FileGroup, abc.ABC):
                     f"to be present in the config"
                 ]
             )
-        self.config.shape = _shape
-        self.config.dtype = _dtype
-        self.config.min = _min
-        self.config.max = _max
-        self.config.median = _median
-        self.config.mean = _mean
+        with self.config.batch():
+            self.config.shape = _shape
+            self.config.dtype = _dtype
+            self.config.min = _min
+            self.config.max = _max
+            self.config.median = _median
+            self.config.mean = _mean
 
         # ----------------------------------------------------------------06
         # finally return
@@ -1703,22 +2460,32 @@ class DownloadFileGroup(FileGroup, abc.ABC):
 
     def create(self) -> t.List[UPath]:
         """
-        todo: we can make this with asyncio with aiohttps and aiofiles
-          https://gist.github.com/darwing1210/c9ff8e3af8ba832e38e6e6e347d9047a
+        Downloads files concurrently on threads (with a bounded connection
+        pool) ...
+        + partially downloaded files (`_<file_key>.part`) are resumed with HTTP
+          range requests
+        + hashes are computed while bytes stream in and saved in
+          `self.hash_cache` so that `do_hash_check` need not read files again
         """
         # ------------------------------------------------------ 01
         # get details
+        from .. import Settings
         _rp = self.richy_panel
         _total_files = len(self.file_keys)
-        _rp.update(f"get content length for {_total_files} files")
-        _chunk_size = 1024 * 50
+        _chunk_size = int(Settings.DOWNLOAD_CHUNK_SIZE_IN_MB * 1024 * 1024)
+        _max_workers = max(1, min(Settings.DOWNLOAD_MAX_WORKERS, _total_files))
         _file_paths = {
             fk: self.upath / fk for fk in self.file_keys
-        }  # type: t.Dict[str, Path]
+        }  # type: t.Dict[str, UPath]
+        # note that anything starting with `_` is ignored by
+        # `unknown_paths_on_disk`
+        _part_paths = {
+            fk: self.upath / f"_{fk}.part" for fk in self.file_keys
+        }  # type: t.Dict[str, UPath]
         _urls = self.get_urls()
-        _raise_error = False
+        _correct_hashes = {} if self.is_auto_hash else self.get_hashes()
+        _hash_cache = self.hash_cache
         _errors = {}
-        _responses = {}
 
         # ------------------------------------------------------ 02
         # get panels
@@ -1732,61 +2499,110 @@ class DownloadFileGroup(FileGroup, abc.ABC):
         _rp['download_progress'] = _download_progress
 
         # ------------------------------------------------------ 03
-        # now add tasks
+        # now add tasks ... if already present just move forward
+        _file_keys_to_download = []
+        _infos = s.fs.stat_many(self.upath, self.file_keys)
         for fk in self.file_keys:
-            if _file_paths[fk].exists():
+            if _infos[fk] is not None:
                 _download_progress.add_task(
-                    task_name=fk, total=_file_paths[fk].stat()['size']
+                    task_name=fk, total=_infos[fk]['size']
                 )
+                _download_progress.tasks[fk].already_finished()
             else:
                 _download_progress.add_task(
                     task_name=fk, total=None
                 )
+                _file_keys_to_download.append(fk)
 
         # ------------------------------------------------------ 04
         # now download files
-        # todo: launch all file downloads in async ;)
-        for fk in self.file_keys:
-            # get the task
-            _task = _download_progress.tasks[fk]
-            # if already present just move forward
-            if _file_paths[fk].exists():
-                _task.already_finished()
-                continue
-            try:
-                # todo: can we do hash check while download is undergoing ???
-                #   we can have two async tasks one which downloads chunk and
-                #   other which computes hash
-                with _file_paths[fk].open('wb') as _f:
-                    _response = requests.get(_urls[fk], stream=True)
+        # Note that downloads happen on worker threads while main thread
+        # updates progress (throttled) and collects results
+        _rp.update(
+            f"download {len(_file_keys_to_download)} files with "
+            f"{_max_workers} workers"
+        )
+        _bytes_read = {fk: 0 for fk in _file_keys_to_download}
+        _bytes_reported = {fk: 0 for fk in _file_keys_to_download}
+        _totals = {}
+        _totals_reported = []
+        with requests.Session() as _session, \
+                concurrent.futures.ThreadPoolExecutor(
+                    max_workers=_max_workers) as _executor:
+            # ------------------------------------------------------ 04.01
+            # bound the connection pool to number of workers
+            _adapter = requests.adapters.HTTPAdapter(
+                pool_connections=_max_workers, pool_maxsize=_max_workers,
+            )
+            _session.mount("http://", _adapter)
+            _session.mount("https://", _adapter)
+
+            # ------------------------------------------------------ 04.02
+            # submit
+            _futures = {}
+            for fk in _file_keys_to_download:
+                _hash_module, _ = _get_hash_module(
+                    len(_correct_hashes.get(fk, "")))
+                _futures[_executor.submit(
+                    _download_file,
+                    session=_session, url=_urls[fk],
+                    file_path=_file_paths[fk], part_path=_part_paths[fk],
+                    hash_module=_hash_module, chunk_size=_chunk_size,
+                    bytes_read=_bytes_read, totals=_totals, file_key=fk,
+                )] = fk
+
+            # ------------------------------------------------------ 04.03
+            # wait for results while updating progress periodically
+            _pending = set(_futures.keys())
+            while bool(_pending):
+                _done, _pending = concurrent.futures.wait(
+                    _pending,
+                    timeout=Settings.DOWNLOAD_PROGRESS_INTERVAL_IN_SEC,
+                )
+                for fk in _file_keys_to_download:
+                    if fk in _totals and fk not in _totals_reported:
+                        _download_progress.tasks[fk].update(total=_totals[fk])
+                        _totals_reported.append(fk)
+                    _advance = _bytes_read[fk] - _bytes_reported[fk]
+                    if _advance != 0:
+                        _download_progress.tasks[fk].update(advance=_advance)
+                        _bytes_reported[fk] += _advance
+                _rp.log_tasks_progress()
+                for _future in _done:
+                    fk = _futures[_future]
                     try:
-                        _length = int(_response.headers['content-length'])
-                        _task.update(total=_length)
-                    except Exception as _ee:
-                        raise Exception("error getting content length: " + str(_ee))
-                    for _chunk in _response.iter_content(
-                        chunk_size=min(_length // 10, _chunk_size)
-                    ):
-                        if _chunk:  # filter out keep-alive new chunks
-                            _f.write(_chunk)
-                            _task.update(advance=len(_chunk),)
-            except Exception as _exp:
-                _errors[fk] = str(_exp)
-                _raise_error = True
+                        _computed_hash = _future.result()
+                    except Exception as _exp:
+                        _download_progress.tasks[fk].failed()
+                        _errors[fk] = str(_exp)
+                        continue
+                    # save hash computed while downloading
+                    _hash_cache.set(
+                        file_key=fk,
+                        signature=_hash_cache.stat_signature(
+                            _file_paths[fk].fs.info(_file_paths[fk].path)
+                        ),
+                        hash_str=_computed_hash,
+                    )
 
         # ------------------------------------------------------ 05
-        # raise error if _raise_error
-        if _raise_error:
+        # persist hashes computed while downloading
+        if bool(_file_keys_to_download) and Settings.HASH_USE_CACHE:
+            _hash_cache.sync()
+
+        # ------------------------------------------------------ 06
+        # raise error if any
+        if bool(_errors):
             raise e.validation.NotAllowed(
                 notes=["Check errors ...", _errors]
             )
 
-        # ------------------------------------------------------ 06
+        # ------------------------------------------------------ 07
         # clean for richy
         _rp.update("finished downloading files")
         del _rp['download_progress']
 
-        # ------------------------------------------------------ 07
+        # ------------------------------------------------------ 08
         # return
         return list(_file_paths.values())
 
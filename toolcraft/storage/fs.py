@@ -1,6 +1,11 @@
 import dataclasses
 import typing as t
 import abc
+import collections
+import hashlib
+import os
+import pathlib
+import threading
 from fsspec.implementations import local
 from fsspec.spec import AbstractFileSystem
 from upath import UPath
@@ -10,6 +15,271 @@ from .. import util
 from .. import error as e
 
 
+# (file system, path) -> UPath ... so that listing same folders again (walk,
+# unknown_paths_on_disk, is_dir_empty etc.) reuses UPath's built earlier
+_UPATH_INTERN = collections.OrderedDict()  # type: t.Dict[t.Tuple[AbstractFileSystem, str], UPath]
+_UPATH_INTERN_LOCK = threading.Lock()
+
+
+def child_upaths(parent: UPath, paths: t.Iterable[str]) -> t.List[UPath]:
+    """
+    Build UPath's for paths returned by listing methods (ls/find/glob) of
+    `parent.fs`.
+
+    + `with_segments` shares already resolved file system of `parent` (with
+      `UPath(path, protocol=...)` every entry resolves file system again on
+      first use) and keeps storage options of `parent`
+    + repeated paths are interned ... bounded by
+      `Settings.UPATH_INTERN_MAX_SIZE` with least recently listed evicted first
+    """
+    from .. import Settings
+    _max_size = Settings.UPATH_INTERN_MAX_SIZE
+    if _max_size <= 0:
+        return [parent.with_segments(_) for _ in paths]
+    _fs = parent.fs
+    _ret = []
+    with _UPATH_INTERN_LOCK:
+        for _path in paths:
+            _key = (_fs, _path)
+            try:
+                _upath = _UPATH_INTERN[_key]
+                _UPATH_INTERN.move_to_end(_key)
+            except KeyError:
+                _upath = _UPATH_INTERN[_key] = parent.with_segments(_path)
+            _ret.append(_upath)
+        while len(_UPATH_INTERN) > _max_size:
+            _UPATH_INTERN.popitem(last=False)
+    return _ret
+
+
+def list_infos(parent: UPath, sub_dir: str = "") -> t.Dict[str, t.Dict[str, t.Any]]:
+    """
+    Returns entry name -> `fs.info()` dict for all entries in dir `parent` (or
+    its `sub_dir`) with single `ls(detail=True)` call ... empty dict if dir
+    does not exist
+    """
+    _fs = parent.fs
+    _dir_path = parent.path.rstrip("/")
+    if sub_dir != "":
+        _dir_path += "/" + sub_dir
+    try:
+        _listing = _fs.ls(_dir_path, detail=True)
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+    _ret = {}
+    for _info in _listing:
+        _name = _info["name"].rstrip("/")
+        # some object stores also list the dir itself
+        if _name == _dir_path:
+            continue
+        _ret[_name.rsplit("/", 1)[-1]] = _info
+    return _ret
+
+
+def stat_many(parent: UPath, names: t.Iterable[str]) -> t.Dict[str, t.Optional[t.Dict[str, t.Any]]]:
+    """
+    Returns name -> `fs.info()` dict (None if not there) for many entries
+    inside dir `parent`.
+
+    + on remote file systems there is one `ls(detail=True)` per distinct dir
+      (names can have `/`) instead of one round trip per entry like
+      `UPath.exists()` / `UPath.stat()` ... i.e. a FileGroup with 200 files on
+      gcs needs one http call instead of 200
+    + on local file system `info()` is called per entry as stat is cheap while
+      listing big dirs is not
+    """
+    _fs = parent.fs
+    _ret = {}
+    if isinstance(_fs, local.LocalFileSystem):
+        _dir_path = parent.path.rstrip("/")
+        for _name in names:
+            try:
+                _ret[_name] = _fs.info(_dir_path + "/" + _name)
+            except FileNotFoundError:
+                _ret[_name] = None
+        return _ret
+    _names_by_dir = {}  # type: t.Dict[str, t.Dict[str, str]]
+    for _name in names:
+        _sub_dir, _, _base_name = _name.rpartition("/")
+        _names_by_dir.setdefault(_sub_dir, {})[_base_name] = _name
+    for _sub_dir, _names in _names_by_dir.items():
+        _infos = list_infos(parent, sub_dir=_sub_dir)
+        for _base_name, _name in _names.items():
+            _ret[_name] = _infos.get(_base_name, None)
+    return _ret
+
+
+def exists_many(parent: UPath, names: t.Iterable[str]) -> t.Dict[str, bool]:
+    """
+    Bulk `UPath.exists()` for many entries inside dir `parent` ... see
+    `stat_many`
+    """
+    return {_k: _v is not None for _k, _v in stat_many(parent, names).items()}
+
+
+class LocalCache:
+    """
+    Read-through whole file cache on local disk for files of one file system
+    (see `Settings.FS_LOCAL_CACHE_SIZE_IN_MB` and `get_local_cache`).
+
+    + files are mirrored under `root` with same relative layout (so that
+      pyarrow partitioning works on cached files) and being local they can be
+      memmapped
+    + cached file is used only if the validation key (etag/md5 or else
+      mtime and size) of remote file matches the one saved next to it in
+      `<file>.tc_key` ... else it is downloaded again
+    + total size is bounded by `max_size_in_mb` ... least recently used files
+      (access updates mtime of `<file>.tc_key`) are evicted first
+    + total size is tracked incrementally on download so the cache dir is
+      walked only once at start and then only when total goes over limit
+      (the walk also accounts for files added/evicted by other processes)
+
+    Note: multiple processes can share the cache dir as files are downloaded
+      to temporary files and moved in place
+    """
+    KEY_SUFFIX = ".tc_key"
+    # when over limit evict till total is below this fraction of max size so
+    # that next downloads do not walk the cache dir again right away
+    EVICT_TO_FRACTION = 0.8
+
+    def __init__(self, fs: AbstractFileSystem, root: pathlib.Path, max_size_in_mb: float):
+        self.fs = fs
+        self.root = pathlib.Path(root)
+        self.max_size = int(max_size_in_mb * 1024 * 1024)
+        self.lock = threading.RLock()
+        # None till cache dir is walked once
+        self._total_size = None  # type: t.Optional[int]
+
+    def __repr__(self):
+        return f"LocalCache({self.root}, max_size={self.max_size})"
+
+    @staticmethod
+    def validation_key(info: t.Dict[str, t.Any]) -> str:
+        for _k in ("etag", "ETag", "md5Hash", "crc32c"):
+            if info.get(_k, None):
+                return f"{_k}:{info[_k]}"
+        _mtime = info.get("mtime", info.get("updated", info.get("LastModified", None)))
+        return f"mtime:{_mtime}:size:{info['size']}"
+
+    def cached_path(self, path: str) -> pathlib.Path:
+        """
+        Local path where remote `path` is (or will be) cached
+        """
+        # noinspection PyProtectedMember
+        return self.root / self.fs._strip_protocol(path).lstrip("/")
+
+    def local_path(self, path: str, info: t.Dict[str, t.Any] = None) -> pathlib.Path:
+        """
+        Returns local path of validated cached copy of remote `path` ...
+        downloads it if not cached or stale.
+
+        Pass `info` if you already have `fs.info()` dict for `path` (for
+        example from `fs.find(detail=True)`) to avoid one round trip.
+        """
+        # ------------------------------------------------------------- 01
+        # validate cached file
+        if info is None:
+            info = self.fs.info(path)
+        _key = self.validation_key(info)
+        _local = self.cached_path(path)
+        _key_file = _local.with_name(_local.name + self.KEY_SUFFIX)
+        with self.lock:
+            try:
+                if _key_file.read_text() == _key and _local.exists():
+                    os.utime(_key_file)
+                    return _local
+            except FileNotFoundError:
+                ...
+
+        # ------------------------------------------------------------- 02
+        # download
+        _local.parent.mkdir(parents=True, exist_ok=True)
+        _tmp = _local.with_name(
+            f"{_local.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.fs.get_file(path, str(_tmp))
+            with self.lock:
+                try:
+                    _old_size = _local.stat().st_size
+                except FileNotFoundError:
+                    _old_size = 0
+                os.replace(_tmp, _local)
+                _key_file.write_text(_key)
+                if self._total_size is not None:
+                    self._total_size += _local.stat().st_size - _old_size
+        finally:
+            if _tmp.exists():
+                _tmp.unlink()
+
+        # ------------------------------------------------------------- 03
+        # evict others only if needed
+        with self.lock:
+            if self._total_size is None or self._total_size > self.max_size:
+                self.evict(keep=_local)
+        return _local
+
+    def evict(self, keep: pathlib.Path = None):
+        """
+        Evict least recently used files when total size is over `max_size`
+        till it is below `EVICT_TO_FRACTION` of it
+        """
+        with self.lock:
+            _entries = []
+            _total = 0
+            for _key_file in self.root.rglob(f"*{self.KEY_SUFFIX}"):
+                _local = _key_file.with_name(_key_file.name[:-len(self.KEY_SUFFIX)])
+                try:
+                    _size = _local.stat().st_size
+                    _accessed_on = _key_file.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                _total += _size
+                if _local != keep:
+                    _entries.append((_accessed_on, _size, _local, _key_file))
+            _target = self.max_size if _total <= self.max_size else \
+                int(self.max_size * self.EVICT_TO_FRACTION)
+            for _accessed_on, _size, _local, _key_file in sorted(_entries):
+                if _total <= _target:
+                    break
+                try:
+                    _key_file.unlink()
+                    _local.unlink()
+                except (FileNotFoundError, PermissionError):
+                    # already evicted by other process or (on windows) in use
+                    continue
+                _total -= _size
+            self._total_size = _total
+
+
+# cache root -> LocalCache ... so that all folders on same file system share
+# the lock and tracked size of one cache
+_LOCAL_CACHES = {}  # type: t.Dict[pathlib.Path, LocalCache]
+_LOCAL_CACHES_LOCK = threading.Lock()
+
+
+def get_local_cache(file_system: "BaseFileSystem", max_size_in_mb: float) -> t.Optional[LocalCache]:
+    """
+    Returns LocalCache for `file_system` ... None if `max_size_in_mb` is 0.
+
+    Cache dir is keyed on url of file system (and not on `hex_hash`) so that
+    it stays same when the size bound changes.
+    """
+    if max_size_in_mb <= 0:
+        return None
+    from .. import Settings
+    _protocol = file_system.url.split("://")[0]
+    _root = Settings.TC_HOME / "fs_cache" / _protocol / \
+        hashlib.sha256(file_system.url.encode()).hexdigest()[:16]
+    with _LOCAL_CACHES_LOCK:
+        try:
+            _cache = _LOCAL_CACHES[_root]
+        except KeyError:
+            _cache = _LOCAL_CACHES[_root] = LocalCache(
+                fs=file_system.fs, root=_root, max_size_in_mb=max_size_in_mb)
+        _cache.max_size = int(max_size_in_mb * 1024 * 1024)
+        return _cache
+
+
 def get_fs_from_toml_config(d: t.Dict) -> "BaseFileSystem":
     _fs_protocol_string = d["url"].split("://")[0]
     return {
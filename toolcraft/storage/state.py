@@ -6,8 +6,13 @@ todo: check mlflow tags ... we will save state with dapr state and use it as tag
   big here ... which is bigger in scope than mlflow tags
 """
 
+import contextlib
+import copy
 import dataclasses
+import os
+import threading
 from upath import UPath
+from fsspec.implementations.local import LocalFileSystem
 import typing as t
 import datetime
 import abc
@@ -17,11 +22,36 @@ from .. import error as e
 from .. import util, settings
 from .. import marshalling as m
 from . import StorageHashable
+from .config_store import get_config_store
 
 
 class Suffix:
     info = ".info"
     config = ".config"
+    hash_cache = ".hash_cache"
+
+
+def _write_atomic(upath: UPath, data: t.Union[str, bytes]):
+    """
+    Readers never see partially written state file ...
+    + on local file system we write to temp file next to it and rename it
+    + on object stores (like gcs) upload of single object is already atomic and
+      rename is a copy, so we write directly
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(upath.fs, LocalFileSystem):
+        _path = upath.path
+        _tmp_path = f"{_path}._tmp_{os.getpid()}_{threading.get_ident()}"
+        try:
+            with open(_tmp_path, "wb") as _f:
+                _f.write(data)
+            os.replace(_tmp_path, _path)
+        finally:
+            if os.path.exists(_tmp_path):
+                os.remove(_tmp_path)
+    else:
+        upath.write_bytes(data)
 
 
 @dataclasses.dataclass
@@ -101,7 +131,7 @@ class StateFile(m.YamlRepr, abc.ABC):
         self.reset()
 
     def backup(self):
-        self.backup_path.write_text(self.upath.read_text())
+        self.backup_path.write_bytes(self.upath.read_bytes())
         util.io_make_path_read_only(self.backup_path)
 
     @abc.abstractmethod
@@ -211,8 +241,23 @@ class ConfigInternal(m.Internal):
 
     start_syncing: bool = False
 
+    # see `Config.batch` and `Settings.CONFIG_SYNC_DEBOUNCE_IN_SEC`
+    sync_lock: threading.RLock
+    batch_depth: int = 0
+    sync_pending: bool = False
+    debounce_timer: t.Optional[threading.Timer] = None
+
+    # see `Settings.CONFIG_BACKEND` ... field values and versions as last
+    # read from/written to config store and if yaml file is known to be on disk
+    store_base: t.Dict[str, t.Any] = dict
+    store_versions: t.Dict[str, int] = dict
+    file_on_disk: bool = False
+
     def vars_that_can_be_overwritten(self) -> t.List[str]:
-        return super().vars_that_can_be_overwritten() + ['start_syncing']
+        return super().vars_that_can_be_overwritten() + [
+            'start_syncing', 'batch_depth', 'sync_pending', 'debounce_timer',
+            'file_on_disk',
+        ]
 
 
 @dataclasses.dataclass
@@ -245,7 +290,9 @@ class Config(StateFile):
     @property
     @util.CacheResult
     def internal(self) -> ConfigInternal:
-        return ConfigInternal(owner=self)
+        _internal = ConfigInternal(owner=self)
+        _internal.sync_lock = threading.RLock()
+        return _internal
 
     @property
     def suffix(self) -> str:
@@ -277,17 +324,37 @@ class Config(StateFile):
             _ret[_f_name] = _v
         return _ret
 
+    @property
+    def store_key(self) -> str:
+        """
+        Key used for this config in config store
+        """
+        return str(self.hashable.upath)
+
     def __post_init__(self):
         """
         __post_init__ is allowed as it is not m.HashableClass
         """
         # ------------------------------------------------------------ 01
-        # if path exists load data dict from it
+        # if config store is used and has fields for this config load from it
+        # ... rows without config file are left over from a folder deleted
+        # outside toolcraft so we drop them
+        _store = get_config_store()
+        _rows = {} if _store is None else _store.load(self.store_key)
+        if bool(_rows) and not self.upath.exists():
+            _store.delete(self.store_key)
+            _rows = {}
+        if bool(_rows):
+            self.internal.file_on_disk = True
+            self._update_from_store(_rows)
+
+        # ------------------------------------------------------------ 02
+        # else if path exists load data dict from it
         # that is sync with contents on disk
-        if self.upath.exists():
-            _dict_from_dick = m.YamlLoader.load(
-                cls=dict, file_or_text=self.upath
-            )
+        # note that file can be in yaml or binary format
+        elif self.upath.exists():
+            self.internal.file_on_disk = True
+            _dict_from_dick = self._load_state(self.upath.read_bytes())
             # update internal dict from HashableDict loaded from disk
             for _k, _v in _dict_from_dick.items():
                 # this will take care of conversion of list/dict into
@@ -295,11 +362,37 @@ class Config(StateFile):
                 # check util.notifying_list_dict_class_factory
                 setattr(self, _k, _v)
 
-        # ------------------------------------------------------------ 02
+        # ------------------------------------------------------------ 03
         # start syncing i.e. any updates via __setattr__ will be synced
         # to disc
         self.internal.start_syncing = True
 
+    @staticmethod
+    def _load_state(data: bytes) -> t.Dict:
+        """
+        Loads state dict written by `_write_file` ... in yaml or binary format
+        """
+        if m.YamlBinary.is_binary(data):
+            return m.YamlBinary.load(data, expected_cls=dict)
+        return m.YamlLoader.load(cls=dict, file_or_text=data.decode("utf-8"))
+
+    def _update_from_store(self, rows: t.Dict[str, t.Tuple[t.Any, int]]):
+        """
+        Set fields (without syncing) from rows read from/written to config store
+        """
+        _internal = self.internal
+        _start_syncing = _internal.start_syncing
+        _internal.start_syncing = False
+        try:
+            for _k, (_v, _version) in rows.items():
+                if _k not in self.dataclass_field_names:
+                    continue
+                setattr(self, _k, copy.deepcopy(_v))
+                _internal.store_base[_k] = _v
+                _internal.store_versions[_k] = _version
+        finally:
+            _internal.start_syncing = _start_syncing
+
     def __setattr__(self, key, value):
         # for key in dataclass field names then if any of it is list or dict
         # make them special notifier based proxy list and dict
@@ -307,12 +400,12 @@ class Config(StateFile):
             if value.__class__ == list:
                 # noinspection PyPep8Naming
                 NotifierList = \
-                    util.notifying_list_dict_class_factory(list, self.sync)
+                    util.notifying_list_dict_class_factory(list, self.request_sync)
                 value = NotifierList(value)
             elif value.__class__ == dict:
                 # noinspection PyPep8Naming
                 NotifierDict = \
-                    util.notifying_list_dict_class_factory(dict, self.sync)
+                    util.notifying_list_dict_class_factory(dict, self.request_sync)
                 value = NotifierDict(value)
             else:
                 ...
@@ -320,50 +413,175 @@ class Config(StateFile):
         # call super to set things
         super().__setattr__(key, value)
 
-        # We call sync always as this will occur less frequently compared to
+        # We request sync always as this will occur less frequently compared to
         # __getattribute__
         # Note that list and dict updates will be automatically handled by
         # notifier version
         if self.internal.start_syncing:
-            self.sync()
+            self.request_sync()
 
     # noinspection PyMethodOverriding
     def __call__(self) -> "Config":
         # todo: remove this
         raise Exception("NO LONGER SUPPORTED")
 
+    @contextlib.contextmanager
+    def batch(self) -> t.Iterator["Config"]:
+        """
+        All field updates inside this context are written to disk as one
+        atomic write when the (outermost) context exits (or when debounce
+        window is over if `Settings.CONFIG_SYNC_DEBOUNCE_IN_SEC` is set).
+
+        >>> with cfg.batch():
+        ...     cfg.shape = ...
+        ...     cfg.dtype = ...
+        """
+        _internal = self.internal
+        with _internal.sync_lock:
+            _internal.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with _internal.sync_lock:
+                _internal.batch_depth -= 1
+                if _internal.batch_depth == 0 and _internal.sync_pending:
+                    self.request_sync()
+
+    def request_sync(self):
+        """
+        Called on every field update ... writes immediately unless we are in
+        `batch` context or `Settings.CONFIG_SYNC_DEBOUNCE_IN_SEC` is set in which
+        case updates within that window are coalesced into one write
+        """
+        _internal = self.internal
+        with _internal.sync_lock:
+            _internal.sync_pending = True
+            if _internal.batch_depth > 0:
+                return
+            _debounce = settings.Settings.CONFIG_SYNC_DEBOUNCE_IN_SEC
+            if _debounce > 0:
+                # note that timer thread is not daemon so that pending writes
+                # are not lost when interpreter exits
+                if _internal.debounce_timer is None:
+                    _internal.debounce_timer = threading.Timer(_debounce, self.flush)
+                    _internal.debounce_timer.start()
+                return
+            self.sync()
+
+    def flush(self):
+        """
+        Write pending updates if any
+        """
+        with self.internal.sync_lock:
+            if self.internal.sync_pending:
+                self.sync()
+            else:
+                self._cancel_debounce_timer()
+
+    def _cancel_debounce_timer(self):
+        _timer = self.internal.debounce_timer
+        if _timer is not None:
+            _timer.cancel()
+            self.internal.debounce_timer = None
+
     def sync(self):
+        _internal = self.internal
+        with _internal.sync_lock:
+            # -------------------------------------------------- 01
+            # defer if in batch context
+            if _internal.batch_depth > 0:
+                _internal.sync_pending = True
+                return
+            self._cancel_debounce_timer()
+            _internal.sync_pending = False
+
+            # -------------------------------------------------- 02
+            # if config store is used write only changed fields to it ... yaml
+            # file is written through with all fields (including updates by
+            # other processes) in same transaction
+            _store = get_config_store()
+            if _store is not None:
+                _base = _internal.store_base
+                _changes = {
+                    _k: (_base.get(_k, None), _v) for _k, _v in self._dict.items()
+                    if _k not in _base or _base[_k] != _v
+                }
+                if bool(_changes) or not _internal.file_on_disk:
+                    self._update_from_store(
+                        _store.commit(
+                            self.store_key, _changes, _internal.store_versions,
+                            write_through=self._write_rows,
+                        )
+                    )
+                return
+
+            # -------------------------------------------------- 03
+            # write to disk
+            self._write_file()
+
+    def _write_rows(self, rows: t.Dict[str, t.Tuple[t.Any, int]]):
+        """
+        Write fields as stored in config store to the `*.config` file
+        """
+        _dict = self._dict
+        for _k, (_v, _) in rows.items():
+            if _k in _dict.keys():
+                _dict[_k] = _v
+        self._write_file(_dict)
+
+    def _write_file(self, state: t.Dict = None):
         # -------------------------------------------------- 01
         # get current state
-        _current_state = m.YamlDumper.dump(self._dict)
+        if state is None:
+            state = self._dict
+        if settings.Settings.CONFIG_USE_BINARY_FORMAT:
+            _current_state = m.YamlBinary.dump(state)
+        else:
+            _current_state = m.YamlDumper.dump(state)
 
         # -------------------------------------------------- 02
-        # if file exists on the disk then check if the contents are different
-        # this helps us catch unexpected syncs
-        # if the contents are same then we raise error as nothing is there to
-        # update
-        if self.upath.exists():
-            _disk_state = self.upath.read_text()
-            # todo: this fails with distributed computing as multiple processes have
-            #  no updates to their config ... we have to update design for config
-            #  using some sort of database that can track things over multiple processes
-            # if _current_state == _disk_state:
-            #     raise e.code.CodingError(
-            #         notes=[
-            #             f"We expect the state on disk to be different to "
-            #             f"internal state for config ...",
-            #             {
-            #                 "_current_state": _current_state,
-            #                 "_disk_state": _disk_state
-            #             },
-            #             f"This looks like unexpected sync as nothing has "
-            #             f"changed in config"
-            #         ]
-            #     )
-
-        # -------------------------------------------------- 03
         # write to disk
-        self.upath.write_text(_current_state)
+        # todo: earlier we used to read state on disk and raise error if it
+        #  was same as current state to catch unexpected syncs ... this
+        #  fails with distributed computing as multiple processes have
+        #  no updates to their config ... we have to update design for config
+        #  using some sort of database that can track things over multiple
+        #  processes
+        _write_atomic(self.upath, _current_state)
+        self.internal.file_on_disk = True
+
+    def export(self):
+        """
+        Write state in config store (including updates by other processes) to
+        the `*.config` file ... does a normal sync when config store is not used
+
+        Note that with config store the file is anyways written on every sync
+        so this is only needed to pick up updates by other processes when
+        there is nothing to sync
+        """
+        _store = get_config_store()
+        with self.internal.sync_lock:
+            self.sync()
+            if _store is not None:
+                self._update_from_store(
+                    _store.commit(
+                        self.store_key, {}, self.internal.store_versions,
+                        write_through=self._write_rows,
+                    )
+                )
+
+    def delete(self):
+        # make sure that pending debounced write does not recreate file
+        with self.internal.sync_lock:
+            self._cancel_debounce_timer()
+            self.internal.sync_pending = False
+            _store = get_config_store()
+            if _store is not None:
+                _store.delete(self.store_key)
+                self.internal.store_base.clear()
+                self.internal.store_versions.clear()
+            self.internal.file_on_disk = False
+            super().delete()
 
     def reset(self):
         """
@@ -406,12 +624,12 @@ class Config(StateFile):
                     f"last_accessed_on list multiple times"
                 ]
             )
-        # limit the list
-        if len(self.accessed_on) == \
-                self.LITERAL.accessed_on_list_limit:
-            self.accessed_on = self.accessed_on[1:]
-        # append time
-        self.accessed_on.append(_now())
+        # limit the list and append time ... written to disk only once
+        with self.batch():
+            if len(self.accessed_on) == \
+                    self.LITERAL.accessed_on_list_limit:
+                self.accessed_on = self.accessed_on[1:]
+            self.accessed_on.append(_now())
 
     def check_if_backup_matches(self):
         # noinspection DuplicatedCode
@@ -422,11 +640,10 @@ class Config(StateFile):
                 ]
             )
 
-        # get the state as dict
-        _self_yaml_dict = self.as_dict()
-        _backup_yaml_dict = self.from_yaml(
-            self.backup_path.read_text()
-        ).as_dict()
+        # get the state as dict ... note that backup is copy of bytes on disk
+        # so it can be in yaml or binary format
+        _self_yaml_dict = self._dict
+        _backup_yaml_dict = self._load_state(self.backup_path.read_bytes())
 
         # match lengths
         if len(_self_yaml_dict) != len(_backup_yaml_dict):
@@ -58,10 +58,12 @@ import pathlib
 import dataclasses
 import pyarrow as pa
 import pyarrow.dataset as pds
+import pyarrow.fs as pafs
 import types
 import itertools
 import operator
 import time
+from fsspec import AbstractFileSystem
 
 from .. import util
 from .. import error as e
@@ -78,6 +80,11 @@ if False:
 # _FILE_FORMAT = pds.CsvFileFormat()
 _FILE_FORMAT = pds.IpcFileFormat()
 
+# used by Table.compact ... note that pyarrow readers ignore files with `_`
+# prefix
+_COMPACT_TMP_PREFIX = "_compact_tmp_"
+_COMPACT_JOURNAL = "_compact_journal"
+
 
 # todo: check pds.Expression for more operations that are supported
 
@@ -198,13 +205,222 @@ def make_expression(
     return _ret_exp
 
 
+def _prune_partition_dirs(
+    filters: FILTERS_TYPE, partition_cols: t.List[str],
+) -> t.Optional[t.List[t.Tuple[str, ...]]]:
+    """
+    Resolves filters on `partition_cols` to partition directories (as tuple
+    of dir names relative to table folder) so that only those directories
+    need to be scanned.
+
+    Only `=`, `==` and `in` filters on leading partition cols can be resolved.
+    Supported forms are list of Filter's (i.e. and expression) or list of list
+    of Filter's (i.e. or of and expressions) ... returns None when filters
+    cannot be resolved and in that case entire table needs to be scanned.
+
+    Note that filters are anyways applied while reading so pruning only needs
+    to be superset of matching rows.
+    """
+    # ---------------------------------------------------- 01
+    # make list of and expressions
+    if all(isinstance(_, Filter) for _ in filters):
+        _conjunctions = [filters]
+    elif all(isinstance(_, list) for _ in filters):
+        _conjunctions = filters
+        if not all(isinstance(__, Filter) for _ in filters for __ in _):
+            return None
+    else:
+        return None
+    if not bool(_conjunctions):
+        return None
+
+    # ---------------------------------------------------- 02
+    # resolve every and expression to dirs
+    _dirs = set()
+    for _conjunction in _conjunctions:
+        _values_per_col = []
+        for _pc in partition_cols:
+            _values = None
+            for _f in _conjunction:
+                if _f.column != _pc:
+                    continue
+                if _f.op_type in ['=', '==']:
+                    _v = {_f.value}
+                elif _f.op_type == 'in':
+                    _v = set(_f.value)
+                else:
+                    continue
+                _values = _v if _values is None else _values & _v
+            # dirs can be resolved only for leading partition cols
+            if _values is None:
+                break
+            _values_per_col.append(sorted(str(_) for _ in _values))
+        if not bool(_values_per_col):
+            return None
+        _dirs.update(itertools.product(*_values_per_col))
+
+    # ---------------------------------------------------- 03
+    # if some dir is inside other dir then drop it so that rows are not read twice
+    _ret = []
+    for _dir in sorted(_dirs, key=len):
+        if not any(_dir[:len(_)] == _ for _ in _ret):
+            _ret.append(_dir)
+    return sorted(_ret)
+
+
+def _get_dataset(
+    table_as_folder: "Table",
+    partition_dirs: t.Optional[t.List[t.Tuple[str, ...]]],
+) -> t.Optional[pds.Dataset]:
+    """
+    Returns dataset that is cached on Table internal ... so that listing of
+    files (i.e. fragments) happens only once. The cache is invalidated on
+    `Table.write`, `Table.append` and `Table.delete_`.
+
+    When `partition_dirs` is supplied only those partition dirs are
+    discovered (missing ones are skipped) ... returns None if nothing to read.
+    """
+    # ---------------------------------------------------- 01
+    # check cache
+    _datasets = table_as_folder.internal.datasets
+    _key = None if partition_dirs is None else tuple(partition_dirs)
+    if _key in _datasets:
+        return _datasets[_key]
+
+    # ---------------------------------------------------- 02
+    # some vars
+    _path = table_as_folder.upath
+    _fs = _path.fs
+    _kwargs = dict(
+        filesystem=_fs,
+        format=_FILE_FORMAT,
+        schema=table_as_folder.config.schema,
+        partitioning=table_as_folder.partitioning,
+    )
+
+    # ---------------------------------------------------- 03
+    # if local cache is enabled for file system then list files with one
+    # `find` per root (whole table or only the pruned partition dirs) and read
+    # from validated local copies of them (mirrored with same layout so
+    # partitioning still works) ... pyarrow discovery on remote file system
+    # is skipped as it would list same files again
+    _local_cache = table_as_folder.local_cache
+    if _local_cache is not None:
+        _roots = [_path.path] if partition_dirs is None else [
+            "/".join([_path.path, *_dir]) for _dir in partition_dirs
+        ]
+        _infos = {}
+        for _root in _roots:
+            _infos.update(_fs.find(_root, withdirs=False, detail=True))
+        # skip hidden files like pyarrow discovery does
+        _files = sorted(
+            _f for _f in _infos.keys()
+            if not _f.rsplit("/", 1)[-1].startswith((".", "_"))
+        )
+        if partition_dirs is not None and len(_files) == 0:
+            _dataset = None
+        else:
+            _dataset = pds.dataset(
+                source=[
+                    str(_local_cache.local_path(_f, info=_infos[_f])) for _f in _files
+                ],
+                filesystem=pafs.LocalFileSystem(),
+                format=_FILE_FORMAT,
+                schema=table_as_folder.config.schema,
+                partitioning=table_as_folder.partitioning,
+                partition_base_dir=str(_local_cache.cached_path(_path.path)),
+            )
+
+    # ---------------------------------------------------- 04
+    # else make dataset with pyarrow discovery
+    elif partition_dirs is None:
+        _dataset = pds.dataset(source=_path.path, **_kwargs)
+    else:
+        _datasets_for_dirs = []
+        for _dir in partition_dirs:
+            _dir_path = "/".join([_path.path, *_dir])
+            if not _fs.exists(_dir_path):
+                continue
+            _datasets_for_dirs.append(
+                pds.dataset(
+                    source=_dir_path, partition_base_dir=_path.path, **_kwargs
+                )
+            )
+        if len(_datasets_for_dirs) == 0:
+            _dataset = None
+        elif len(_datasets_for_dirs) == 1:
+            _dataset = _datasets_for_dirs[0]
+        else:
+            _dataset = pds.dataset(_datasets_for_dirs)
+
+    # ---------------------------------------------------- 05
+    # cache and return
+    if len(_datasets) >= _TableInternal.LITERAL.max_cached_datasets:
+        _datasets.clear()
+    _datasets[_key] = _dataset
+    return _dataset
+
+
+def _make_scanner(
+    table_as_folder: "Table",
+    columns: t.Optional[t.List[str]],
+    filter_expression: t.Optional[pds.Expression],
+    filters: t.Optional[FILTERS_TYPE],
+    **scan_kwargs,
+) -> t.Optional[pds.Scanner]:
+    """
+    Makes scanner over cached dataset ... returns None when nothing to read
+
+    When `filters` are supplied they are used for partition pruning and are
+    also applied as filter expression along with `filter_expression`.
+
+    Note that column projection and filter are applied per batch loaded
+    rather than loading entire table and then applying filters
+    """
+    # ---------------------------------------------------- 01
+    # resolve filters
+    _partition_dirs = None
+    if bool(filters):
+        _exp = make_expression(filters)
+        filter_expression = _exp if filter_expression is None else \
+            operator.and_(filter_expression, _exp)
+        if bool(table_as_folder.partition_cols):
+            _partition_dirs = _prune_partition_dirs(
+                filters=filters, partition_cols=table_as_folder.partition_cols)
+
+    # ---------------------------------------------------- 02
+    # get dataset
+    _dataset = _get_dataset(table_as_folder, partition_dirs=_partition_dirs)
+    if _dataset is None:
+        return None
+
+    # ---------------------------------------------------- 03
+    # return scanner ... only pass kwargs that are set so that pyarrow
+    # defaults are used
+    return _dataset.scanner(
+        columns=columns, filter=filter_expression,
+        **{_k: _v for _k, _v in scan_kwargs.items() if _v is not None}
+    )
+
+
+def _empty_table(
+    table_as_folder: "Table", columns: t.Optional[t.List[str]],
+) -> pa.Table:
+    _schema = table_as_folder.config.schema
+    if bool(columns):
+        _schema = pa.schema(
+            fields=[_schema.field(_c) for _c in columns],
+            metadata=_schema.metadata
+        )
+    return _schema.empty_table()
+
+
 # noinspection PyArgumentList
 def _read_table(
     table_as_folder: "Table",
     columns: t.List[str],
     filter_expression: pds.Expression,
-    partitioning: pds.Partitioning,
-    table_schema: pa.Schema,
+    filters: FILTERS_TYPE = None,
 ) -> pa.Table:
     """
     Refer: https://arrow.apache.org/docs/python/dataset.html#dataset
@@ -213,33 +429,14 @@ def _read_table(
      else find a way to read with sort with pyarrow ... then there
      will be no need to use to_pandas() and also no need ofr casting
     """
-    if bool(columns):
-        table_schema = pa.schema(
-            fields=[table_schema.field(_c) for _c in columns],
-            metadata=table_schema.metadata
-        )
-    # noinspection PyProtectedMember
-    _path = table_as_folder.upath
-    _table = pa.Table.from_batches(
-        batches=pds.dataset(
-            source=_path.full_path,
-            filesystem=_path.fs,
-            format=_FILE_FORMAT,
-            schema=table_schema,
-            partitioning=partitioning,
-        ).to_batches(
-            # todo: verify below claim and test if this will remain generally correct
-            # using filters like columns and filter_expression here is more efficient
-            # as it applies for per batch loaded rather than loading entire table and
-            # then applying filters
-            columns=columns,
-            filter=filter_expression,
-        ),
-        # if column is specified table_schema will change as some columns will
-        # disappear ... so we set to None
-        # todo: check how to drop remaining columns from table_schema
-        schema=table_schema,
+    _scanner = _make_scanner(
+        table_as_folder, columns=columns,
+        filter_expression=filter_expression, filters=filters,
     )
+    # if nothing to read return empty table
+    if _scanner is None:
+        return _empty_table(table_as_folder, columns=columns)
+    _table = _scanner.to_table()
 
     # todo: should we reconsider sort overhead ???
     # return self.file_type.deserialize(
@@ -282,7 +479,7 @@ def _write_table(
     # noinspection PyProtectedMember
     pds.write_dataset(
         data=table,
-        base_dir=_path.full_path,
+        base_dir=_path.path,
         filesystem=_path.fs,
         partitioning=_partitioning,
         format=_FILE_FORMAT,
@@ -291,11 +488,144 @@ def _write_table(
     )
 
 
+def _file_order_key(file_name: str) -> t.Tuple[int, int]:
+    """
+    Order of files in a partition dir ... files are named
+    + `data.{i}` by `Table.write`
+    + `<time_ns>.{i}` by `Table.append`
+    + `<prefix>.c{n}` by `Table.compact` where prefix is of first merged file
+    """
+    _prefix, _suffix = file_name.split(".", 1)
+    _ts = -1 if _prefix == "data" else int(_prefix)
+    return _ts, int(_suffix.lstrip("c"))
+
+
+def _finish_compaction(fs: "AbstractFileSystem", dir_path: str):
+    """
+    Compaction of a dir is done in below steps so that readers never miss
+    rows and an interrupted compaction can be rolled forward:
+    + merged files are written with `_` prefix (ignored by pyarrow readers)
+    + journal with renames and files to delete is written
+    + merged files are renamed to final names and merged files are deleted
+    + journal is deleted
+    Note that between last two steps readers might see rows twice.
+
+    This method rolls forward compaction if journal exists else deletes
+    leftover temporary files.
+    """
+    _journal = f"{dir_path}/{_COMPACT_JOURNAL}"
+    if fs.exists(_journal):
+        with fs.open(_journal, 'r') as _f:
+            _state = m.YamlLoader.load(cls=dict, file_or_text=_f.read())
+        for _tmp, _final in _state['renames'].items():
+            if fs.exists(f"{dir_path}/{_tmp}"):
+                fs.mv(f"{dir_path}/{_tmp}", f"{dir_path}/{_final}")
+        for _src in _state['delete']:
+            if fs.exists(f"{dir_path}/{_src}"):
+                fs.rm(f"{dir_path}/{_src}")
+        fs.rm(_journal)
+    for _f in fs.ls(dir_path, detail=False):
+        if _f.rsplit("/", 1)[-1].startswith(_COMPACT_TMP_PREFIX):
+            fs.rm(_f)
+
+
+def _compact_dir(
+    fs: "AbstractFileSystem", dir_path: str, small_file_size: int,
+    max_rows_per_file: int, max_rows_per_group: int,
+) -> int:
+    """
+    Merges runs of adjacent (in append order) small files in a partition
+    dir ... merged files are named after first file of run so that append
+    order is preserved. Returns number of files removed.
+    """
+    # ---------------------------------------------------- 01
+    # finish any interrupted compaction
+    _finish_compaction(fs, dir_path)
+
+    # ---------------------------------------------------- 02
+    # find runs of small files in append order
+    _files = {}
+    for _info in fs.ls(dir_path, detail=True):
+        _name = _info['name'].rsplit("/", 1)[-1]
+        if _info['type'] != 'file' or _name[0] in ['.', '_']:
+            continue
+        _files[_name] = _info['size']
+    _names = sorted(_files.keys(), key=_file_order_key)
+    _runs = [[]]
+    for _name in _names:
+        if _files[_name] < small_file_size:
+            _runs[-1].append(_name)
+        elif bool(_runs[-1]):
+            _runs.append([])
+    _runs = [_run for _run in _runs if len(_run) > 1]
+    if not bool(_runs):
+        return 0
+
+    # ---------------------------------------------------- 03
+    # write merged files with temporary names
+    # note that row groups cannot be bigger than files
+    _rows_per_group = max_rows_per_group
+    if max_rows_per_file > 0:
+        _rows_per_group = min(max_rows_per_group, max_rows_per_file)
+    _renames = {}
+    _delete = []
+    _taken = set(_names)
+    for _i, _run in enumerate(_runs):
+        _table = pa.concat_tables(
+            [
+                pds.dataset(
+                    f"{dir_path}/{_name}", filesystem=fs, format=_FILE_FORMAT
+                ).to_table()
+                for _name in _run
+            ]
+        )
+        _tmp_template = f"{_COMPACT_TMP_PREFIX}{_i}.{{i}}"
+        _written = []
+        pds.write_dataset(
+            data=_table, base_dir=dir_path, filesystem=fs,
+            format=_FILE_FORMAT, basename_template=_tmp_template,
+            # single threaded so that rows keep their order (`preserve_order`
+            # is not available in pyarrow versions we support)
+            use_threads=False,
+            max_rows_per_file=max_rows_per_file,
+            min_rows_per_group=_rows_per_group,
+            max_rows_per_group=_rows_per_group,
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda _wf: _written.append(_wf.path.rsplit("/", 1)[-1]),
+        )
+        _prefix = _run[0].split(".", 1)[0]
+        _n = 0
+        for _tmp in sorted(_written, key=lambda _: int(_.rsplit(".", 1)[-1])):
+            while f"{_prefix}.c{_n}" in _taken:
+                _n += 1
+            _renames[_tmp] = f"{_prefix}.c{_n}"
+            _taken.add(_renames[_tmp])
+        _delete.extend(_run)
+
+    # ---------------------------------------------------- 04
+    # write journal and then finish compaction
+    with fs.open(f"{dir_path}/{_COMPACT_JOURNAL}", 'w') as _f:
+        _f.write(m.YamlDumper.dump(dict(renames=_renames, delete=_delete)))
+    _finish_compaction(fs, dir_path)
+
+    # ---------------------------------------------------- 05
+    return len(_delete) - len(_renames)
+
+
 class _TableInternal(m.Internal):
 
+    class LITERAL(m.Internal.LITERAL):
+        max_cached_datasets = 64
+
     partitioning: t.Optional[pds.Partitioning]
     schema: t.Optional[pa.Schema]
     partition_cols: t.Optional[t.List[str]]
+    # datasets cached by partition dirs they cover (None key for entire
+    # table) ... refer `_get_dataset`
+    datasets: t.Dict[t.Optional[t.Tuple], t.Optional[pds.Dataset]] = dict
+
+    def vars_that_can_be_overwritten(self) -> t.List[str]:
+        return super().vars_that_can_be_overwritten() + ['datasets']
 
     @property
     def is_updated(self) -> bool:
@@ -426,6 +756,11 @@ class Table(Folder):
             hashable=self,
         )
 
+    @property
+    @util.CacheResult
+    def internal(self) -> _TableInternal:
+        return _TableInternal(owner=self)
+
     @property
     @util.CacheResult
     def partitioning(self) -> t.Optional[pds.Partitioning]:
@@ -470,7 +805,7 @@ class Table(Folder):
         """
         if not self.upath.exists():
             return False
-        if self.upath.is_dir_empty():
+        if len(self.upath.fs.ls(self.upath.path)) == 0:
             return False
         return True
 
@@ -478,6 +813,7 @@ class Table(Folder):
         self,
         columns: t.List[str] = None,
         filter_expression: pds.Expression = None,
+        filters: FILTERS_TYPE = None,
     ) -> t.Union[bool, pa.Table]:
         """
         This is weird design choice here to return table when filters are
@@ -491,25 +827,25 @@ class Table(Folder):
 
         When filters=None we will get simple exists check ... i.e. True or
         False will be returned and no data on the disk will be read ;)
+
+        Note that `filters` on partition_cols are resolved to partition dirs
+        so that only those dirs are scanned ... refer `_prune_partition_dirs`
         """
         # if nothing exists simply exit ... as there is no table to read on disk
+        # Note that if some dataset is cached we know that something exists
         # noinspection PyTypeChecker
-        if not self.upath.exists():
-            return False
-        if self.upath.is_dir_empty():
-            return False
+        if not bool(self.internal.datasets):
+            if not self.something_exists():
+                return False
 
         # this should always be there as above check suggests that something
         # is already there
-        _partitioning = self.partitioning
-        _schema = self.config.schema
-        assert _schema is not None  # todo remove later
+        assert self.config.schema is not None  # todo remove later
 
         # read table
         _table = _read_table(
             self, columns=columns, filter_expression=filter_expression,
-            partitioning=_partitioning,
-            table_schema=_schema
+            filters=filters,
         )
 
         # return
@@ -519,29 +855,35 @@ class Table(Folder):
         self,
         columns: t.List[str] = None,
         filter_expression: pds.Expression = None,
+        filters: FILTERS_TYPE = None,
     ) -> t.Optional[pa.Table]:
+        """
+        Note that the dataset (i.e. listing of files) is cached and is
+        invalidated on `write`, `append` and `delete_` ... so if some other
+        process writes to this table call `invalidate_cache` to see new rows.
+
+        `filters` on partition_cols are resolved to partition dirs so that
+        only those dirs are scanned ... refer `_prune_partition_dirs`
+        """
         # log
         _rp = self.richy_panel
         _rp.update(f"reading for {self.__class__}")
 
         # if nothing exists simply exit ... as there is no table to read on disk
+        # Note that if some dataset is cached we know that something exists
         # noinspection PyTypeChecker
-        if not self.upath.exists():
-            return None
-        if self.upath.is_dir_empty():
-            return None
+        if not bool(self.internal.datasets):
+            if not self.something_exists():
+                return None
 
         # this should always be there as above check suggests that something
         # is already there
-        _partitioning = self.partitioning
-        _schema = self.config.schema
-        assert _schema is not None  # todo remove later
+        assert self.config.schema is not None  # todo remove later
 
         # read table
         _table = _read_table(
             self, columns=columns, filter_expression=filter_expression,
-            partitioning=_partitioning,
-            table_schema=_schema
+            filters=filters,
         )
 
         # extra check
@@ -560,6 +902,74 @@ class Table(Folder):
         # return
         return _table
 
+    def scanner(
+        self,
+        columns: t.List[str] = None,
+        filter_expression: pds.Expression = None,
+        filters: FILTERS_TYPE = None,
+        batch_size: int = None,
+        batch_readahead: int = None,
+        fragment_readahead: int = None,
+        use_threads: bool = True,
+    ) -> t.Optional[pds.Scanner]:
+        """
+        Streaming alternative to `read` ... returns `pds.Scanner` (or None if
+        nothing exists) which can be used to stream record batches with
+        column projection and filters applied per batch.
+
+        + batch_size: max rows per record batch (pyarrow default when None)
+        + batch_readahead: number of batches to read ahead in a file
+        + fragment_readahead: number of files to read ahead
+        + use_threads: read and decode with multiple threads
+
+        Refer `read` for `filters` and caching behaviour
+        """
+        # log
+        _rp = self.richy_panel
+        _rp.update(f"scanning for {self.__class__}")
+
+        # if nothing exists simply exit ... as there is no table to read on disk
+        # noinspection PyTypeChecker
+        if not bool(self.internal.datasets):
+            if not self.something_exists():
+                return None
+
+        # return
+        return _make_scanner(
+            self, columns=columns, filter_expression=filter_expression,
+            filters=filters, batch_size=batch_size,
+            batch_readahead=batch_readahead,
+            fragment_readahead=fragment_readahead, use_threads=use_threads,
+        )
+
+    def iter_batches(
+        self,
+        columns: t.List[str] = None,
+        filter_expression: pds.Expression = None,
+        filters: FILTERS_TYPE = None,
+        batch_size: int = None,
+        batch_readahead: int = None,
+        fragment_readahead: int = None,
+        use_threads: bool = True,
+    ) -> t.Iterator[pa.RecordBatch]:
+        """
+        Yields `pa.RecordBatch`es so that tables larger than memory can be
+        aggregated ... refer `scanner` for arguments.
+
+        Note that batches with no rows (e.g. filtered out) are skipped.
+        """
+        _scanner = self.scanner(
+            columns=columns, filter_expression=filter_expression,
+            filters=filters, batch_size=batch_size,
+            batch_readahead=batch_readahead,
+            fragment_readahead=fragment_readahead, use_threads=use_threads,
+        )
+        if _scanner is None:
+            return
+        for _batch in _scanner.to_batches():
+            if _batch.num_rows > 0:
+                yield _batch
+
     def write(self, value: pa.Table) -> bool:
         # log
         _rp = self.richy_panel
@@ -574,8 +984,7 @@ class Table(Folder):
             ]
             _filters = [list(_) for _ in itertools.product(*_unique_filters)]
             _table = self.exists(
-                columns=self.partition_cols,
-                filter_expression=make_expression(_filters))
+                columns=self.partition_cols, filters=_filters)
             if _table:
                 raise e.validation.NotAllowed(
                     notes=[
@@ -590,6 +999,7 @@ class Table(Folder):
 
         # write
         _write_table(self, table=value, append=False)
+        self.invalidate_cache()
 
         # return success
         return True
@@ -610,10 +1020,109 @@ class Table(Folder):
 
         # write
         _write_table(self, table=value, delete_partition=delete_partition, append=True)
+        self.invalidate_cache()
+
+        # auto compaction of partitions that were appended
+        from .. import Settings
+        if Settings.TABLE_AUTO_COMPACT_MIN_FILES > 0:
+            self._auto_compact(value=value, min_files=Settings.TABLE_AUTO_COMPACT_MIN_FILES)
 
         # return success
         return True
 
+    def _auto_compact(self, value: pa.Table, min_files: int):
+        # get partition dirs to which the value was appended
+        if bool(self.partition_cols):
+            _dirs = [
+                tuple(str(_) for _ in _tuple)
+                for _tuple in itertools.product(
+                    *[value[_pc].unique().to_pylist() for _pc in self.partition_cols]
+                )
+            ]
+        else:
+            _dirs = [tuple()]
+        # compact dirs with too many files
+        _fs = self.upath.fs
+        for _dir in _dirs:
+            _dir_path = "/".join([self.upath.path, *_dir])
+            if not _fs.exists(_dir_path):
+                continue
+            if len(_fs.ls(_dir_path, detail=False)) >= min_files:
+                self.compact(filters=[Filter(_c, "=", _v) for _c, _v in zip(self.partition_cols or [], _dir)])
+
+    def compact(
+        self,
+        filters: FILTERS_TYPE = None,
+        small_file_size_in_mb: float = None,
+        max_rows_per_file: int = None,
+        max_rows_per_group: int = None,
+    ) -> int:
+        """
+        Merges small files written by frequent `append` calls in every
+        partition dir into bigger files with right-sized row groups.
+
+        + Only runs of small files (smaller than `small_file_size_in_mb`)
+          that are adjacent in append order are merged ... and merged file is
+          named after first file of the run so that append order (i.e. the
+          timestamp file names) is preserved
+        + `filters` on partition_cols restrict the partition dirs to compact
+          (refer `read`)
+        + Every dir is compacted via journal so that interrupted compaction is
+          rolled forward on next call ... refer `_finish_compaction`
+
+        Defaults are taken from `Settings.TABLE_COMPACT_*`. Returns number of
+        files removed.
+        """
+        # log
+        from .. import Settings
+        _rp = self.richy_panel
+        _rp.update(f"compacting for {self.__class__}")
+
+        # ------------------------------------------------------01
+        # some vars
+        if small_file_size_in_mb is None:
+            small_file_size_in_mb = Settings.TABLE_COMPACT_SMALL_FILE_SIZE_IN_MB
+        if max_rows_per_file is None:
+            max_rows_per_file = Settings.TABLE_COMPACT_MAX_ROWS_PER_FILE
+        if max_rows_per_group is None:
+            max_rows_per_group = Settings.TABLE_COMPACT_MAX_ROWS_PER_GROUP
+        _fs = self.upath.fs
+        _path = self.upath.path
+        if not self.something_exists():
+            return 0
+
+        # ------------------------------------------------------02
+        # find leaf dirs i.e. partition dirs with files
+        _partition_dirs = None
+        if bool(filters) and bool(self.partition_cols):
+            _partition_dirs = _prune_partition_dirs(
+                filters=filters, partition_cols=self.partition_cols)
+        _leaf_dirs = set()
+        for _dir in [tuple()] if _partition_dirs is None else _partition_dirs:
+            _dir_path = "/".join([_path, *_dir])
+            if not _fs.exists(_dir_path):
+                continue
+            _depth = len(self.partition_cols or []) - len(_dir)
+            for _f in _fs.find(_dir_path, maxdepth=_depth + 1, withdirs=False):
+                _leaf_dirs.add(_f.rsplit("/", 1)[0])
+
+        # ------------------------------------------------------03
+        # compact
+        _removed = 0
+        for _leaf_dir in _rp.track(
+            sequence=sorted(_leaf_dirs), task_name="compacting partitions#",
+        ):
+            _removed += _compact_dir(
+                _fs, _leaf_dir,
+                small_file_size=int(small_file_size_in_mb * 1024 * 1024),
+                max_rows_per_file=max_rows_per_file,
+                max_rows_per_group=max_rows_per_group,
+            )
+
+        # ------------------------------------------------------04
+        self.invalidate_cache()
+        return _removed
+
     # Note that the parent delete is for Folder but for Table also we have
     # folder which represents folder and we will take care of the delete. But
     # note that this delete is special with `filters` argument while `force`
@@ -672,7 +1181,8 @@ class Table(Folder):
         _partition_cols = self.partition_cols
         if filters is None:
             # noinspection PyTypeChecker
-            self.upath.delete(recursive=True)
+            self.upath.fs.rm(self.upath.path, recursive=True)
+            self.invalidate_cache()
             # just make a empty dir again fo that things are consistent for
             # Folder class i.e. is_created can detect things properly
             self.upath.mkdir()
@@ -687,18 +1197,14 @@ class Table(Folder):
             )
 
         # ------------------------------------------------------02
-        # cook _filter_expression
         # make sure that filters are only made for partition_cols as only folders
         # i.e. pivots can be deleted
-        _filter_expression = make_expression(
-            filters=filters, restrict_columns=_partition_cols)
+        make_expression(filters=filters, restrict_columns=_partition_cols)
 
         # ------------------------------------------------------03
         # lets figure out what matches and make dict that can help resolve
         # paths to delete
-        _matches = self.read(
-            columns=_partition_cols, filter_expression=_filter_expression
-        )
+        _matches = self.read(columns=_partition_cols, filters=filters)
         _uniques = [_matches[_c].unique().to_pylist() for _c in _partition_cols]
 
         # ------------------------------------------------------04
@@ -708,7 +1214,15 @@ class Table(Folder):
             _p = _path
             for _ in _tuple:
                 _p /= str(_)
-            _p.delete(recursive=True)
+            _p.fs.rm(_p.path, recursive=True)
 
         # ------------------------------------------------------05
+        self.invalidate_cache()
         return True
+
+    def invalidate_cache(self):
+        """
+        Drops datasets cached for reads (refer `_get_dataset`) ... called
+        automatically on write/append/delete_ of this instance
+        """
+        self.internal.datasets.clear()
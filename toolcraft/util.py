@@ -32,6 +32,9 @@ import h5py
 import itertools
 import psutil
 import contextlib
+import threading
+import sqlite3
+import weakref
 _now = datetime.datetime.now
 
 
@@ -136,6 +139,55 @@ class MergedFile:
             self.current_file.close()
 
 
+class SqliteDb:
+    """
+    Base for classes backed by one SQLite database file.
+
+    sqlite connections cannot be shared across threads or forked processes so
+    `connection` keeps one per (process, thread) ... subclasses set pragmas and
+    create tables in `init_connection`.
+    """
+
+    def __init__(self, db_path: t.Union[str, pathlib.Path]):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+
+    def init_connection(self, conn: sqlite3.Connection):
+        """
+        Called once for every new connection
+        """
+        ...
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        _pid = os.getpid()
+        _conn = getattr(self._local, "connection", None)
+        if _conn is not None and self._local.pid == _pid:
+            return _conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        _conn = sqlite3.connect(self.db_path, timeout=60., isolation_level=None)
+        self.init_connection(_conn)
+        self._local.connection = _conn
+        self._local.pid = _pid
+        return _conn
+
+    @contextlib.contextmanager
+    def transaction(self) -> t.Iterator[sqlite3.Connection]:
+        """
+        `BEGIN IMMEDIATE` transaction (takes write lock upfront so concurrent
+        writers wait on `timeout` instead of failing on lock upgrade) that is
+        committed on exit or rolled back on any exception
+        """
+        _conn = self.connection
+        _conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield _conn
+            _conn.execute("COMMIT")
+        except BaseException:
+            _conn.execute("ROLLBACK")
+            raise
+
+
 # noinspection PyUnresolvedReferences,PyMethodParameters,PyArgumentList
 class MultipleInheritanceNamedTupleMeta(t.NamedTupleMeta):
     # noinspection SpellCheckingInspection
@@ -817,34 +869,211 @@ def WipeCacheResult(decorated_fn_name: str, obj_or_module_name):
     # if obj_or_module_name is str then we assume that decorated function is
     # at module level and not a class method
     if isinstance(obj_or_module_name, str):
-        _cache_store_handler_dict = __import__(obj_or_module_name).__dict__
+        _cache_lock = _CACHE_GLOBAL_LOCK
+        _cache_dict = sys.modules[obj_or_module_name].__dict__.get(CACHE_KEY, None)
     else:
-        _cache_store_handler_dict = obj_or_module_name.__dict__
+        _cache_lock, _cache_dict = _find_instance_cache(obj_or_module_name)
 
-    # check if CACHE_KEY present
-    if CACHE_KEY not in _cache_store_handler_dict.keys():
+    # check if cache container present
+    if _cache_dict is None:
         raise e.code.CodingError(
             notes=[
                 f"We expect CACHE container from which we want to wipe cache"
             ]
         )
 
-    # get the cached container
-    _cache_dict = _cache_store_handler_dict[CACHE_KEY]
-
     # get the cached key
     _cache_key = decorated_fn_name
 
-    # raise error if cache key not present
-    if _cache_key not in _cache_dict.keys():
-        raise e.code.CodingError(
-            notes=[
-                f"There is no element {_cache_key} cached so we cannot wipe it"
-            ]
+    with _cache_lock:
+        # raise error if cache key not present
+        if _cache_key not in _cache_dict.keys():
+            raise e.code.CodingError(
+                notes=[
+                    f"There is no element {_cache_key} cached so we cannot wipe it"
+                ]
+            )
+
+        # wipe contents
+        del _cache_dict[_cache_key]
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """
+    Counters for one function decorated with CacheResult ... update them
+    only via `add` which guards them with a lock
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def add(self, hits: int = 0, misses: int = 0, evictions: int = 0):
+        with _CACHE_STATS_LOCK:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+
+# key is `<module>.<qualname>` of decorated function
+CACHE_STATS = {}  # type: t.Dict[str, CacheStats]
+# guards counters of all CacheStats (never hold other locks while holding it)
+_CACHE_STATS_LOCK = threading.Lock()
+
+# when True CachedProperty does not read cached values directly so that
+# every access goes via CacheResult and is counted in CACHE_STATS ... keep it
+# False unless you are profiling
+CACHE_RECORD_ALL_HITS = False
+
+
+def cache_stats() -> t.Dict[str, t.Dict[str, int]]:
+    """
+    Snapshot of hit/miss/eviction counters for all CacheResult decorated
+    functions, sorted by number of misses
+    """
+    return {
+        _k: dataclasses.asdict(_v) for _k, _v in sorted(
+            CACHE_STATS.items(), key=lambda _: _[1].misses, reverse=True
         )
+    }
 
-    # wipe contents
-    del _cache_dict[_cache_key]
+
+class _BoundedCache(collections.OrderedDict):
+    """
+    Cache container for module level functions decorated with CacheResult
+    that evicts least recently used entries beyond `max_size` and entries
+    older than `ttl_in_sec`.
+    """
+
+    def __init__(self, max_size: t.Optional[int] = None, ttl_in_sec: t.Optional[float] = None):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl_in_sec = ttl_in_sec
+        self.stored_on = {}  # type: t.Dict[str, float]
+        self.stats = {}  # type: t.Dict[str, CacheStats]
+
+    def get_value(self, key: str, stats: CacheStats):
+        """
+        Raises KeyError if not cached (or expired)
+        """
+        _value = self[key]
+        if self.ttl_in_sec is not None and \
+                time.monotonic() - self.stored_on[key] > self.ttl_in_sec:
+            del self[key]
+            stats.add(evictions=1)
+            raise KeyError(key)
+        self.move_to_end(key)
+        return _value
+
+    def set_value(self, key: str, value: t.Any, stats: CacheStats):
+        self[key] = value
+        self.stored_on[key] = time.monotonic()
+        self.stats[key] = stats
+        if self.max_size is not None:
+            while len(self) > self.max_size:
+                _evicted_key, _ = self.popitem(last=False)
+                self.stats[_evicted_key].add(evictions=1)
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self.stored_on.pop(key, None)
+
+    def popitem(self, last: bool = True):
+        _key, _value = super().popitem(last=last)
+        self.stored_on.pop(_key, None)
+        return _key, _value
+
+
+def set_module_cache_bounds(
+    module_name: str, max_size: t.Optional[int] = None,
+    ttl_in_sec: t.Optional[float] = None,
+):
+    """
+    Bound the cache of module level functions decorated with CacheResult in
+    module `module_name` ... already cached values are kept (subject to
+    new bounds)
+    """
+    _module_dict = sys.modules[module_name].__dict__
+    _old_cache = _module_dict.get(CACHE_KEY, {})
+    _new_cache = _BoundedCache(max_size=max_size, ttl_in_sec=ttl_in_sec)
+    for _k, _v in _old_cache.items():
+        _new_cache.set_value(
+            _k, _v, CACHE_STATS.setdefault(f"{module_name}.{_k}", CacheStats()))
+    _module_dict[CACHE_KEY] = _new_cache
+
+
+class CachedProperty:
+    """
+    Non data descriptor that replaces `property` whose getter is decorated with
+    CacheResult (done for all Tracker subclasses in `Tracker.__init_subclass__`).
+
+    Once computed the value is read straight from the cache container of the
+    instance (see `_INSTANCE_CACHES`) without going via CacheResult wrapper.
+    Nothing is written to instance __dict__ so frozen dataclasses stay
+    picklable and copies do not share cached values.
+    """
+
+    def __init__(self, prop: property, name: str):
+        self.fget = prop.fget
+        self.name = name
+        self.cache_key = prop.fget.__name__
+        self.__doc__ = prop.__doc__
+        self.__isabstractmethod__ = prop.__isabstractmethod__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if not CACHE_RECORD_ALL_HITS:
+            try:
+                return _INSTANCE_CACHES[id(instance)][1][self.cache_key]
+            except KeyError:
+                ...
+        return self.fget(instance)
+
+
+# guards creation of per instance cache containers and module level cache
+# containers
+_CACHE_GLOBAL_LOCK = threading.RLock()
+
+# id of instance -> (lock, cache container) for methods decorated with
+# CacheResult ... kept outside of instance __dict__ so that lock and cached
+# values are not pickled/copied along with instance. Keyed by id and not
+# WeakKeyDictionary as hashable classes compare by value and equal instances
+# must not share locks. Entry is dropped when instance is garbage collected.
+_INSTANCE_CACHES = {}  # type: t.Dict[int, t.Tuple[threading.RLock, t.Dict[str, t.Any]]]
+
+
+def _find_instance_cache(
+    obj,
+) -> t.Tuple[t.Optional[threading.RLock], t.Optional[t.Dict[str, t.Any]]]:
+    try:
+        return _INSTANCE_CACHES[id(obj)]
+    except KeyError:
+        return obj.__dict__.get(CACHE_KEY, (None, None))
+
+
+def _instance_cache(obj) -> t.Tuple[threading.RLock, t.Dict[str, t.Any]]:
+    """
+    Returns (lock, cache container) of `obj` ... created on first call
+    """
+    _lock, _cache_store = _find_instance_cache(obj)
+    if _cache_store is not None:
+        return _lock, _cache_store
+    with _CACHE_GLOBAL_LOCK:
+        _key = id(obj)
+        try:
+            return _INSTANCE_CACHES[_key]
+        except KeyError:
+            ...
+        _entry = (threading.RLock(), {})
+        try:
+            weakref.finalize(obj, _INSTANCE_CACHES.pop, _key, None)
+        except TypeError:
+            # not weak referenceable (for example int subclasses) so keep it
+            # in instance __dict__ like before
+            return obj.__dict__.setdefault(CACHE_KEY, _entry)
+        _INSTANCE_CACHES[_key] = _entry
+        return _entry
 
 
 # noinspection PyPep8Naming
@@ -860,6 +1089,12 @@ def CacheResult(*dec_args, **dec_kwargs):
 
     Hence many open-source library like that from authors of cookiecutter
     tend to use function decorators
+
+    All validations are done once while decorating. While calling, the cached
+    value is returned with two dict lookups. On cache miss we take a lock
+    (per instance for methods and global for module level functions) so that
+    value is computed only once across threads. Note that lock is reentrant
+    so cached properties can use other cached properties of same instance.
     """
     # ---------------------------------------------------------------- 01
     # check if decorator is used appropriately
@@ -914,7 +1149,7 @@ def CacheResult(*dec_args, **dec_kwargs):
     # the dec function should not be local function
     # but note that it is okay if it is method of local class ...
     #   as in that case it will be "<...>.<locals>.SomeClassName.method"
-    if dec_args[0].__qualname__.split(".")[-2] == "<locals>":
+    if "<locals>" in dec_args[0].__qualname__.split(".")[-2:-1]:
         raise e.validation.NotAllowed(
             notes=[
                 f"We do not allow to use CacheResult decorator to be used "
@@ -932,85 +1167,78 @@ def CacheResult(*dec_args, **dec_kwargs):
     # hack to detect if method ... note that if local function this will be
     # True but anyways we block that in 01.05 ;)
     _is_method = _dec_func.__qualname__.endswith(f".{_dec_func.__name__}")
+    # register stats
+    _stats = CacheStats()
+    CACHE_STATS[f"{_dec_func.__module__}.{_dec_func.__qualname__}"] = _stats
 
     # ---------------------------------------------------------------- 03
     # define wrapper function
-    # todo: if used with property replace property with value at runtime for
-    #  faster access
-    # todo: check if the method on which CacheResult is used is made property
-    #  by property decorator
-    @functools.wraps(_dec_func)
-    def _wrap_func(*args, **kwargs):
+    if _is_method:
         # ------------------------------------------------------------ 03.01
-        # some validations
-        # kwargs should not be provided
-        if bool(kwargs):
-            raise e.code.NotAllowed(
-                notes=[
-                    f"Please so not supply kwargs while using caching",
-                    f"Found kwargs",
-                    kwargs
-                ]
-            )
-        # check args provided
-        if _is_method:
-            if len(args) != 1:
-                raise e.code.ShouldNeverHappen(
+        # for methods cache container is in `_INSTANCE_CACHES`
+        def _compute(self):
+            _lock, _cache_store = _instance_cache(self)
+            with _lock:
+                # some other thread might have computed it meanwhile
+                if _cache_key in _cache_store:
+                    _stats.add(hits=1)
+                    return _cache_store[_cache_key]
+                # compute as key not present with results
+                _stats.add(misses=1)
+                _res = _dec_func(self)
+                _cache_store[_cache_key] = _res
+                return _res
+
+        @functools.wraps(_dec_func)
+        def _wrap_func(self, *args, **kwargs):
+            if bool(args) or bool(kwargs):
+                raise e.code.NotAllowed(
                     notes=[
-                        f"We detected above that this is method so we expect "
-                        f"one arg which is self to be available ..."
+                        f"Please do not supply args/kwargs to method decorated "
+                        f"with CacheResult",
+                        f"Found args", args, f"Found kwargs", kwargs,
                     ]
                 )
-        else:
-            if len(args) != 0:
+            try:
+                _res = _INSTANCE_CACHES[id(self)][1][_cache_key]
+                _stats.add(hits=1)
+                return _res
+            except KeyError:
+                ...
+            return _compute(self)
+    else:
+        # ------------------------------------------------------------ 03.02
+        # for module level functions cache container is in module __dict__ and
+        # can be bounded (see `set_module_cache_bounds`)
+        def _compute():
+            with _CACHE_GLOBAL_LOCK:
+                _dict = sys.modules[_dec_func.__module__].__dict__
+                _cache_store = _dict.get(CACHE_KEY, None)
+                if _cache_store is None:
+                    _cache_store = _BoundedCache()
+                    _dict[CACHE_KEY] = _cache_store
+                try:
+                    _res = _cache_store.get_value(_cache_key, _stats)
+                    _stats.add(hits=1)
+                    return _res
+                except KeyError:
+                    ...
+                _stats.add(misses=1)
+                _res = _dec_func()
+                _cache_store.set_value(_cache_key, _res, _stats)
+                return _res
+
+        @functools.wraps(_dec_func)
+        def _wrap_func(*args, **kwargs):
+            if bool(args) or bool(kwargs):
                 raise e.code.NotAllowed(
                     notes=[
-                        f"Please do not supply args to function decorated "
+                        f"Please do not supply args/kwargs to function decorated "
                         f"with CacheResult",
-                        f"Found args", args,
+                        f"Found args", args, f"Found kwargs", kwargs,
                     ]
                 )
-        # if one arg is provided it will be self (i.e the dec function is
-        # defined within class)
-        if _is_method:
-            # todo: check if args[0] is python object i.e. the decorated
-            #  function will cache things inside this instance ...
-            ...
-
-        # ------------------------------------------------------------ 03.02
-        # get dict in which we will add cache container
-        if _is_method:
-            _cache_store_handler_dict = args[0].__dict__
-        else:
-            _cache_store_handler_dict = __import__(
-                _dec_func.__module__
-            ).__dict__
-        # add cache container if not present
-        if CACHE_KEY in _cache_store_handler_dict.keys():
-            _cache_store = _cache_store_handler_dict[
-                CACHE_KEY
-            ]  # type: dict
-        else:
-            _cache_store = {}
-            _cache_store_handler_dict[CACHE_KEY] = _cache_store
-
-        # ------------------------------------------------------------ 03.03
-        # if _cache_key not present set it by return value of _dec_fn
-        # NOTE: as smart dict for cache cannot be freezed we use
-        # `_cache_store._dict` so that we can bypass freeze checks ;)
-        # noinspection PyProtectedMember
-        if _cache_key not in _cache_store.keys():
-            # compute as key not present with results
-            _res = _dec_func(*args, **kwargs)
-
-            # add the results to dict
-            # Note that we did not use `_cache_store._dict` as the cache dict
-            # will never be freezed ... so writing to it will always be allowed
-            _cache_store[_cache_key] = _res
-
-        # return
-        # noinspection PyProtectedMember
-        return _cache_store[_cache_key]
+            return _compute()
 
     # ---------------------------------------------------------------- 04
     # add a tag to detect if decorator was used
@@ -1021,11 +1249,24 @@ def CacheResult(*dec_args, **dec_kwargs):
     return _wrap_func
 
 
+def replace_cached_properties(cls: t.Type):
+    """
+    Replace properties (without setter and deleter) defined in `cls` whose
+    getter is decorated with CacheResult by CachedProperty
+    """
+    for _name, _value in list(cls.__dict__.items()):
+        if isinstance(_value, property) and _value.fset is None and \
+                _value.fdel is None and hasattr(_value.fget, '_pk_cached'):
+            setattr(cls, _name, CachedProperty(_value, _name))
+
+
 def is_cached(property_or_fn) -> bool:
     if inspect.ismethod(property_or_fn) or inspect.isfunction(property_or_fn):
         return hasattr(property_or_fn, '_pk_cached')
     elif isinstance(property_or_fn, property):
         return hasattr(property_or_fn.fget, '_pk_cached')
+    elif isinstance(property_or_fn, CachedProperty):
+        return True
     elif isinstance(property_or_fn, HookUp):
         return hasattr(property_or_fn.method, '_pk_cached')
     else:
@@ -1606,6 +1847,14 @@ class HookUp:
         self.pre_method = pre_method
         self.post_method = post_method
 
+        # default kwargs of method are resolved once here (and not on every
+        # call) so that pre- and post-method gets the default kwargs
+        self.default_kwargs = {
+            _k: _p.default
+            for _k, _p in inspect.signature(method).parameters.items()
+            if _p.default is not inspect.Parameter.empty
+        }
+
         # assign self i.e. HookUp instance in cls
         # Note we do not do `cls.method = self` as that overrides parents HookUp
         # cls.__dict__[method.__name__] = self
@@ -1620,11 +1869,16 @@ class HookUp:
 
     def __get__(self, method_self, method_self_type):
         """
-        This makes use of description pattern ... now we have access to method's
-        self so that we can use it in __call__
+        This makes use of description pattern ... like functions we return a
+        bound method for instance access so that method's self is passed to
+        __call__
+
+        Note: we do not store method_self on self as HookUp instance is shared
+          by all instances of cls (and threads using them)
         """
-        self.method_self = method_self
-        return self
+        if method_self is None:
+            return self
+        return types.MethodType(self, method_self)
 
     def __eq__(self, other):
         """
@@ -1643,7 +1897,7 @@ class HookUp:
         """
         return self.method == other.method
 
-    def __call__(self, *args, **kwargs):
+    def __call__(self, method_self, *args, **kwargs):
 
         # -----------------------------------------------------------01
         # although might not be necessary ... we enforce
@@ -1656,43 +1910,15 @@ class HookUp:
             )
         # get default kwargs if not supplied ...
         # so that pre- and post-method gets the default kwargs
-        for _k, _p in inspect.signature(self.method).parameters.items():
-            if _k not in kwargs.keys():
-                # noinspection PyUnresolvedReferences,PyProtectedMember
-                if _p.default != inspect._empty:
-                    kwargs[_k] = _p.default
+        if bool(self.default_kwargs):
+            kwargs = {**self.default_kwargs, **kwargs}
 
         # -----------------------------------------------------------02
-        # bake title
-        # _kwargs_str = []
-        # for k, v in kwargs.items():
-        #     if isinstance(v, list):
-        #         if len(v) == 1 or len(v) == 2:
-        #             v = f"{v}"
-        #         else:
-        #             v = f"[{v[0]}, ..., {v[-1]}]"
-        #     _kwargs_str.append(
-        #         f"{k}={v}"
-        #     )
-        # _kwargs_str = ", ".join(_kwargs_str)
-        if bool(kwargs):
-            _kwargs_str = "..."
-        else:
-            _kwargs_str = ""
-        # todo: with gui build {self.method_self.name} poses problem find a
-        #  way to avoid logs while building GUI
-        # _title = f"<{self.method_self.name}> {self.cls.__name__}." \
-        _title = f"{self.cls.__name__}." \
-                 f"{self.method.__name__}" \
-                 f"({_kwargs_str})"
-        # _title = logger.replace_with_emoji(_title)
-
-        # -----------------------------------------------------------03
         # call business logic
-        # -----------------------------------------------------------03.01
+        # -----------------------------------------------------------02.01
         # call pre_method is provided
         if self.pre_method is not None:
-            _pre_ret = self.pre_method(self.method_self, **kwargs)
+            _pre_ret = self.pre_method(method_self, **kwargs)
             # pre_method should not return anything
             if _pre_ret is not None:
                 raise e.code.CodingError(
@@ -1704,21 +1930,18 @@ class HookUp:
                         f"Found return value {_pre_ret}"
                     ]
                 )
-        # -----------------------------------------------------------03.03
+        # -----------------------------------------------------------02.02
         # call actual method
-        _ret = self.method(self.method_self, **kwargs)
-        # -----------------------------------------------------------03.04
+        _ret = self.method(method_self, **kwargs)
+        # -----------------------------------------------------------02.03
         # if post_method not provided return what we have
         if self.post_method is not None:
             # call post_method as it is provided
-            # spinner.info(msg=f"pre: {pre_method}")
-            # spinner.info(msg=f"{method}")
-            # spinner.info(msg=f"post: {post_method}")
             # todo: any updates to _ret to post_method will be lost if _ret is not updated inplace
             #   be careful ...
             #   may be return _ret in post_method and check if id(_ret) == id(_post_ret)
             _post_ret = self.post_method(
-                self.method_self, hooked_method_return_value=_ret, **kwargs)
+                method_self, hooked_method_return_value=_ret, **kwargs)
             # post_method should not return anything
             if _post_ret is not None:
                 raise e.code.CodingError(
@@ -1731,7 +1954,7 @@ class HookUp:
                     ]
                 )
 
-        # -----------------------------------------------------------04
+        # -----------------------------------------------------------03
         # return the return value of method
         return _ret
 